@@ -1,11 +1,12 @@
 // Commit History Analyzer - The Time Machine
 const axios = require('axios');
+const { setTimeout: sleep } = require('timers/promises');
 const { parseGitHubUrl } = require('./github-fetcher');
 
 /**
  * Fetch file content at a specific commit
  */
-async function fetchFileAtCommit(owner, repo, path, sha) {
+async function fetchFileAtCommit(owner, repo, path, sha, signal) {
   try {
     const response = await axios.get(
       `https://api.github.com/repos/${owner}/${repo}/contents/${path}?ref=${sha}`,
@@ -13,7 +14,8 @@ async function fetchFileAtCommit(owner, repo, path, sha) {
         headers: {
           'Accept': 'application/vnd.github.v3.raw',
           'User-Agent': 'Refactor-Codex'
-        }
+        },
+        signal
       }
     );
     return response.data;
@@ -26,7 +28,7 @@ async function fetchFileAtCommit(owner, repo, path, sha) {
 /**
  * Fetch commit history for a specific file
  */
-async function fetchCommitHistory(owner, repo, path, maxCommits = 10) {
+async function fetchCommitHistory(owner, repo, path, maxCommits = 10, signal) {
   try {
     const response = await axios.get(
       `https://api.github.com/repos/${owner}/${repo}/commits`,
@@ -38,7 +40,8 @@ async function fetchCommitHistory(owner, repo, path, maxCommits = 10) {
         headers: {
           'Accept': 'application/vnd.github.v3+json',
           'User-Agent': 'Refactor-Codex'
-        }
+        },
+        signal
       }
     );
     
@@ -48,6 +51,7 @@ async function fetchCommitHistory(owner, repo, path, maxCommits = 10) {
     
     return response.data;
   } catch (error) {
+    signal?.throwIfAborted();
     if (error.response?.status === 404) {
       throw new Error(`File not found: ${path}. Make sure the path is correct and the file exists in the repository.`);
     } else if (error.response?.status === 403) {
@@ -58,37 +62,43 @@ async function fetchCommitHistory(owner, repo, path, maxCommits = 10) {
 }
 
 /**
- * Analyze code quality over commit history
+ * Analyze code quality over commit history.
+ * options.signal (an AbortSignal) stops fetching and analyzing between and during commits;
+ * options.onProgress({ analyzed, total, point }) is called after each commit (point is null
+ * when the commit was skipped).
  */
 async function analyzeCommitHistory(repoUrl, filePath, analyzeFunction, options = {}) {
-  const { maxCommits = 10 } = options;
+  const { maxCommits = 10, signal, onProgress } = options;
   
   // Parse repository URL
   const { owner, repo } = parseGitHubUrl(repoUrl);
   
   // Fetch commit history
-  const commits = await fetchCommitHistory(owner, repo, filePath, maxCommits);
+  const commits = await fetchCommitHistory(owner, repo, filePath, maxCommits, signal);
   
   const timeline = [];
   
   // Analyze each commit
   for (let i = 0; i < commits.length; i++) {
     const commit = commits[i];
+    let point = null;
     
     // Fetch file content at this commit
-    const content = await fetchFileAtCommit(owner, repo, filePath, commit.sha);
+    const content = await fetchFileAtCommit(owner, repo, filePath, commit.sha, signal);
+    signal?.throwIfAborted();
     
     if (!content) {
+      onProgress?.({ analyzed: i + 1, total: commits.length, point });
       continue;
     }
     
     // Analyze code
     try {
-      const analysis = await analyzeFunction(content, filePath);
+      const analysis = await analyzeFunction(content, filePath, { signal });
       
       // Only add to timeline if we got a valid quality score
       if (!analysis.error && analysis.qualityScore !== undefined && analysis.qualityScore !== null) {
-        timeline.push({
+        point = {
           sha: commit.sha.substring(0, 7),
           fullSha: commit.sha,
           date: commit.commit.author.date,
@@ -97,18 +107,22 @@ async function analyzeCommitHistory(repoUrl, filePath, analyzeFunction, options
           score: analysis.qualityScore,
           smells: analysis.totalSmells || 0,
           functions: analysis.functions?.length || 0
-        });
+        };
+        timeline.push(point);
       } else if (analysis.error) {
         // Skip commits with parse errors (old syntax, etc.)
         console.error(`Skipping commit ${commit.sha.substring(0, 7)}: ${analysis.error}`);
       }
     } catch (err) {
+      signal?.throwIfAborted();
       console.error(`Error analyzing commit ${commit.sha.substring(0, 7)}:`, err.message);
     }
     
+    onProgress?.({ analyzed: i + 1, total: commits.length, point });
+    
     // Small delay to avoid rate limiting
     if (i < commits.length - 1) {
-      await new Promise(resolve => setTimeout(resolve, 200));
+      await sleep(200, undefined, { signal });
     }
   }
   
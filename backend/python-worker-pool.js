@@ -0,0 +1,220 @@
+// Python Worker Pool - keeps warm `--serve` analyzer processes instead of one spawn per request
+const { spawn } = require('child_process');
+const readline = require('readline');
+
+const DEFAULT_TIMEOUT_MS = 30000;
+// A scrape queued behind a long analysis gives up instead of waiting for it
+const METRICS_TIMEOUT_MS = 2000;
+
+/**
+ * A small pool of long-lived Python workers speaking newline-delimited JSON.
+ * Each request carries an id; responses are matched back by that id.
+ */
+class PythonWorkerPool {
+  constructor(script, options = {}) {
+    this.script = script;
+    this.size = options.size || Number(process.env.PYTHON_WORKERS) || 2;
+    this.pythonBin = options.pythonBin || process.env.PYTHON_BIN || 'python';
+    this.timeoutMs = options.timeoutMs || DEFAULT_TIMEOUT_MS;
+    this.metricsTimeoutMs = options.metricsTimeoutMs || METRICS_TIMEOUT_MS;
+    this.label = options.label || 'Python worker';
+    this.args = options.args || [];
+    this.workers = [];
+    this.nextId = 1;
+    this.nextWorker = 0;
+  }
+
+  /**
+   * Start a worker process and wire its stdout back to pending requests
+   */
+  spawnWorker() {
+    const proc = spawn(this.pythonBin, [this.script, '--serve', ...this.args]);
+    const worker = { proc, pending: new Map(), stderr: '' };
+
+    readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (err) {
+        console.error(`${this.label} wrote invalid JSON: ${line}`);
+        return;
+      }
+
+      const entry = worker.pending.get(response.id);
+      if (!entry) return;
+
+      // Streaming workers send per-function records before the final result
+      if ('partial' in response) {
+        if (entry.onPartial) entry.onPartial(response.partial);
+        return;
+      }
+
+      worker.pending.delete(response.id);
+      clearTimeout(entry.timer);
+
+      if (response.error) {
+        entry.reject(new Error(`${this.label} failed: ${response.details || response.error}`));
+      } else {
+        entry.resolve(response.result);
+      }
+    });
+
+    proc.stderr.on('data', (data) => {
+      // Keep only the tail so a noisy worker can't grow memory forever
+      worker.stderr = (worker.stderr + data.toString()).slice(-4000);
+    });
+
+    proc.on('exit', () => {
+      this.retire(worker, new Error(`${this.label} exited: ${worker.stderr}`));
+    });
+
+    // Writes to a worker that just died surface here; the exit handler rejects its requests
+    proc.stdin.on('error', () => {});
+
+    // Spawn failures (e.g. PYTHON_BIN not found) never emit 'exit'
+    proc.on('error', (err) => {
+      console.error(`${this.label} spawn error:`, err.message);
+      this.retire(worker, new Error(`${this.label} failed to start: ${err.message}`));
+    });
+
+    this.workers.push(worker);
+    return worker;
+  }
+
+  /**
+   * Take a worker out of rotation, reject everything pending on it and stop the process.
+   * Safe to call more than once.
+   */
+  retire(worker, error) {
+    this.workers = this.workers.filter(w => w !== worker);
+    for (const entry of worker.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    worker.pending.clear();
+    if (worker.proc.exitCode === null && worker.proc.signalCode === null) worker.proc.kill();
+  }
+
+  /**
+   * Pick the least busy worker, spawning new ones until the pool is full
+   */
+  acquire() {
+    const idle = this.workers.find(w => w.pending.size === 0);
+    if (idle) return idle;
+    if (this.workers.length < this.size) return this.spawnWorker();
+
+    this.nextWorker = (this.nextWorker + 1) % this.workers.length;
+    return this.workers.reduce(
+      (best, w) => (w.pending.size < best.pending.size ? w : best),
+      this.workers[this.nextWorker]
+    );
+  }
+
+  /**
+   * Send one {code, filename} request and resolve with the worker's result.
+   * options.onPartial receives streamed records from `--stream` workers;
+   * options.tool selects the handler on multi-tool workers (combined.py, zygote.py).
+   * options.signal (an AbortSignal) abandons the request.
+   */
+  run(code, filename, options = {}) {
+    const payload = options.tool ? { tool: options.tool, code, filename } : { code, filename };
+    return this.send(this.acquire(), payload, options);
+  }
+
+  /**
+   * Prometheus text from every live worker (workers must run with `--timings`)
+   */
+  async metrics() {
+    const results = await Promise.all(
+      this.workers.map(worker =>
+        this.send(worker, { op: 'metrics' }, { timeoutMs: this.metricsTimeoutMs, restartOnTimeout: false })
+          .catch(() => null)
+      )
+    );
+    return results.filter(Boolean).map(result => result.text);
+  }
+
+  /**
+   * Write one request to a specific worker and resolve with its result.
+   * options.timeoutMs overrides the pool timeout; with options.restartOnTimeout false a
+   * timeout only rejects this request (a late answer is ignored) instead of replacing the worker.
+   */
+  send(worker, payload, options = {}) {
+    return new Promise((resolve, reject) => {
+      const { signal } = options;
+      if (signal?.aborted) {
+        reject(signal.reason);
+        return;
+      }
+      const id = this.nextId++;
+
+      // The listener must go whichever way the request ends: callers such as
+      // analyzeCommitHistory share one signal across many requests
+      const detach = () => signal?.removeEventListener('abort', onAbort);
+
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        detach();
+        reject(new Error(`${this.label} timeout`));
+        // A stuck worker would block everything queued behind it - replace it
+        if (options.restartOnTimeout !== false) {
+          this.retire(worker, new Error(`${this.label} restarted after a timeout`));
+        }
+      }, options.timeoutMs || this.timeoutMs);
+
+      const onAbort = () => {
+        if (!worker.pending.delete(id)) return;
+        clearTimeout(timer);
+        // Nothing else is waiting on this worker, so stop the abandoned analysis;
+        // otherwise let it finish (its response is ignored) rather than fail the others
+        if (worker.pending.size === 0) {
+          this.retire(worker, new Error(`${this.label} stopped after an abort`));
+        }
+        reject(signal.reason);
+      };
+
+      worker.pending.set(id, {
+        resolve: (result) => { detach(); resolve(result); },
+        reject: (err) => { detach(); reject(err); },
+        timer,
+        onPartial: options.onPartial
+      });
+      worker.proc.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+
+      signal?.addEventListener('abort', onAbort, { once: true });
+    });
+  }
+
+  /**
+   * Stop all workers (pending requests are rejected by the exit handler)
+   */
+  close() {
+    for (const worker of this.workers) {
+      worker.proc.stdin.end();
+    }
+  }
+}
+
+/**
+ * Merge Prometheus text from several workers so each metric family appears once
+ */
+function mergePrometheusText(texts) {
+  const families = new Map();
+  for (const text of texts) {
+    for (const line of text.split('\n')) {
+      if (!line) continue;
+      const name = line.startsWith('#')
+        ? line.split(' ')[2]
+        : line.split(/[{ ]/)[0].replace(/_(bucket|sum|count)$/, '');
+      if (!families.has(name)) families.set(name, { comments: [], samples: [] });
+      const family = families.get(name);
+      if (!line.startsWith('#')) family.samples.push(line);
+      else if (!family.comments.includes(line)) family.comments.push(line);
+    }
+  }
+  return [...families.values()]
+    .map(family => [...family.comments, ...family.samples].join('\n'))
+    .join('\n') + '\n';
+}
+
+module.exports = { PythonWorkerPool, mergePrometheusText };
@@ -2,18 +2,241 @@
 """
 Standalone Python code analyzer that reads from stdin and outputs JSON
 Usage: echo '{"code": "...", "filename": "..."}' | python analyzer.py
+       python analyzer.py --serve   (newline-delimited JSON requests, see serve.py)
+       echo '{"files": [{"code": "...", "filename": "..."}]}' | python analyzer.py --jobs 8
+       python analyzer.py --serve --incremental   (re-analyze only edited functions per filename)
+       echo '{"code": "..."}' | python analyzer.py --stream   (NDJSON: function records, then summary)
+       python analyzer.py --compact   (positional rows, index-coded smells; see expand_compact)
+       python analyzer.py --serve --max-seconds 20 --max-nodes 2000000   (partial results past a budget)
+       python analyzer.py --serve --isolate   (fork an rlimited child per request, see zygote.py)
+       python analyzer.py --serve --timings   (per-phase `_timings` and Prometheus histograms, see timings.py)
 """
 
+import os
+import re
 import sys
 import json
 import ast
+import argparse
+import functools
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-class CodeAnalyzer(ast.NodeVisitor):
+import timings
+from cache import cached_call, get_default_cache, source_version
+
+# Cache version stamp - changes whenever this file (and so any threshold) changes
+ANALYZER_VERSION = source_version(__file__)
+
+# Line starts where a top-level statement may begin (used to cut oversized input)
+TOP_LEVEL_LINE = re.compile(r'^(?=[^\s#)\]}])', re.MULTILINE)
+
+# Numbers that are never reported as magic
+NON_MAGIC_NUMBERS = [0, 1, -1, 100, True, False]
+
+class FunctionFacts:
+    """Per-function accumulator for facts that cover the whole function subtree"""
+    __slots__ = ('magic_numbers', 'ties', 'has_try')
+    
     def __init__(self):
+        # value -> first literal seen; 2 and 2.0 share a slot like they would in a set
+        self.magic_numbers = {}
+        # values seen both as int and float - the reported literal depends on walk order
+        self.ties = set()
+        self.has_try = False
+    
+    def add_number(self, value):
+        seen = self.magic_numbers.setdefault(value, value)
+        if type(seen) is not type(value):
+            self.ties.add(value)
+    
+    def merge_into(self, parent):
+        """Fold a finished nested function's facts into its enclosing function"""
+        for value in self.magic_numbers.values():
+            parent.add_number(value)
+        parent.ties.update(self.ties)
+        parent.has_try = parent.has_try or self.has_try
+
+# Smell codes and severities; compact output refers to them by index
+SMELL_CODES = (
+    'long_function',
+    'moderate_function',
+    'deep_nesting',
+    'moderate_nesting',
+    'high_complexity',
+    'moderate_complexity',
+    'too_many_parameters',
+    'magic_numbers',
+    'missing_error_handling',
+    'duplicate_code'
+)
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+
+# (code, severity) -> (message template, suggestion); rendered only for verbose output
+SMELL_TEMPLATES = {
+    ('long_function', 'critical'): (
+        "Function '{name}' is {value} lines long (critical threshold: 100+)",
+        'Break this function into multiple smaller, focused functions'),
+    ('long_function', 'high'): (
+        "Function '{name}' is {value} lines long (high threshold: 50+)",
+        'Consider extracting logical blocks into separate functions'),
+    ('moderate_function', 'medium'): (
+        "Function '{name}' is {value} lines long",
+        'Could be simplified by extracting some logic'),
+    ('deep_nesting', 'high'): (
+        "Function '{name}' has nesting depth of {value} (threshold: 4)",
+        'Use early returns, guard clauses, or extract nested logic'),
+    ('moderate_nesting', 'medium'): (
+        "Function '{name}' has nesting depth of {value}",
+        'Consider flattening with early returns'),
+    ('high_complexity', 'critical'): (
+        "Function '{name}' has cyclomatic complexity of {value} (critical: 20+)",
+        'Refactor immediately - this is untestable'),
+    ('high_complexity', 'high'): (
+        "Function '{name}' has cyclomatic complexity of {value} (high: 10+)",
+        'Break into smaller functions to reduce complexity'),
+    ('moderate_complexity', 'medium'): (
+        "Function '{name}' has cyclomatic complexity of {value}",
+        'Consider simplifying the logic'),
+    ('too_many_parameters', 'high'): (
+        "Function '{name}' has {value} parameters (threshold: 5)",
+        'Use a dataclass, dictionary, or configuration object'),
+    ('too_many_parameters', 'medium'): (
+        "Function '{name}' has {value} parameters",
+        'Consider grouping related parameters'),
+    ('magic_numbers', 'medium'): (
+        "Function '{name}' contains {value} magic numbers",
+        'Extract magic numbers into named constants at module level'),
+    ('magic_numbers', 'low'): (
+        "Function '{name}' contains magic numbers: {value}",
+        'Consider using named constants for clarity'),
+    ('missing_error_handling', 'medium'): (
+        "Function '{name}' lacks error handling",
+        'Add try-except blocks for potential errors'),
+    # Reported by repository scans with clone detection (see clones.py)
+    ('duplicate_code', 'medium'): (
+        "Code in '{name}' is duplicated at {value}",
+        'Extract the shared code into one function and call it from each place'),
+    ('duplicate_code', 'low'): (
+        "Code in '{name}' nearly duplicates {value} (only names or literals differ)",
+        'Extract the shared logic into one function and pass in what differs'),
+}
+
+# Column order of a function in compact output
+COMPACT_FUNCTION_FIELDS = (
+    'name', 'start', 'end', 'length', 'nesting', 'branchCount',
+    'nestedCallbacks', 'params', 'isAsync', 'complexity', 'smells'
+)
+
+# Column order of a smell in compact output
+COMPACT_SMELL_FIELDS = ('code', 'severity', 'line', 'value')
+
+def render_smell(name, smell):
+    """Expand a (code, severity, line, value) smell tuple into the verbose dict"""
+    code, severity, line, value = smell
+    message, suggestion = SMELL_TEMPLATES[(code, severity)]
+    if isinstance(value, (tuple, list)):
+        value = ', '.join(map(str, value))
+    return {
+        'type': code,
+        'severity': severity,
+        'line': line,
+        'message': message.format(name=name, value=value),
+        'suggestion': suggestion
+    }
+
+class FunctionMetrics:
+    """Compact per-function record; smells are (code, severity, line, value) tuples"""
+    __slots__ = ('name', 'start', 'end', 'length', 'nesting', 'branch_count',
+                 'nested_callbacks', 'params', 'is_async', 'complexity', 'smells')
+    
+    def __init__(self, name, start, end, length, params, is_async):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.length = length
+        self.nesting = 0
+        self.branch_count = 0
+        self.nested_callbacks = 0
+        self.params = params
+        self.is_async = is_async
+        self.complexity = None
+        self.smells = []
+    
+    def shifted(self, delta):
+        """Copy of this record moved delta lines down (used when code above it changed)"""
+        if delta == 0:
+            return self
+        copy = FunctionMetrics(self.name, self.start + delta,
+                               self.end + delta if self.end is not None else None,
+                               self.length, self.params, self.is_async)
+        copy.nesting = self.nesting
+        copy.branch_count = self.branch_count
+        copy.nested_callbacks = self.nested_callbacks
+        copy.complexity = self.complexity
+        copy.smells = [(code, severity, line + delta, value) for code, severity, line, value in self.smells]
+        return copy
+    
+    def to_dict(self):
+        """Verbose record with rendered smell messages (the default wire format)"""
+        return {
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'length': self.length,
+            'nesting': self.nesting,
+            'branchCount': self.branch_count,
+            'nestedCallbacks': self.nested_callbacks,
+            'params': self.params,
+            'isAsync': self.is_async,
+            'smells': [render_smell(self.name, smell) for smell in self.smells],
+            'complexity': self.complexity
+        }
+    
+    def score(self):
+        return score_function(self.complexity, self.length, self.nesting, self.params, len(self.smells))
+    
+    def to_compact(self):
+        """Row in COMPACT_FUNCTION_FIELDS order with smells as index-coded rows"""
+        return [
+            self.name, self.start, self.end, self.length, self.nesting, self.branch_count,
+            self.nested_callbacks, self.params, self.is_async, self.complexity,
+            [[SMELL_CODES.index(code), SEVERITIES.index(severity), line, value]
+             for code, severity, line, value in self.smells]
+        ]
+
+def expand_compact(result):
+    """Turn a compact analysis result back into the verbose format"""
+    if result.get('format') != 'compact':
+        return result
+    
+    functions = []
+    for row in result['functions']:
+        func = dict(zip(COMPACT_FUNCTION_FIELDS, row))
+        smells = [
+            (SMELL_CODES[code], SEVERITIES[severity], line, value)
+            for code, severity, line, value in func['smells']
+        ]
+        func['smells'] = [render_smell(func['name'], smell) for smell in smells]
+        functions.append({key: func[key] for key in (
+            'name', 'start', 'end', 'length', 'nesting', 'branchCount',
+            'nestedCallbacks', 'params', 'isAsync', 'smells', 'complexity')})
+    
+    verbose = {key: value for key, value in result.items()
+               if key not in ('format', 'functionFields', 'smellFields', 'smellCodes', 'severities')}
+    verbose['functions'] = functions
+    return verbose
+
+class CodeAnalyzer(ast.NodeVisitor):
+    def __init__(self, on_function=None):
         self.functions = []
+        # Streaming consumers take finished records instead of self.functions
+        self.on_function = on_function
         self.imports = 0
         self.current_function = None
+        self.current_facts = None
         self.nesting_depth = 0
         self.max_nesting = 0
         
@@ -27,40 +250,63 @@ class CodeAnalyzer(ast.NodeVisitor):
     
     def visit_FunctionDef(self, node):
         prev_function = self.current_function
+        prev_facts = self.current_facts
         prev_max_nesting = self.max_nesting
         
-        self.current_function = {
-            'name': node.name,
-            'start': node.lineno,
-            'end': node.end_lineno,
-            'length': node.end_lineno - node.lineno + 1 if node.end_lineno else 1,
-            'nesting': 0,
-            'branchCount': 0,
-            'nestedCallbacks': 0,
-            'params': len(node.args.args),
-            'isAsync': isinstance(node, ast.AsyncFunctionDef),
-            'smells': []
-        }
+        facts = self._visit_function(node)
+        
+        if prev_facts is not None:
+            facts.merge_into(prev_facts)
+        
+        self.current_function = prev_function
+        self.current_facts = prev_facts
+        self.max_nesting = prev_max_nesting
+    
+    def _visit_function(self, node):
+        """Analyze one function subtree, record it in self.functions and return its facts"""
+        self.current_function = FunctionMetrics(
+            name=node.name,
+            start=node.lineno,
+            end=node.end_lineno,
+            length=node.end_lineno - node.lineno + 1 if node.end_lineno else 1,
+            params=len(node.args.args),
+            is_async=isinstance(node, ast.AsyncFunctionDef)
+        )
+        
+        self.current_facts = FunctionFacts()
         
         self.max_nesting = 0
         self.nesting_depth = 0
         
+        # Decorators, defaults and annotations only contribute constants
+        for field, value in ast.iter_fields(node):
+            if field == 'body':
+                continue
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.visit(item)
+            elif isinstance(value, ast.AST):
+                self.visit(value)
+        
         for stmt in node.body:
             self.visit(stmt)
         
-        self.current_function['nesting'] = self.max_nesting
-        self._detect_smells(self.current_function, node)
-        self.functions.append(self.current_function)
+        self.current_function.nesting = self.max_nesting
+        self._detect_smells(self.current_function, node, self.current_facts)
+        if self.on_function:
+            self.on_function(self.current_function)
+        else:
+            self.functions.append(self.current_function)
         
-        self.current_function = prev_function
-        self.max_nesting = prev_max_nesting
+        return self.current_facts
     
     def visit_AsyncFunctionDef(self, node):
         self.visit_FunctionDef(node)
     
     def visit_If(self, node):
         if self.current_function:
-            self.current_function['branchCount'] += 1
+            self.current_function.branch_count += 1
             self.nesting_depth += 1
             self.max_nesting = max(self.max_nesting, self.nesting_depth)
         
@@ -71,7 +317,7 @@ class CodeAnalyzer(ast.NodeVisitor):
     
     def visit_For(self, node):
         if self.current_function:
-            self.current_function['branchCount'] += 1
+            self.current_function.branch_count += 1
             self.nesting_depth += 1
             self.max_nesting = max(self.max_nesting, self.nesting_depth)
         
@@ -82,7 +328,7 @@ class CodeAnalyzer(ast.NodeVisitor):
     
     def visit_While(self, node):
         if self.current_function:
-            self.current_function['branchCount'] += 1
+            self.current_function.branch_count += 1
             self.nesting_depth += 1
             self.max_nesting = max(self.max_nesting, self.nesting_depth)
         
@@ -92,6 +338,9 @@ class CodeAnalyzer(ast.NodeVisitor):
             self.nesting_depth -= 1
     
     def visit_Try(self, node):
+        if self.current_facts is not None:
+            self.current_facts.has_try = True
+        
         if self.current_function:
             self.nesting_depth += 1
             self.max_nesting = max(self.max_nesting, self.nesting_depth)
@@ -111,178 +360,98 @@ class CodeAnalyzer(ast.NodeVisitor):
         if self.current_function:
             self.nesting_depth -= 1
     
-    def _detect_smells(self, func_data, node):
+    def visit_Constant(self, node):
+        if self.current_facts is not None and isinstance(node.value, (int, float)):
+            if node.value not in NON_MAGIC_NUMBERS:
+                self.current_facts.add_number(node.value)
+    
+    def _detect_smells(self, func, node, facts):
         smells = []
-        complexity = calculate_complexity(func_data)
+        complexity = func.branch_count + 1
+        line = func.start
         
         # Long function detection (matching JS thresholds)
-        if func_data['length'] > 100:
-            smells.append({
-                'type': 'long_function',
-                'severity': 'critical',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long (critical threshold: 100+)",
-                'suggestion': 'Break this function into multiple smaller, focused functions'
-            })
-        elif func_data['length'] > 50:
-            smells.append({
-                'type': 'long_function',
-                'severity': 'high',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long (high threshold: 50+)",
-                'suggestion': 'Consider extracting logical blocks into separate functions'
-            })
-        elif func_data['length'] > 20:
-            smells.append({
-                'type': 'moderate_function',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long",
-                'suggestion': 'Could be simplified by extracting some logic'
-            })
+        if func.length > 100:
+            smells.append(('long_function', 'critical', line, func.length))
+        elif func.length > 50:
+            smells.append(('long_function', 'high', line, func.length))
+        elif func.length > 20:
+            smells.append(('moderate_function', 'medium', line, func.length))
         
         # Deep nesting detection
-        if func_data['nesting'] > 4:
-            smells.append({
-                'type': 'deep_nesting',
-                'severity': 'high',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has nesting depth of {func_data['nesting']} (threshold: 4)",
-                'suggestion': 'Use early returns, guard clauses, or extract nested logic'
-            })
-        elif func_data['nesting'] > 3:
-            smells.append({
-                'type': 'moderate_nesting',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has nesting depth of {func_data['nesting']}",
-                'suggestion': 'Consider flattening with early returns'
-            })
+        if func.nesting > 4:
+            smells.append(('deep_nesting', 'high', line, func.nesting))
+        elif func.nesting > 3:
+            smells.append(('moderate_nesting', 'medium', line, func.nesting))
         
         # High complexity detection (McCabe)
         if complexity > 20:
-            smells.append({
-                'type': 'high_complexity',
-                'severity': 'critical',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity} (critical: 20+)",
-                'suggestion': 'Refactor immediately - this is untestable'
-            })
+            smells.append(('high_complexity', 'critical', line, complexity))
         elif complexity > 10:
-            smells.append({
-                'type': 'high_complexity',
-                'severity': 'high',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity} (high: 10+)",
-                'suggestion': 'Break into smaller functions to reduce complexity'
-            })
+            smells.append(('high_complexity', 'high', line, complexity))
         elif complexity > 7:
-            smells.append({
-                'type': 'moderate_complexity',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity}",
-                'suggestion': 'Consider simplifying the logic'
-            })
+            smells.append(('moderate_complexity', 'medium', line, complexity))
         
         # Too many parameters
-        if func_data['params'] > 5:
-            smells.append({
-                'type': 'too_many_parameters',
-                'severity': 'high',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has {func_data['params']} parameters (threshold: 5)",
-                'suggestion': 'Use a dataclass, dictionary, or configuration object'
-            })
-        elif func_data['params'] > 3:
-            smells.append({
-                'type': 'too_many_parameters',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' has {func_data['params']} parameters",
-                'suggestion': 'Consider grouping related parameters'
-            })
+        if func.params > 5:
+            smells.append(('too_many_parameters', 'high', line, func.params))
+        elif func.params > 3:
+            smells.append(('too_many_parameters', 'medium', line, func.params))
         
         # Magic numbers
-        magic_numbers = self._find_magic_numbers(node)
+        magic_numbers = self._magic_numbers(node, facts)
         if len(magic_numbers) > 3:
-            smells.append({
-                'type': 'magic_numbers',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' contains {len(magic_numbers)} magic numbers",
-                'suggestion': 'Extract magic numbers into named constants at module level'
-            })
+            smells.append(('magic_numbers', 'medium', line, len(magic_numbers)))
         elif magic_numbers:
-            smells.append({
-                'type': 'magic_numbers',
-                'severity': 'low',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' contains magic numbers: {', '.join(map(str, magic_numbers[:3]))}",
-                'suggestion': 'Consider using named constants for clarity'
-            })
+            smells.append(('magic_numbers', 'low', line, tuple(magic_numbers[:3])))
         
         # Missing error handling
-        has_try = any(isinstance(stmt, ast.Try) for stmt in ast.walk(node))
-        if not has_try and func_data['length'] > 15:
-            smells.append({
-                'type': 'missing_error_handling',
-                'severity': 'medium',
-                'line': func_data['start'],
-                'message': f"Function '{func_data['name']}' lacks error handling",
-                'suggestion': 'Add try-except blocks for potential errors'
-            })
-        
-        func_data['smells'] = smells
-        func_data['complexity'] = complexity
-    
-    def _find_magic_numbers(self, node):
-        magic_numbers = set()
-        
-        for n in ast.walk(node):
-            if isinstance(n, ast.Constant) and isinstance(n.value, (int, float)):
-                if n.value not in [0, 1, -1, 100, True, False]:
-                    magic_numbers.add(n.value)
-        
-        return sorted(magic_numbers)
-
-def calculate_complexity(func):
-    """Calculate McCabe cyclomatic complexity: M = E - N + 2P (simplified to branches + 1)"""
-    return func['branchCount'] + 1
-
-def calculate_toxicity(analysis):
-    """Calculate toxicity score based on severity-weighted code smells"""
-    if not analysis['functions']:
-        return 0
-    
-    severity_weights = {
-        'high': 10,
-        'medium': 5,
-        'low': 2
-    }
-    
-    type_multipliers = {
-        'high_complexity': 1.5,
-        'deep_nesting': 1.3,
-        'long_function': 1.2,
-        'too_many_parameters': 1.0,
-        'magic_numbers': 1.0,
-        'missing_error_handling': 1.1
-    }
-    
-    total_toxicity = 0
-    
-    for func in analysis['functions']:
-        for smell in func.get('smells', []):
-            weight = severity_weights.get(smell['severity'], 5)
-            multiplier = type_multipliers.get(smell['type'], 1.0)
-            total_toxicity += weight * multiplier
-    
-    # Normalize to 0-100 scale (assume max 20 smells at high severity)
-    max_possible = 20 * 10 * 1.5
-    toxicity = min(100, (total_toxicity / max_possible) * 100)
+        if not facts.has_try and func.length > 15:
+            smells.append(('missing_error_handling', 'medium', line, None))
+        
+        func.smells = smells
+        func.complexity = complexity
     
-    return round(toxicity)
+    def _magic_numbers(self, node, facts):
+        magic_numbers = dict(facts.magic_numbers)
+        
+        if facts.ties:
+            # Rare int/float tie (e.g. 2 and 2.0): report whichever literal
+            # ast.walk reaches first, as the set-based scan always did
+            pending = set(facts.ties)
+            for n in ast.walk(node):
+                if isinstance(n, ast.Constant) and n.value in pending and type(n.value) in (int, float):
+                    magic_numbers[n.value] = n.value
+                    pending.discard(n.value)
+                    if not pending:
+                        break
+        
+        return sorted(magic_numbers.values())
+
+# Toxicity weights per smell severity and type
+SEVERITY_WEIGHTS = {
+    'high': 10,
+    'medium': 5,
+    'low': 2
+}
+
+TYPE_MULTIPLIERS = {
+    'high_complexity': 1.5,
+    'deep_nesting': 1.3,
+    'long_function': 1.2,
+    'too_many_parameters': 1.0,
+    'magic_numbers': 1.0,
+    'missing_error_handling': 1.1
+}
+
+# Normalize to 0-100 scale (assume max 20 smells at high severity)
+MAX_TOXICITY = 20 * 10 * 1.5
+
+def smell_toxicity(smell_type, severity):
+    """Severity-weighted toxicity contributed by one smell"""
+    weight = SEVERITY_WEIGHTS.get(severity, 5)
+    multiplier = TYPE_MULTIPLIERS.get(smell_type, 1.0)
+    return weight * multiplier
 
 def calculate_maintainability_index(quality_score, toxicity, avg_complexity):
     """Calculate maintainability index: MI = 0.5*Q + 0.3*(100-T) + 0.2*(100-5C)"""
@@ -290,68 +459,263 @@ def calculate_maintainability_index(quality_score, toxicity, avg_complexity):
     mi = 0.5 * quality_score + 0.3 * (100 - toxicity) + 0.2 * (100 - complexity_penalty)
     return round(max(0, min(100, mi)))
 
-def calculate_quality_score(analysis):
-    """Calculate quality score matching JavaScript algorithm"""
-    if not analysis['functions']:
-        return 100
+def score_function(complexity, length, nesting, params, smell_count):
+    """Per-function score from its raw metrics"""
+    # Start with base score
+    fn_score = 100
+    
+    # Penalties based on metrics
+    if complexity > 20:
+        fn_score -= 30
+    elif complexity > 10:
+        fn_score -= 20
+    elif complexity > 7:
+        fn_score -= 10
+    elif complexity > 4:
+        fn_score -= 5
+    
+    # Length penalties
+    if length > 100:
+        fn_score -= 25
+    elif length > 50:
+        fn_score -= 15
+    elif length > 20:
+        fn_score -= 8
+    
+    # Nesting penalties
+    if nesting > 4:
+        fn_score -= 20
+    elif nesting > 3:
+        fn_score -= 12
+    elif nesting > 2:
+        fn_score -= 6
+    
+    # Parameter penalties
+    if params > 5:
+        fn_score -= 10
+    elif params > 3:
+        fn_score -= 5
+    
+    # Smell penalties
+    fn_score -= smell_count * 3
+    
+    # Bonus for good practices
+    if length < 15 and complexity < 5:
+        fn_score += 5
+    
+    return max(0, min(100, fn_score))
+
+class TimedCodeAnalyzer(CodeAnalyzer):
+    """CodeAnalyzer that books _detect_smells time as its own phase"""
+    
+    def __init__(self, timer):
+        super().__init__()
+        self.timer = timer
+    
+    def _detect_smells(self, func, node, facts):
+        start = time.perf_counter()
+        super()._detect_smells(func, node, facts)
+        elapsed = time.perf_counter() - start
+        self.timer.add('detect_smells', elapsed)
+        # Keep 'visit' exclusive so the phases add up to the total
+        self.timer.add('visit', -elapsed)
+
+class BudgetExceeded(Exception):
+    """Raised inside the visit when a Budget limit is hit; args[0] is the reason"""
+
+class Budget:
+    """Resource limits for one analysis; None disables a limit"""
+    __slots__ = ('max_bytes', 'max_nodes', 'max_seconds', 'deadline')
+    
+    # Clock reads are amortized over this many visited nodes
+    CHECK_EVERY = 1024
+    
+    def __init__(self, max_bytes=None, max_nodes=None, max_seconds=None):
+        self.max_bytes = max_bytes
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.deadline = None
+    
+    def start(self):
+        if self.max_seconds is not None:
+            self.deadline = time.perf_counter() + self.max_seconds
     
-    total_score = 0
+    def expired(self):
+        return self.deadline is not None and time.perf_counter() > self.deadline
     
-    for func in analysis['functions']:
-        # Start with base score
-        fn_score = 100
+    def guard(self, analyzer):
+        """Make analyzer.visit count nodes and raise BudgetExceeded past a limit"""
+        visit = analyzer.visit
+        max_nodes = self.max_nodes if self.max_nodes is not None else float('inf')
+        count = 0
+        
+        def guarded_visit(node):
+            nonlocal count
+            count += 1
+            if count > max_nodes:
+                raise BudgetExceeded('max_nodes')
+            if not count % self.CHECK_EVERY and self.expired():
+                raise BudgetExceeded('max_seconds')
+            return visit(node)
+        
+        # generic_visit looks up self.visit, so the instance attribute catches every node
+        analyzer.visit = guarded_visit
+
+def _parse_prefix(code, max_bytes, filename):
+    """Parse the longest prefix under max_bytes that ends at a top-level statement"""
+    prefix = code.encode('utf-8', 'surrogatepass')[:max_bytes].decode('utf-8', 'ignore')
+    # Lines starting in column 0 (not comments or closing brackets) may begin a statement
+    starts = [m.start() for m in TOP_LEVEL_LINE.finditer(prefix)]
+    # Try a few cut points from the end before giving up on the prefix
+    for cut in reversed(starts[-8:]):
+        try:
+            return ast.parse(prefix[:cut], filename=filename)
+        except SyntaxError:
+            continue
+    return ast.Module(body=[], type_ignores=[])
+
+def analyze_python_code(code, filename='file.py', compact=False, budget=None, parse=ast.parse):
+    timer = timings.new_timer('analyze')
+    truncated = None
+    if budget is not None:
+        budget.start()
+    try:
+        with timer.phase('parse'):
+            if budget is not None and budget.max_bytes is not None and len(code.encode('utf-8', 'surrogatepass')) > budget.max_bytes:
+                # Oversized input: analyze the statements that fit instead of nothing
+                truncated = 'max_bytes'
+                tree = _parse_prefix(code, budget.max_bytes, filename)
+            else:
+                tree = parse(code, filename=filename)
+    except SyntaxError as e:
+        return {
+            'error': 'parse_error',
+            'details': str(e),
+            'suggestion': 'Check for syntax errors in your Python code'
+        }
+    
+    analyzer = TimedCodeAnalyzer(timer) if timer.enabled else CodeAnalyzer()
+    if budget is not None:
+        budget.guard(analyzer)
+    with timer.phase('visit'):
+        try:
+            if budget is not None and budget.expired():
+                raise BudgetExceeded('max_seconds')
+            analyzer.visit(tree)
+        except BudgetExceeded as e:
+            # Functions finished before the limit are complete records - keep them
+            truncated = e.args[0]
+    
+    with timer.phase('scoring'):
+        result = build_result(analyzer.functions, analyzer.imports, compact=compact)
+    if truncated:
+        result['truncated'] = True
+        result['truncatedReason'] = truncated
+    return timer.finish(result, code, tree)
+
+class MetricsAccumulator:
+    """Running file-level metrics, fed one finished function record at a time"""
+    
+    def __init__(self):
+        self.function_count = 0
+        self.total_length = 0
+        self.total_complexity = 0
+        self.total_score = 0
+        self.total_toxicity = 0
+        self.total_smells = 0
+        self.smells_by_type = defaultdict(int)
+    
+    def add(self, func, score=None):
+        """Add one FunctionMetrics record (score may be passed in when already known)"""
+        self.function_count += 1
+        self.total_length += func.length
+        self.total_complexity += func.complexity
+        self.total_score += func.score() if score is None else score
+        
+        for code, severity, _line, _value in func.smells:
+            self.smells_by_type[code] += 1
+            self.total_smells += 1
+            self.total_toxicity += smell_toxicity(code, severity)
+    
+    def result(self, imports, functions=None, compact=False):
+        """Analysis result; 'functions' is included only when the records were kept"""
+        count = self.function_count
+        avg_length = self.total_length // count if count else 0
+        
+        # Calculate average complexity
+        avg_complexity = round(self.total_complexity / count, 2) if count else 0
+        
+        result = {
+            'imports': imports,
+            'exports': 0,
+            'functions': functions,
+            'totalSmells': self.total_smells,
+            'smellsByType': dict(self.smells_by_type),
+            'qualityScore': 100,
+            'toxicity': 0,
+            'maintainabilityIndex': 0,
+            'summary': {
+                'totalFunctions': count,
+                'averageLength': avg_length,
+                'averageComplexity': avg_complexity,
+                'healthStatus': 'unknown'
+            }
+        }
+        if functions is None:
+            del result['functions']
+        elif compact:
+            result['functions'] = [func.to_compact() for func in functions]
+        else:
+            result['functions'] = [func.to_dict() for func in functions]
+        if compact:
+            # Compact wire format: positional rows and index-coded smells, no repeated strings.
+            # Streamed summaries carry the schema too, for the rows sent ahead of them.
+            result = {
+                'format': 'compact',
+                'functionFields': list(COMPACT_FUNCTION_FIELDS),
+                'smellFields': list(COMPACT_SMELL_FIELDS),
+                'smellCodes': list(SMELL_CODES),
+                'severities': list(SEVERITIES),
+                **result
+            }
+        
+        # Quality is the mean per-function score; toxicity the severity-weighted smell total
+        if count:
+            result['qualityScore'] = max(0, min(100, round(self.total_score / count)))
+            result['toxicity'] = round(min(100, (self.total_toxicity / MAX_TOXICITY) * 100))
+        result['maintainabilityIndex'] = calculate_maintainability_index(
+            result['qualityScore'],
+            result['toxicity'],
+            avg_complexity
+        )
+        
+        # Calculate technical debt (15 minutes per smell)
+        technical_debt_minutes = self.total_smells * 15
+        result['technicalDebt'] = {
+            'minutes': technical_debt_minutes,
+            'hours': round(technical_debt_minutes / 60, 1),
+            'formatted': f"{technical_debt_minutes // 60}h {technical_debt_minutes % 60}m" if technical_debt_minutes >= 60 else f"{technical_debt_minutes}m"
+        }
         
-        # Calculate complexity for this function
-        complexity = calculate_complexity(func)
+        score = result['qualityScore']
+        result['summary']['healthStatus'] = (
+            'healthy' if score >= 80 else
+            'needs_improvement' if score >= 50 else
+            'critical'
+        )
         
-        # Penalties based on metrics
-        if complexity > 20:
-            fn_score -= 30
-        elif complexity > 10:
-            fn_score -= 20
-        elif complexity > 7:
-            fn_score -= 10
-        elif complexity > 4:
-            fn_score -= 5
-        
-        # Length penalties
-        if func['length'] > 100:
-            fn_score -= 25
-        elif func['length'] > 50:
-            fn_score -= 15
-        elif func['length'] > 20:
-            fn_score -= 8
-        
-        # Nesting penalties
-        if func['nesting'] > 4:
-            fn_score -= 20
-        elif func['nesting'] > 3:
-            fn_score -= 12
-        elif func['nesting'] > 2:
-            fn_score -= 6
-        
-        # Parameter penalties
-        if func['params'] > 5:
-            fn_score -= 10
-        elif func['params'] > 3:
-            fn_score -= 5
-        
-        # Smell penalties
-        smell_count = len(func.get('smells', []))
-        fn_score -= smell_count * 3
-        
-        # Bonus for good practices
-        if func['length'] < 15 and complexity < 5:
-            fn_score += 5
-        
-        total_score += max(0, min(100, fn_score))
-    
-    # Average score across all functions
-    avg_score = round(total_score / len(analysis['functions']))
-    
-    return max(0, min(100, avg_score))
-
-def analyze_python_code(code, filename='file.py'):
+        return result
+
+def build_result(functions, imports, function_scores=None, compact=False):
+    """Build the analysis result and file-level metrics from FunctionMetrics records"""
+    metrics = MetricsAccumulator()
+    for index, func in enumerate(functions):
+        metrics.add(func, function_scores[index] if function_scores is not None else None)
+    return metrics.result(imports, functions, compact)
+
+def stream_python_code(code, filename='file.py', emit=None, compact=False):
+    """Analyze code, passing each function record to emit() as soon as it is finished.
+    Returns the file-level summary (the usual result without 'functions')."""
     try:
         tree = ast.parse(code, filename=filename)
     except SyntaxError as e:
@@ -361,79 +725,178 @@ def analyze_python_code(code, filename='file.py'):
             'suggestion': 'Check for syntax errors in your Python code'
         }
     
-    analyzer = CodeAnalyzer()
+    metrics = MetricsAccumulator()
+    
+    def on_function(record):
+        metrics.add(record)
+        if emit:
+            emit(record.to_compact() if compact else record.to_dict())
+    
+    # Records are not retained, so peak memory no longer grows with function count
+    analyzer = CodeAnalyzer(on_function=on_function)
     analyzer.visit(tree)
     
-    smells_by_type = defaultdict(int)
-    total_smells = 0
-    
-    for func in analyzer.functions:
-        for smell in func.get('smells', []):
-            smells_by_type[smell['type']] += 1
-            total_smells += 1
-    
-    avg_length = 0
-    if analyzer.functions:
-        avg_length = sum(f['length'] for f in analyzer.functions) // len(analyzer.functions)
-    
-    # Calculate average complexity
-    avg_complexity = 0
-    if analyzer.functions:
-        total_complexity = sum(calculate_complexity(f) for f in analyzer.functions)
-        avg_complexity = round(total_complexity / len(analyzer.functions), 2)
-    
-    result = {
-        'imports': analyzer.imports,
-        'exports': 0,
-        'functions': analyzer.functions,
-        'totalSmells': total_smells,
-        'smellsByType': dict(smells_by_type),
-        'qualityScore': 0,
-        'toxicity': 0,
-        'maintainabilityIndex': 0,
-        'summary': {
-            'totalFunctions': len(analyzer.functions),
-            'averageLength': avg_length,
-            'averageComplexity': avg_complexity,
-            'healthStatus': 'unknown'
+    return metrics.result(analyzer.imports, compact=compact)
+
+def analyze_python_code_cached(code, filename='file.py', cache=None, compact=False, budget=None, parse=ast.parse):
+    """analyze_python_code behind the on-disk result cache - hits skip ast.parse entirely"""
+    analyze = functools.partial(analyze_python_code, compact=compact, budget=budget, parse=parse)
+    return cached_call(analyze, 'analyze-compact' if compact else 'analyze', ANALYZER_VERSION, code, filename, cache)
+
+def _analyze_item(item, use_cache=False, compact=False):
+    """Analyze one {code, filename} item, turning crashes into an error result"""
+    analyze = analyze_python_code_cached if use_cache else analyze_python_code
+    try:
+        return analyze(item.get('code', ''), item.get('filename', 'file.py'), compact=compact)
+    except Exception as e:
+        return {
+            'error': 'analyzer_error',
+            'details': str(e)
         }
-    }
+
+def _analyze_chunk(chunk, use_cache=False, compact=False):
+    """Worker entry point: analyze a chunk of (index, item) pairs in one task"""
+    return [(index, _analyze_item(item, use_cache, compact)) for index, item in chunk]
+
+def _default_chunksize(item_count, jobs):
+    # ~4 chunks per worker balances IPC overhead against stragglers
+    return max(1, -(-item_count // (jobs * 4)))
+
+def iter_analyze_batch(items, jobs=None, chunksize=None, use_cache=False, compact=False):
+    """Analyze many {code, filename} items in parallel, yielding (index, result) as they complete"""
+    items = list(items)
+    jobs = jobs or os.cpu_count() or 1
     
-    # Calculate all metrics
-    result['qualityScore'] = calculate_quality_score(result)
-    result['toxicity'] = calculate_toxicity(result)
-    result['maintainabilityIndex'] = calculate_maintainability_index(
-        result['qualityScore'],
-        result['toxicity'],
-        avg_complexity
-    )
-    
-    # Calculate technical debt (15 minutes per smell)
-    technical_debt_minutes = total_smells * 15
-    result['technicalDebt'] = {
-        'minutes': technical_debt_minutes,
-        'hours': round(technical_debt_minutes / 60, 1),
-        'formatted': f"{technical_debt_minutes // 60}h {technical_debt_minutes % 60}m" if technical_debt_minutes >= 60 else f"{technical_debt_minutes}m"
-    }
+    if jobs <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            yield index, _analyze_item(item, use_cache, compact)
+        return
     
-    score = result['qualityScore']
-    result['summary']['healthStatus'] = (
-        'healthy' if score >= 80 else
-        'needs_improvement' if score >= 50 else
-        'critical'
-    )
+    chunksize = chunksize or _default_chunksize(len(items), jobs)
+    indexed = list(enumerate(items))
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
     
-    return result
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+        futures = [executor.submit(_analyze_chunk, chunk, use_cache, compact) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def analyze_batch(items, jobs=None, chunksize=None, use_cache=False, compact=False):
+    """Analyze many {code, filename} items in parallel, returning results in input order"""
+    items = list(items)
+    results = [None] * len(items)
+    
+    for index, result in iter_analyze_batch(items, jobs, chunksize, use_cache, compact):
+        results[index] = result
+    
+    return results
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Analyze Python code read as JSON from stdin')
+    parser.add_argument('--serve', action='store_true',
+                        help='answer newline-delimited JSON requests until stdin closes')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes for batch input {"files": [...]} (default: CPU count)')
+    parser.add_argument('--stream', action='store_true',
+                        help='emit one NDJSON record per function as it finishes, then a summary record'
+                             ' (no cache, session, budget, timings or --isolate)')
+    parser.add_argument('--compact', action='store_true',
+                        help='compact wire format: positional function rows, index-coded smells, no messages')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reuse unchanged functions from the previous revision of the same filename')
+    parser.add_argument('--cache', action='store_true',
+                        help='serve repeated inputs from the on-disk result cache (see cache.py)')
+    parser.add_argument('--cache-stats', action='store_true',
+                        help='print result cache hit/miss totals (all processes) and size, then exit')
+    parser.add_argument('--isolate', action='store_true',
+                        help='with --serve: handle each request in a forked, rlimited child (see zygote.py)')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='analyze only the leading statements that fit in this many bytes')
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help='stop visiting after this many AST nodes')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='stop visiting after this much wall time')
+    parser.add_argument('--timings', action='store_true',
+                        help='attach per-phase `_timings` to results and keep latency histograms')
+    args = parser.parse_args(argv)
+    if args.stream:
+        # stream_python_code has no cache, session, budget or timer, and forked children
+        # answer with one envelope, so these would be silently dropped
+        conflicts = [flag for flag, value in (
+            ('--cache', args.cache), ('--incremental', args.incremental), ('--isolate', args.isolate),
+            ('--max-bytes', args.max_bytes is not None), ('--max-nodes', args.max_nodes is not None),
+            ('--max-seconds', args.max_seconds is not None), ('--timings', args.timings)
+        ) if value]
+        if conflicts:
+            parser.error(f"--stream can't be combined with {', '.join(conflicts)}")
+    return args
 
 if __name__ == '__main__':
+    # Modules imported below (incremental, zygote) must share this Budget/BudgetExceeded,
+    # not a second copy of the module imported as `analyzer`
+    sys.modules.setdefault('analyzer', sys.modules[__name__])
+    args = _parse_args(sys.argv[1:])
+    if args.timings:
+        timings.enable()
+    if args.incremental:
+        # Editor/agent loops: per-file sessions replay functions whose fingerprint is unchanged
+        from incremental import analyze_incremental, analyze_incremental_cached
+        analyze = analyze_incremental_cached if args.cache else analyze_incremental
+    else:
+        analyze = analyze_python_code_cached if args.cache else analyze_python_code
+    
+    if args.max_bytes is not None or args.max_nodes is not None or args.max_seconds is not None:
+        analyze = functools.partial(analyze, budget=Budget(args.max_bytes, args.max_nodes, args.max_seconds))
+    
+    analyze = functools.partial(analyze, compact=args.compact)
+    stream = functools.partial(stream_python_code, compact=args.compact)
+    
+    if args.cache_stats:
+        print(json.dumps(get_default_cache().stats()))
+        sys.exit(0)
+    
+    if args.serve:
+        # Warm worker mode: one JSON request per line until stdin closes
+        from serve import serve
+        if args.isolate:
+            from zygote import serve_forked
+            serve_forked({'analyze': analyze}, 'analyzer_error')
+        elif args.stream:
+            serve(stream, 'analyzer_error', streaming=True, tool='analyze')
+        else:
+            serve(analyze, 'analyzer_error', tool='analyze')
+        sys.exit(0)
+    
+    if args.stream:
+        try:
+            input_data = json.loads(sys.stdin.read())
+            
+            def emit(record):
+                sys.stdout.write(json.dumps({'type': 'function', 'function': record}) + '\n')
+                sys.stdout.flush()
+            
+            summary = stream(input_data.get('code', ''), input_data.get('filename', 'file.py'), emit)
+            print(json.dumps({'type': 'error' if 'error' in summary else 'summary', **summary}))
+            sys.exit(0)
+        except Exception as e:
+            print(json.dumps({'type': 'error', 'error': 'analyzer_error', 'details': str(e)}))
+            sys.exit(1)
+    
     try:
         # Read JSON input from stdin
         input_data = json.loads(sys.stdin.read())
-        code = input_data.get('code', '')
-        filename = input_data.get('filename', 'file.py')
         
-        # Analyze the code
-        result = analyze_python_code(code, filename)
+        if 'files' in input_data:
+            # Batch mode: fan files out across a process pool, results in input order
+            result = {'results': analyze_batch(
+                input_data['files'], jobs=args.jobs, use_cache=args.cache, compact=args.compact
+            )}
+        else:
+            code = input_data.get('code', '')
+            filename = input_data.get('filename', 'file.py')
+            
+            # Analyze the code
+            result = analyze(code, filename)
         
         # Output JSON result to stdout
         print(json.dumps(result))
@@ -444,4 +907,4 @@ if __name__ == '__main__':
             'details': str(e)
         }
         print(json.dumps(error_result))
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
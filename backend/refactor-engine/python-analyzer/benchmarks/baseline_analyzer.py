@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+The CodeAnalyzer visitor as it was before the single-pass rewrite, kept verbatim as the
+reference for bench_single_pass.py: dict records, and ast.walk re-scans of every function
+subtree for magic numbers and try blocks. Not used by the analyzer itself.
+"""
+
+import ast
+
+class CodeAnalyzer(ast.NodeVisitor):
+    def __init__(self):
+        self.functions = []
+        self.imports = 0
+        self.current_function = None
+        self.nesting_depth = 0
+        self.max_nesting = 0
+        
+    def visit_Import(self, node):
+        self.imports += len(node.names)
+        self.generic_visit(node)
+    
+    def visit_ImportFrom(self, node):
+        self.imports += len(node.names)
+        self.generic_visit(node)
+    
+    def visit_FunctionDef(self, node):
+        prev_function = self.current_function
+        prev_max_nesting = self.max_nesting
+        
+        self.current_function = {
+            'name': node.name,
+            'start': node.lineno,
+            'end': node.end_lineno,
+            'length': node.end_lineno - node.lineno + 1 if node.end_lineno else 1,
+            'nesting': 0,
+            'branchCount': 0,
+            'nestedCallbacks': 0,
+            'params': len(node.args.args),
+            'isAsync': isinstance(node, ast.AsyncFunctionDef),
+            'smells': []
+        }
+        
+        self.max_nesting = 0
+        self.nesting_depth = 0
+        
+        for stmt in node.body:
+            self.visit(stmt)
+        
+        self.current_function['nesting'] = self.max_nesting
+        self._detect_smells(self.current_function, node)
+        self.functions.append(self.current_function)
+        
+        self.current_function = prev_function
+        self.max_nesting = prev_max_nesting
+    
+    def visit_AsyncFunctionDef(self, node):
+        self.visit_FunctionDef(node)
+    
+    def visit_If(self, node):
+        if self.current_function:
+            self.current_function['branchCount'] += 1
+            self.nesting_depth += 1
+            self.max_nesting = max(self.max_nesting, self.nesting_depth)
+        
+        self.generic_visit(node)
+        
+        if self.current_function:
+            self.nesting_depth -= 1
+    
+    def visit_For(self, node):
+        if self.current_function:
+            self.current_function['branchCount'] += 1
+            self.nesting_depth += 1
+            self.max_nesting = max(self.max_nesting, self.nesting_depth)
+        
+        self.generic_visit(node)
+        
+        if self.current_function:
+            self.nesting_depth -= 1
+    
+    def visit_While(self, node):
+        if self.current_function:
+            self.current_function['branchCount'] += 1
+            self.nesting_depth += 1
+            self.max_nesting = max(self.max_nesting, self.nesting_depth)
+        
+        self.generic_visit(node)
+        
+        if self.current_function:
+            self.nesting_depth -= 1
+    
+    def visit_Try(self, node):
+        if self.current_function:
+            self.nesting_depth += 1
+            self.max_nesting = max(self.max_nesting, self.nesting_depth)
+        
+        self.generic_visit(node)
+        
+        if self.current_function:
+            self.nesting_depth -= 1
+    
+    def visit_With(self, node):
+        if self.current_function:
+            self.nesting_depth += 1
+            self.max_nesting = max(self.max_nesting, self.nesting_depth)
+        
+        self.generic_visit(node)
+        
+        if self.current_function:
+            self.nesting_depth -= 1
+    
+    def _detect_smells(self, func_data, node):
+        smells = []
+        complexity = calculate_complexity(func_data)
+        
+        # Long function detection (matching JS thresholds)
+        if func_data['length'] > 100:
+            smells.append({
+                'type': 'long_function',
+                'severity': 'critical',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long (critical threshold: 100+)",
+                'suggestion': 'Break this function into multiple smaller, focused functions'
+            })
+        elif func_data['length'] > 50:
+            smells.append({
+                'type': 'long_function',
+                'severity': 'high',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long (high threshold: 50+)",
+                'suggestion': 'Consider extracting logical blocks into separate functions'
+            })
+        elif func_data['length'] > 20:
+            smells.append({
+                'type': 'moderate_function',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' is {func_data['length']} lines long",
+                'suggestion': 'Could be simplified by extracting some logic'
+            })
+        
+        # Deep nesting detection
+        if func_data['nesting'] > 4:
+            smells.append({
+                'type': 'deep_nesting',
+                'severity': 'high',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has nesting depth of {func_data['nesting']} (threshold: 4)",
+                'suggestion': 'Use early returns, guard clauses, or extract nested logic'
+            })
+        elif func_data['nesting'] > 3:
+            smells.append({
+                'type': 'moderate_nesting',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has nesting depth of {func_data['nesting']}",
+                'suggestion': 'Consider flattening with early returns'
+            })
+        
+        # High complexity detection (McCabe)
+        if complexity > 20:
+            smells.append({
+                'type': 'high_complexity',
+                'severity': 'critical',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity} (critical: 20+)",
+                'suggestion': 'Refactor immediately - this is untestable'
+            })
+        elif complexity > 10:
+            smells.append({
+                'type': 'high_complexity',
+                'severity': 'high',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity} (high: 10+)",
+                'suggestion': 'Break into smaller functions to reduce complexity'
+            })
+        elif complexity > 7:
+            smells.append({
+                'type': 'moderate_complexity',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has cyclomatic complexity of {complexity}",
+                'suggestion': 'Consider simplifying the logic'
+            })
+        
+        # Too many parameters
+        if func_data['params'] > 5:
+            smells.append({
+                'type': 'too_many_parameters',
+                'severity': 'high',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has {func_data['params']} parameters (threshold: 5)",
+                'suggestion': 'Use a dataclass, dictionary, or configuration object'
+            })
+        elif func_data['params'] > 3:
+            smells.append({
+                'type': 'too_many_parameters',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' has {func_data['params']} parameters",
+                'suggestion': 'Consider grouping related parameters'
+            })
+        
+        # Magic numbers
+        magic_numbers = self._find_magic_numbers(node)
+        if len(magic_numbers) > 3:
+            smells.append({
+                'type': 'magic_numbers',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' contains {len(magic_numbers)} magic numbers",
+                'suggestion': 'Extract magic numbers into named constants at module level'
+            })
+        elif magic_numbers:
+            smells.append({
+                'type': 'magic_numbers',
+                'severity': 'low',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' contains magic numbers: {', '.join(map(str, magic_numbers[:3]))}",
+                'suggestion': 'Consider using named constants for clarity'
+            })
+        
+        # Missing error handling
+        has_try = any(isinstance(stmt, ast.Try) for stmt in ast.walk(node))
+        if not has_try and func_data['length'] > 15:
+            smells.append({
+                'type': 'missing_error_handling',
+                'severity': 'medium',
+                'line': func_data['start'],
+                'message': f"Function '{func_data['name']}' lacks error handling",
+                'suggestion': 'Add try-except blocks for potential errors'
+            })
+        
+        func_data['smells'] = smells
+        func_data['complexity'] = complexity
+    
+    def _find_magic_numbers(self, node):
+        magic_numbers = set()
+        
+        for n in ast.walk(node):
+            if isinstance(n, ast.Constant) and isinstance(n.value, (int, float)):
+                if n.value not in [0, 1, -1, 100, True, False]:
+                    magic_numbers.add(n.value)
+        
+        return sorted(magic_numbers)
+
+def calculate_complexity(func):
+    """Calculate McCabe cyclomatic complexity: M = E - N + 2P (simplified to branches + 1)"""
+    return func['branchCount'] + 1
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass CodeAnalyzer vs the pre-rewrite visitor (benchmarks/baseline_analyzer.py)
+Usage: python benchmarks/bench_single_pass.py [--repeat 3]
+Both sides visit the same parsed tree and produce the same function dicts.
+"""
+
+import os
+import sys
+import ast
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import CodeAnalyzer
+from benchmarks.baseline_analyzer import CodeAnalyzer as BaselineCodeAnalyzer
+from benchmarks.generators import generate_long_module, generate_nested_functions
+
+
+def _records(analyzer):
+    # The baseline builds dicts while visiting; the rewrite converts its records afterwards
+    return [func if isinstance(func, dict) else func.to_dict() for func in analyzer.functions]
+
+
+def time_analyzer(cls, tree, repeat):
+    best = float('inf')
+    functions = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        analyzer = cls()
+        analyzer.visit(tree)
+        functions = _records(analyzer)
+        best = min(best, time.perf_counter() - start)
+    return best, functions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpora = {
+        'nested 60 deep x 20': generate_nested_functions(60, 20),
+        'nested 90 deep x 5': generate_nested_functions(90, 5),
+        '2000 functions x 10': generate_long_module(2000, 10),
+    }
+
+    print(f"{'corpus':<24}{'lines':>8}{'baseline':>12}{'single':>12}{'speedup':>10}")
+    for name, code in corpora.items():
+        tree = ast.parse(code)
+        old_time, old_functions = time_analyzer(BaselineCodeAnalyzer, tree, args.repeat)
+        new_time, new_functions = time_analyzer(CodeAnalyzer, tree, args.repeat)
+
+        if old_functions != new_functions:
+            raise SystemExit(f'{name}: single-pass output differs from the baseline analyzer')
+
+        lines = code.count('\n')
+        print(f'{name:<24}{lines:>8}{old_time:>11.3f}s{new_time:>11.3f}s{old_time / new_time:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: analyze_python_code and suggest_refactoring over synthetic and real corpora
+Usage: python benchmarks/bench_suite.py [--repeat 3] [--stdlib-limit 200] [--only analyze]
+       python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+       python benchmarks/bench_suite.py --compare benchmarks/baseline.json --threshold 0.15
+Each corpus runs in a fresh process so its peak RSS is its own. With --compare, exits 1
+when throughput drops or p99 latency grows by more than the threshold.
+"""
+
+import os
+import sys
+import ast
+import glob
+import json
+import math
+import time
+import argparse
+import functools
+import resource
+import traceback
+import multiprocessing
+from queue import Empty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import analyze_python_code
+from refactor_suggester import suggest_refactoring
+from benchmarks.generators import (
+    generate_deep_nesting, generate_flat_module, generate_long_function,
+    generate_long_module, generate_magic_numbers, generate_tiny_functions
+)
+
+# Unbounded ranking: a time budget would cap the work measured on the big corpora
+TARGETS = {
+    'analyze': analyze_python_code,
+    'suggest': functools.partial(suggest_refactoring, max_seconds=None)
+}
+
+# name -> callable returning [(filename, code), ...]
+SYNTHETIC_CORPORA = {
+    'tiny functions x5000': lambda: [('tiny.py', generate_tiny_functions(5000))],
+    'one 10k-line function': lambda: [('giant.py', generate_long_function(10000))],
+    'nesting 50 deep': lambda: [('deep.py', generate_deep_nesting(50))],
+    'magic numbers 200x40': lambda: [('magic.py', generate_magic_numbers(200, 40))],
+    'flat module 30k stmts': lambda: [('flat.py', generate_flat_module(30000))],
+    'long module 500x10': lambda: [('long.py', generate_long_module(500, 10))],
+}
+
+
+def stdlib_corpus(limit):
+    """Top-level stdlib modules, largest first, that parse on this interpreter"""
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(os.__file__), '*.py')))
+    files = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            code = f.read()
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            continue
+        files.append((os.path.basename(path), code))
+    files.sort(key=lambda item: -len(item[1]))
+    return files[:limit]
+
+
+def count_functions(code):
+    return sum(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) for node in ast.walk(ast.parse(code)))
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_corpus(target, files, repeat):
+    """Time target over every file `repeat` times; called inside a fresh process"""
+    func = TARGETS[target]
+    latencies = []
+    total_time = 0.0
+    for _ in range(repeat):
+        for filename, code in files:
+            start = time.perf_counter()
+            func(code, filename)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            total_time += elapsed
+
+    functions = sum(count_functions(code) for _, code in files) * repeat
+    megabytes = sum(len(code.encode('utf-8')) for _, code in files) * repeat / (1024 * 1024)
+    return {
+        'files': len(files),
+        'functionsPerSec': round(functions / total_time, 1) if total_time else 0,
+        'mbPerSec': round(megabytes / total_time, 3) if total_time else 0,
+        'p50Ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99Ms': round(percentile(latencies, 0.99) * 1000, 3),
+        # ru_maxrss is kilobytes on Linux, bytes on macOS
+        'peakRssMb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss /
+                           (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    }
+
+
+# Seconds between checks that the corpus child is still alive
+POLL_SECONDS = 0.5
+
+
+def _child(queue, target, corpus, stdlib_limit, repeat):
+    try:
+        files = stdlib_corpus(stdlib_limit) if corpus == 'stdlib' else SYNTHETIC_CORPORA[corpus]()
+        queue.put(run_corpus(target, files, repeat))
+    except BaseException as e:
+        queue.put({'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()})
+
+
+def run_isolated(target, corpus, stdlib_limit, repeat):
+    """run_corpus in a spawned process so RSS peaks don't leak between corpora
+
+    A child that raises reports {'error': ...}; one that dies without answering
+    (OOM kill, segfault) is reported the same way instead of hanging the suite.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, target, corpus, stdlib_limit, repeat))
+    process.start()
+    try:
+        while True:
+            try:
+                result = queue.get(timeout=POLL_SECONDS)
+                break
+            except Empty:
+                if not process.is_alive():
+                    # The result may have landed between the timeout and the liveness check
+                    try:
+                        result = queue.get(timeout=POLL_SECONDS)
+                    except Empty:
+                        result = {'error': f'corpus process died with exit code {process.exitcode}'}
+                    break
+    finally:
+        process.join()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Regressions beyond threshold as human-readable lines"""
+    failures = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        # MB/s covers corpora without functions (flat modules), where functions/sec is 0
+        for metric in ('functionsPerSec', 'mbPerSec'):
+            if current[metric] < previous[metric] * (1 - threshold):
+                failures.append(f'{key}: {metric} {previous[metric]} -> {current[metric]}')
+        if current['p99Ms'] > previous['p99Ms'] * (1 + threshold):
+            failures.append(f"{key}: p99 {previous['p99Ms']}ms -> {current['p99Ms']}ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', choices=sorted(TARGETS), help='benchmark just one entry point')
+    parser.add_argument('--corpus', action='append', help='run only these corpora (repeatable)')
+    parser.add_argument('--stdlib-limit', type=int, default=200, help='largest N stdlib modules (0 skips stdlib)')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write results as the new baseline')
+    parser.add_argument('--compare', metavar='PATH', help='baseline to check against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed relative regression')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    corpora = list(SYNTHETIC_CORPORA) + (['stdlib'] if args.stdlib_limit else [])
+    if args.corpus:
+        corpora = [name for name in corpora if name in args.corpus]
+    targets = [args.only] if args.only else list(TARGETS)
+
+    results = {}
+    failed = []
+    if not args.json:
+        print(f"{'target':<9}{'corpus':<24}{'func/s':>11}{'MB/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}")
+    for target in targets:
+        for corpus in corpora:
+            result = run_isolated(target, corpus, args.stdlib_limit, args.repeat)
+            if 'error' in result:
+                failed.append(f'{target}/{corpus}')
+                print(f"FAILED {target}/{corpus}: {result['error']}", file=sys.stderr)
+                if result.get('traceback'):
+                    print(result['traceback'], file=sys.stderr, end='')
+                continue
+            results[f'{target}/{corpus}'] = result
+            if not args.json:
+                print(f"{target:<9}{corpus:<24}{result['functionsPerSec']:>11}{result['mbPerSec']:>9}"
+                      f"{result['p50Ms']:>10}{result['p99Ms']:>10}{result['peakRssMb']:>9}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare(results, json.load(f), args.threshold)
+        for failure in failures:
+            print(f'REGRESSION {failure}', file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+    if failed:
+        print(f"{len(failed)} corpora failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic corpora for the analyzer/suggester benchmarks
+Every generator returns Python source text; the same arguments always give the same code.
+"""
+
+
+def generate_nested_functions(depth, width):
+    """Functions nested `depth` deep, each level with `width` numeric statements"""
+    lines = []
+    for level in range(depth):
+        indent = '    ' * level
+        lines.append(f'{indent}def level_{level}(a, b):')
+        for i in range(width):
+            lines.append(f'{indent}    x_{i} = a * {level * width + i + 2} + b')
+            lines.append(f'{indent}    if x_{i} > {i + 3}:')
+            lines.append(f'{indent}        b += {i + 5}')
+    lines.append('    ' * depth + 'return a')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_long_module(functions, body_lines):
+    """Many flat functions, each with a long numeric body"""
+    lines = []
+    for f in range(functions):
+        lines.append(f'def func_{f}(a, b, c):')
+        for i in range(body_lines):
+            lines.append(f'    a = a * {i + 2} + b - {i + 7}')
+            lines.append(f'    for k in range({i + 3}):')
+            lines.append(f'        while c > {i + 11}:')
+            lines.append(f'            c -= {i + 13}')
+        lines.append('    return a')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_tiny_functions(count):
+    """Thousands of two-line functions - per-function overhead dominates"""
+    lines = []
+    for f in range(count):
+        lines.append(f'def tiny_{f}(x):')
+        lines.append('    return x + 1')
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_long_function(statements):
+    """One function `statements` lines long, mixing assignments, branches and loops"""
+    lines = ['def giant(a, b, c, d):', '    total = 0']
+    for i in range(statements // 3):
+        lines.append(f'    total += a * b - c')
+        lines.append(f'    if total > d:')
+        lines.append(f'        total -= d')
+    lines.append('    return total')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_deep_nesting(depth):
+    """A single function whose control flow is nested `depth` blocks deep"""
+    lines = ['def deep(items, limit):', '    result = 0']
+    for level in range(depth):
+        indent = '    ' * (level + 1)
+        if level % 3 == 0:
+            lines.append(f'{indent}for item_{level} in items:')
+        elif level % 3 == 1:
+            lines.append(f'{indent}if item_{level - 1} > limit:')
+        else:
+            lines.append(f'{indent}while limit > {level}:')
+        lines.append(f'{indent}    result += {level}')
+    lines.append(f"{'    ' * (depth + 1)}limit -= 1")
+    lines.append('    return result')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_magic_numbers(functions, constants):
+    """Numeric code where nearly every literal is a distinct magic number"""
+    lines = []
+    for f in range(functions):
+        lines.append(f'def kernel_{f}(x, y):')
+        lines.append('    acc = 0.0')
+        for i in range(constants):
+            value = f * constants + i + 2
+            lines.append(f'    acc += x * {value} + y / {value}.5 - {value * 7}')
+        lines.append('    return acc')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_flat_module(statements):
+    """A huge module of top-level statements and no functions at all"""
+    lines = []
+    for i in range(statements):
+        lines.append(f'value_{i} = {i} * 3 + len("{i}")')
+        if i % 10 == 0:
+            lines.append(f'if value_{i} > {i}:')
+            lines.append(f'    print(value_{i})')
+    return '\n'.join(lines) + '\n'
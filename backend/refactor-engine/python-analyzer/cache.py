@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk result cache for the analyzer and refactoring suggester
+Results are keyed by a hash of (kind, version stamp, filename, code) and stored in SQLite
+with size-bounded LRU eviction. A hit returns the stored JSON without calling ast.parse.
+Hit/miss counters live in the same database, so every worker process (and forked
+--isolate child) sharing the file adds to one set of totals.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'CODEX_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'codex-refactor', 'results.sqlite3')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('CODEX_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+# Evict down to this fraction of max_bytes so we don't evict on every insert
+EVICT_TARGET = 0.9
+
+
+def source_version(*paths):
+    """Version stamp for modules: any edit to their code or thresholds changes the stamp"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(kind, version, code, filename):
+    """Content address for one request"""
+    digest = hashlib.sha256()
+    for part in (kind, version, filename or ''):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(code.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed LRU store of JSON results with hit/miss counters
+
+    self.hits / self.misses count this process's lookups; stats() reports the
+    totals stored alongside the results.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # sqlite connections must not cross fork(), so reopen in each process
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS counters ('
+                ' name TEXT PRIMARY KEY,'
+                ' value INTEGER NOT NULL)'
+            )
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        """Return the cached result for key, or None on a miss"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count(conn, 'misses')
+                conn.commit()
+                self.misses += 1
+                return None
+            conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._count(conn, 'hits')
+            conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def _count(self, conn, name):
+        conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1)'
+            ' ON CONFLICT (name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+    def put(self, key, result):
+        """Store a result and evict least recently used entries past max_bytes"""
+        value = json.dumps(result)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, value, len(value), time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICT_TARGET
+        rows = conn.execute('SELECT key, size FROM results ORDER BY last_access').fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM results WHERE key = ?', doomed)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM results')
+            conn.execute('DELETE FROM counters')
+            conn.commit()
+
+    def stats(self):
+        """Hit/miss totals across every process using this store, plus its current size"""
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results'
+            ).fetchone()
+            counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hitRate': round(hits / lookups, 3) if lookups else 0,
+            'entries': entries,
+            'bytes': size,
+            'maxBytes': self.max_bytes
+        }
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache at DEFAULT_CACHE_PATH, opened lazily"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def cached_call(func, kind, version, code, filename, cache=None):
+    """Return func(code, filename) from the cache, computing and storing it on a miss"""
+    cache = cache or get_default_cache()
+    key = cache_key(kind, version, code, filename)
+
+    result = cache.get(key)
+    if result is None:
+        result = func(code, filename)
+        if isinstance(result, dict):
+            # Budget-truncated results depend on the limits, not just the input
+            if not result.get('truncated'):
+                # Timings describe this computation, not later cache hits
+                cache.put(key, {k: v for k, v in result.items() if k != '_timings'})
+        else:
+            cache.put(key, result)
+    return result
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Ranked extract-function candidates
+Every contiguous slice of a function's top-level body is a candidate. Its benefit is how
+much the worse of the two resulting functions improves on the original in complexity,
+nesting, length and score (as analyzer.py computes them), less the cost of the interface.
+Moving the whole body into a new function therefore gains nothing; balanced splits win.
+Prefix sums make the metrics O(1) per slice, and dataflow is only computed for slices
+whose upper bound can still beat the current best.
+"""
+
+import ast
+from itertools import accumulate
+
+from analyzer import score_function
+
+# Node types CodeAnalyzer counts as branches / as a nesting level
+BRANCH_NODES = (ast.If, ast.For, ast.While)
+NESTING_NODES = (ast.If, ast.For, ast.While, ast.Try, ast.With)
+
+MIN_LINES = 3
+# Score lost per parameter/return value of the extracted function
+INTERFACE_COST = 1.0
+# A return/yield in the slice changes control flow once extracted
+ESCAPE_PENALTY = 10
+# Slices scored between clock reads
+CHECK_EVERY = 256
+
+# Fields holding statement lists; statements (defs, branches) never occur anywhere else
+STATEMENT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def child_statements(node):
+    """Statements (and except handlers / match cases) directly under a statement"""
+    for field in STATEMENT_FIELDS:
+        yield from getattr(node, field, ())
+
+
+def _metrics(stmt):
+    """(branches, deepest nesting) under stmt, counted the way CodeAnalyzer does"""
+    branches = 0
+    deepest = 0
+    stack = [(stmt, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, NESTING_NODES):
+            depth += 1
+            branches += isinstance(node, BRANCH_NODES)
+            deepest = max(deepest, depth)
+        for child in child_statements(node):
+            # Nested functions are measured on their own
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                stack.append((child, depth))
+    return branches, deepest
+
+
+def first_line(stmt):
+    """First line of a statement, counting decorators (a def's lineno is the `def` line)"""
+    decorators = getattr(stmt, 'decorator_list', None)
+    return min(stmt.lineno, *(d.lineno for d in decorators)) if decorators else stmt.lineno
+
+
+def _is_docstring(stmt):
+    return isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+
+
+class BlockScorer:
+    """Scores the contiguous slices of one function body"""
+
+    def __init__(self, function_node):
+        body = function_node.body
+        self.body = body
+        metrics = [_metrics(stmt) for stmt in body]
+        depths = [depth for _, depth in metrics]
+        self.branch_prefix = [0] + list(accumulate(branches for branches, _ in metrics))
+        # Deepest nesting before slice start / after slice end
+        self.depth_before = [0] + list(accumulate(depths, max))
+        self.depth_after = list(accumulate(reversed(depths), max, initial=0))[::-1]
+        self.depths = depths
+
+        self.complexity = self.branch_prefix[-1] + 1
+        self.length = function_node.end_lineno - function_node.lineno + 1 if function_node.end_lineno else 1
+        self.nesting = self.depth_before[-1]
+        self.params = len(function_node.args.args)
+        self.score_before = score_function(self.complexity, self.length, self.nesting, self.params, 0)
+        # global/nonlocal can't move into a module-level function
+        self.pinned = [isinstance(stmt, (ast.Global, ast.Nonlocal)) for stmt in body]
+
+    def slices(self):
+        """(start, end) statement indexes worth scoring"""
+        body = self.body
+        first = 1 if body and _is_docstring(body[0]) else 0
+        for start in range(first, len(body)):
+            if self.pinned[start]:
+                continue
+            for end in range(start, len(body)):
+                if self.pinned[end]:
+                    break
+                # Extracting the whole body only renames the function
+                if start == first and end == len(body) - 1:
+                    continue
+                if (body[end].end_lineno or body[end].lineno) - first_line(body[start]) + 1 >= MIN_LINES:
+                    yield start, end
+
+    def impact(self, start, end, inputs=0):
+        """Metrics change for extracting body[start..end] with `inputs` parameters"""
+        body = self.body
+        lines = (body[end].end_lineno or body[end].lineno) - first_line(body[start]) + 1
+        branches = self.branch_prefix[end + 1] - self.branch_prefix[start]
+
+        complexity_after = self.complexity - branches
+        length_after = self.length - lines + 1
+        nesting_after = max(self.depth_before[start], self.depth_after[end + 1])
+        host_after = score_function(complexity_after, length_after, nesting_after, self.params, 0)
+
+        # The new function: the slice's branches and nesting, plus def line
+        extracted_complexity = branches + 1
+        extracted_length = lines + 1
+        extracted_nesting = max(self.depths[start:end + 1])
+        extracted = score_function(extracted_complexity, extracted_length, extracted_nesting, inputs, 0)
+
+        return {
+            'complexityReduction': self.complexity - max(complexity_after, extracted_complexity),
+            'nestingReduction': self.nesting - max(nesting_after, extracted_nesting),
+            'linesReduction': self.length - max(length_after, extracted_length),
+            'scoreGain': min(host_after, extracted) - self.score_before
+        }
+
+    @staticmethod
+    def value(impact):
+        return (impact['scoreGain'] + impact['complexityReduction'] + impact['nestingReduction']
+                + impact['linesReduction'] / 10)
+
+    def best(self, index, threshold=float('-inf'), budget=None):
+        """Best slice scoring above threshold as (score, start, end, impact, dataflow), or None.
+        Returns (best, slices scored, budget expired); past the budget it settles for the
+        best slice bounded so far."""
+        escape_prefix = index.escape_prefix
+        expired = False
+        bounded = []
+        for count, (start, end) in enumerate(self.slices(), 1):
+            if budget is not None and not count % CHECK_EVERY and budget.expired():
+                expired = True
+                break
+            # No parameters and no interface cost: an upper bound on the final score
+            bound = self.value(self.impact(start, end))
+            if escape_prefix[end + 1] > escape_prefix[start]:
+                bound -= ESCAPE_PENALTY
+            if bound > threshold:
+                bounded.append((-bound, start, end))
+        bounded.sort()
+
+        best = None
+        scored = 0
+        for negative_bound, start, end in bounded:
+            if -negative_bound <= threshold:
+                break
+            if best is not None and (expired or budget is not None and not scored % CHECK_EVERY and budget.expired()):
+                expired = True
+                break
+            scored += 1
+            dataflow = index.block(start, end)
+            impact = self.impact(start, end, len(dataflow['inputs']))
+            score = self.value(impact) - INTERFACE_COST * (len(dataflow['inputs']) + len(dataflow['outputs']))
+            if dataflow['escapes']:
+                score -= ESCAPE_PENALTY
+            if score > threshold:
+                threshold = score
+                best = (score, start, end, impact, dataflow)
+        return best, scored, expired
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Duplicate-code (clone) detection with Merkle hashes of AST subtrees
+Usage: python clones.py /path/to/repo [--jobs 8] [--exact-only] [--min-lines 5] [--min-nodes 40]
+One post-order pass gives every node two digests built from its children's digests: an
+exact one and one with identifiers and literals abstracted away. Functions (name and
+decorators excluded) and statement blocks above a size threshold become units in a
+digest -> locations index; equal exact digests are exact clones, equal abstract digests
+with different exact digests are near-exact clones (renamed variables, changed literals).
+Hashing and grouping are linear in total AST size.
+"""
+
+import ast
+import sys
+import json
+import hashlib
+import argparse
+from collections import defaultdict
+
+from candidates import first_line
+
+# Smallest units worth reporting
+MIN_LINES = 5
+MIN_NODES = 40
+
+# Statement-list fields that form blocks (function bodies are covered by the function unit)
+BLOCK_FIELDS = ('body', 'orelse', 'finalbody')
+
+# Unit tuple columns, compact so worker processes can ship them cheaply
+EXACT, ABSTRACT, KIND, START, END, NODES, NAME, PARENT = range(8)
+
+
+def _digest(parts):
+    return hashlib.blake2b(b'\0'.join(parts), digest_size=16).digest()
+
+
+def subtree_digests(tree, abstract=True):
+    """id(node) -> (exact digest, abstract digest, node count) for every node, iteratively"""
+    # Pre-order lists every parent before its children, so walk it backwards
+    order = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, ast.AST):
+            continue
+        order.append(node)
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                stack.extend(value)
+            elif isinstance(value, ast.AST):
+                stack.append(value)
+
+    digests = {}
+    # Field-less nodes (Load, Add, ...) hash the same everywhere
+    leaves = {}
+    for node in reversed(order):
+        fields = node._fields
+        if not fields:
+            kind = type(node)
+            if kind not in leaves:
+                leaf = _digest([kind.__name__.encode()])
+                leaves[kind] = (leaf, leaf, 1)
+            digests[id(node)] = leaves[kind]
+            continue
+
+        name = type(node).__name__.encode()
+        exact = [name]
+        loose = [name]
+        size = 1
+        is_constant = isinstance(node, ast.Constant)
+        for field in fields:
+            value = getattr(node, field, None)
+            for item in (value if isinstance(value, list) else (value,)):
+                if isinstance(item, ast.AST):
+                    child_exact, child_loose, child_size = digests[id(item)]
+                    exact.append(child_exact)
+                    loose.append(child_loose)
+                    size += child_size
+                elif item is None:
+                    exact.append(b'-')
+                    loose.append(b'-')
+                else:
+                    text = repr(item).encode('utf-8', 'backslashreplace')
+                    exact.append(text)
+                    if not abstract:
+                        continue
+                    if is_constant and field == 'value':
+                        # Literals keep only their type
+                        loose.append(type(item).__name__.encode())
+                    elif isinstance(item, str):
+                        # Every other string field of a node is an identifier
+                        loose.append(b'_')
+                    else:
+                        loose.append(text)
+            # Field separator, so [a], [] and [], [a] differ
+            exact.append(b')')
+            loose.append(b')')
+        digests[id(node)] = (_digest(exact), _digest(loose) if abstract else b'', size)
+    return digests
+
+
+def _list_digest(kind, nodes, digests, column):
+    return _digest([kind] + [digests[id(node)][column] for node in nodes])
+
+
+def unit_hashes(tree, abstract=True, min_lines=MIN_LINES, min_nodes=MIN_NODES):
+    """Units of one module as (exact, abstract, kind, start, end, nodes, name, parent) tuples.
+    Digests are hex strings; parent is the index of the nearest enclosing unit or -1."""
+    digests = subtree_digests(tree, abstract)
+    units = []
+
+    def add(kind, nodes, start, end, name, parent):
+        size = sum(digests[id(node)][2] for node in nodes)
+        if end - start + 1 < min_lines or size < min_nodes:
+            return parent
+        tag = kind.encode()
+        units.append((
+            _list_digest(tag, nodes, digests, 0).hex(),
+            _list_digest(tag, nodes, digests, 1).hex() if abstract else '',
+            kind, start, end, size, name, parent
+        ))
+        return len(units) - 1
+
+    # (statement, enclosing function/class name, enclosing unit)
+    stack = [(stmt, '<module>', -1) for stmt in tree.body]
+    while stack:
+        node, name, parent = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # The function's name and decorators don't make it a different clone
+            signature = [node.args] + ([node.returns] if node.returns else [])
+            own = add('function', signature + node.body, first_line(node), node.end_lineno, node.name, parent)
+            stack.extend((stmt, node.name, own) for stmt in node.body)
+            continue
+        if isinstance(node, ast.ClassDef):
+            name = node.name
+
+        blocks = [getattr(node, field, None) for field in BLOCK_FIELDS]
+        blocks += [handler.body for handler in getattr(node, 'handlers', ())]
+        blocks += [case.body for case in getattr(node, 'cases', ())]
+        for block in blocks:
+            if not isinstance(block, list) or not block:
+                continue
+            own = add('block', block, first_line(block[0]), block[-1].end_lineno, name, parent)
+            stack.extend((stmt, name, own) for stmt in block)
+    return units
+
+
+class CloneIndex:
+    """Digest -> locations index over the units of many files"""
+
+    def __init__(self):
+        self.paths = []
+        self.units = []
+        self.by_exact = defaultdict(list)
+        self.by_abstract = defaultdict(list)
+
+    def add(self, path, units):
+        """Index one file's unit_hashes()"""
+        file_index = len(self.paths)
+        self.paths.append(path)
+        self.units.append(units)
+        for position, unit in enumerate(units):
+            self.by_exact[unit[EXACT]].append((file_index, position))
+            if unit[ABSTRACT]:
+                self.by_abstract[unit[ABSTRACT]].append((file_index, position))
+
+    def _covered(self, members, buckets, column):
+        """True when every member sits inside a unit that is itself cloned"""
+        for file_index, position in members:
+            parent = self.units[file_index][position][PARENT]
+            if parent < 0 or len(buckets[self.units[file_index][parent][column]]) < 2:
+                return False
+        return True
+
+    def _group(self, kind, members, variants=None):
+        first = self.units[members[0][0]][members[0][1]]
+        locations = []
+        for file_index, position in members:
+            unit = self.units[file_index][position]
+            location = {'path': self.paths[file_index], 'name': unit[NAME], 'start': unit[START], 'end': unit[END]}
+            if variants:
+                # Locations sharing a variant are exact copies of each other
+                location['variant'] = variants[unit[EXACT]]
+            locations.append(location)
+        return {
+            'kind': kind,
+            'unit': first[KIND],
+            'lines': first[END] - first[START] + 1,
+            'nodes': first[NODES],
+            'locations': locations
+        }
+
+    def groups(self):
+        """Maximal clone groups, largest duplicated size first"""
+        groups = []
+        near = set()
+        for key, members in self.by_abstract.items():
+            variants = {}
+            for file_index, position in members:
+                variants.setdefault(self.units[file_index][position][EXACT], len(variants))
+            if len(variants) >= 2 and not self._covered(members, self.by_abstract, ABSTRACT):
+                near.add(key)
+                groups.append(self._group('near', members, variants))
+        for members in self.by_exact.values():
+            if len(members) < 2 or self._covered(members, self.by_exact, EXACT):
+                continue
+            first = self.units[members[0][0]][members[0][1]]
+            # Already listed as one variant of a near-exact group
+            if first[ABSTRACT] in near:
+                continue
+            groups.append(self._group('exact', members))
+        groups.sort(key=lambda group: (-group['nodes'] * len(group['locations']), group['locations'][0]['path'],
+                                       group['locations'][0]['start']))
+        return groups
+
+
+def clone_smells(groups):
+    """path -> [(code, severity, line, value)] duplicate_code smells, one per clone location.
+    Render them with analyzer.render_smell(name, smell)."""
+    smells = defaultdict(list)
+    for group in groups:
+        severity = 'medium' if group['kind'] == 'exact' else 'low'
+        for location in group['locations']:
+            others = tuple(f"{other['path']}:{other['start']}" for other in group['locations'] if other is not location)
+            smells[location['path']].append((location['name'], ('duplicate_code', severity, location['start'], others)))
+    return smells
+
+
+def clone_summary(groups):
+    """Counts for a report summary"""
+    return {
+        'groups': len(groups),
+        'exactGroups': sum(1 for group in groups if group['kind'] == 'exact'),
+        'nearGroups': sum(1 for group in groups if group['kind'] == 'near'),
+        # Lines that would go away if every group kept a single copy
+        'duplicatedLines': sum(group['lines'] * (len(group['locations']) - 1) for group in groups)
+    }
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Find duplicated functions and blocks in a Python checkout')
+    parser.add_argument('path', nargs='?', default='.')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--exact-only', action='store_true', help='do not abstract identifiers and literals')
+    parser.add_argument('--min-lines', type=int, default=MIN_LINES, help='smallest unit reported, in lines')
+    parser.add_argument('--min-nodes', type=int, default=MIN_NODES, help='smallest unit reported, in AST nodes')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    try:
+        from scan import find_clones
+        groups = find_clones(args.path, args.jobs, not args.exact_only, args.min_lines, args.min_nodes)
+        print(json.dumps({'ok': True, 'summary': clone_summary(groups), 'groups': groups}))
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps({'ok': False, 'error': 'clones_error', 'details': str(e)}))
+        sys.exit(1)
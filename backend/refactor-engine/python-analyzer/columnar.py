@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Columnar scoring for large function sets (repo-wide aggregation)
+Per-function metrics are held as parallel columns (length, nesting, complexity, params,
+smell count, toxicity) tagged with a file index. Scores and per-file metrics are computed
+in batch with NumPy when it is installed, with a pure-Python fallback that gives the same
+numbers as analyzer.MetricsAccumulator. score_files and summarize turn the columns into
+/analyze-repo per-file entries and repository metrics, so a repo summary is recomputed
+from function rows without re-running the analyzer.
+"""
+
+import math
+from array import array
+
+from analyzer import (
+    COMPACT_FUNCTION_FIELDS, MAX_TOXICITY, SEVERITIES, SMELL_CODES,
+    calculate_maintainability_index, score_function, smell_toxicity
+)
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# Severity-weighted remediation estimate used by /analyze-repo:
+# 10% critical (2h), 30% high (1h), 40% medium (30m), 20% low (15m)
+DEBT_MINUTES_PER_SMELL = 0.10 * 120 + 0.30 * 60 + 0.40 * 30 + 0.20 * 15
+
+# Column name -> array typecode; typed arrays let NumPy view them without copying
+COLUMNS = {
+    'file_index': 'q',
+    'length': 'q',
+    'nesting': 'q',
+    'complexity': 'q',
+    'params': 'q',
+    'smell_count': 'q',
+    'toxicity': 'd'
+}
+
+
+class FunctionColumns:
+    """Per-function metrics as parallel typed arrays, one row per function"""
+
+    def __init__(self):
+        for column, typecode in COLUMNS.items():
+            setattr(self, column, array(typecode))
+        self.file_count = 0
+
+    def __len__(self):
+        return len(self.length)
+
+    def _append(self, file_index, length, nesting, complexity, params, smells):
+        self.file_index.append(file_index)
+        self.length.append(length)
+        self.nesting.append(nesting)
+        self.complexity.append(complexity)
+        self.params.append(params)
+        self.smell_count.append(len(smells))
+        # Every weight * multiplier is a multiple of 0.5, so these sums are exact in any order
+        self.toxicity.append(sum(smell_toxicity(code, severity) for code, severity in smells))
+
+    def add_file(self, functions):
+        """Add one file's functions (FunctionMetrics, verbose dicts or compact rows); returns its index"""
+        file_index = self.file_count
+        self.file_count += 1
+
+        for func in functions:
+            if isinstance(func, dict):
+                smells = [(smell['type'], smell['severity']) for smell in func.get('smells', [])]
+                self._append(file_index, func['length'], func['nesting'], func['branchCount'] + 1,
+                             func['params'], smells)
+            elif isinstance(func, list):
+                row = dict(zip(COMPACT_FUNCTION_FIELDS, func))
+                smells = [(SMELL_CODES[code], SEVERITIES[severity]) for code, severity, *_ in row['smells']]
+                self._append(file_index, row['length'], row['nesting'], row['complexity'],
+                             row['params'], smells)
+            else:
+                smells = [(code, severity) for code, severity, *_ in func.smells]
+                self._append(file_index, func.length, func.nesting, func.complexity, func.params, smells)
+
+        return file_index
+
+    @classmethod
+    def from_results(cls, results):
+        """Columns for many analysis results (verbose or compact), one file each"""
+        columns = cls()
+        for result in results:
+            columns.add_file(result.get('functions') or [])
+        return columns
+
+
+def _tiers(values, thresholds, penalties):
+    """Vectorized if/elif chain: first threshold exceeded picks the penalty"""
+    return np.select([values > t for t in thresholds], penalties, 0)
+
+
+def score_columns(columns):
+    """Per-function scores (same as score_function) for every row"""
+    if np is None or not len(columns):
+        return [
+            score_function(c, l, n, p, s)
+            for c, l, n, p, s in zip(columns.complexity, columns.length, columns.nesting,
+                                     columns.params, columns.smell_count)
+        ]
+
+    complexity = np.frombuffer(columns.complexity, dtype=np.int64)
+    length = np.frombuffer(columns.length, dtype=np.int64)
+    nesting = np.frombuffer(columns.nesting, dtype=np.int64)
+    params = np.frombuffer(columns.params, dtype=np.int64)
+    smell_count = np.frombuffer(columns.smell_count, dtype=np.int64)
+
+    scores = (
+        100
+        - _tiers(complexity, (20, 10, 7, 4), (30, 20, 10, 5))
+        - _tiers(length, (100, 50, 20), (25, 15, 8))
+        - _tiers(nesting, (4, 3, 2), (20, 12, 6))
+        - _tiers(params, (5, 3), (10, 5))
+        - smell_count * 3
+        + np.where((length < 15) & (complexity < 5), 5, 0)
+    )
+    return np.clip(scores, 0, 100)
+
+
+def _group_sums(columns, scores):
+    """Per-file sums of each column as plain Python lists"""
+    files = columns.file_count
+    if np is None or not len(columns):
+        sums = {name: [0] * files for name in ('count', 'length', 'complexity', 'score', 'smells', 'toxicity')}
+        for i, file_index in enumerate(columns.file_index):
+            sums['count'][file_index] += 1
+            sums['length'][file_index] += columns.length[i]
+            sums['complexity'][file_index] += columns.complexity[i]
+            sums['score'][file_index] += scores[i]
+            sums['smells'][file_index] += columns.smell_count[i]
+            sums['toxicity'][file_index] += columns.toxicity[i]
+        return sums
+
+    index = np.frombuffer(columns.file_index, dtype=np.int64)
+
+    def group(values, dtype=np.int64):
+        totals = np.bincount(index, weights=values, minlength=files)
+        return totals.astype(dtype).tolist()
+
+    return {
+        'count': np.bincount(index, minlength=files).tolist(),
+        'length': group(np.frombuffer(columns.length, dtype=np.int64)),
+        'complexity': group(np.frombuffer(columns.complexity, dtype=np.int64)),
+        'score': group(scores),
+        'smells': group(np.frombuffer(columns.smell_count, dtype=np.int64)),
+        'toxicity': group(np.frombuffer(columns.toxicity, dtype=np.float64), np.float64)
+    }
+
+
+def file_metrics(columns, scores=None):
+    """Per-file qualityScore/toxicity/maintainabilityIndex/... matching analyze_python_code"""
+    if scores is None:
+        scores = score_columns(columns)
+    sums = _group_sums(columns, scores)
+
+    metrics = []
+    for i in range(columns.file_count):
+        count = sums['count'][i]
+        avg_complexity = round(sums['complexity'][i] / count, 2) if count else 0
+        quality = max(0, min(100, round(sums['score'][i] / count))) if count else 100
+        toxicity = round(min(100, (sums['toxicity'][i] / MAX_TOXICITY) * 100)) if count else 0
+        metrics.append({
+            'totalFunctions': count,
+            'averageLength': sums['length'][i] // count if count else 0,
+            'averageComplexity': avg_complexity,
+            'totalSmells': sums['smells'][i],
+            'qualityScore': quality,
+            'toxicity': toxicity,
+            'maintainabilityIndex': calculate_maintainability_index(quality, toxicity, avg_complexity)
+        })
+    return metrics
+
+
+def score_files(columns, files, metrics=None):
+    """Fill per-file entries (one per columns file, in file-index order) with their
+    /analyze-repo fields; returns files"""
+    if metrics is None:
+        metrics = file_metrics(columns)
+    for entry, file in zip(files, metrics):
+        entry.update({
+            'qualityScore': file['qualityScore'],
+            'complexity': file['averageComplexity'],
+            'toxicity': file['toxicity'],
+            'totalSmells': file['totalSmells'],
+            'functions': file['totalFunctions']
+        })
+    return files
+
+
+def js_round(value):
+    """Math.round semantics (halves round up) so numbers match the Node route"""
+    return math.floor(value + 0.5)
+
+
+def summarize(files, top=10):
+    """Repository metrics with the same formulas and shape as /analyze-repo, plus the
+    per-file entries worst first and the `top` worst of them"""
+    file_count = len(files)
+    total_score = sum(f['qualityScore'] for f in files)
+    total_smells = sum(f['totalSmells'] for f in files)
+    total_functions = sum(f['functions'] for f in files)
+    total_complexity = sum(f['complexity'] * f['functions'] for f in files)
+    total_toxicity = sum(f['toxicity'] for f in files)
+    total_lines = sum(f['lines'] for f in files)
+
+    avg_score = js_round(total_score / file_count) if file_count else 0
+    avg_complexity = js_round(total_complexity / total_functions * 10) / 10 if total_functions else 0
+    avg_toxicity = js_round(total_toxicity / file_count) if file_count else 0
+
+    # Code density: smells per 1000 lines of code
+    smell_density = js_round(total_smells / total_lines * 1000 * 10) / 10 if total_lines else 0
+
+    maintainability_index = js_round(
+        avg_score * 0.5 +
+        (100 - avg_toxicity) * 0.3 +
+        max(0, 100 - avg_complexity * 5) * 0.2
+    )
+
+    files = sorted(files, key=lambda f: f['qualityScore'])
+
+    return {
+        'averageQualityScore': avg_score,
+        'averageComplexity': avg_complexity,
+        'averageToxicity': avg_toxicity,
+        'maintainabilityIndex': maintainability_index,
+        'totalSmells': total_smells,
+        'totalFunctions': total_functions,
+        'totalLines': total_lines,
+        'smellDensity': smell_density,
+        'technicalDebtHours': js_round(total_smells * DEBT_MINUTES_PER_SMELL / 60),
+        'criticalFiles': sum(1 for f in files if f['qualityScore'] < 50),
+        'healthStatus': (
+            'healthy' if maintainability_index > 70 else
+            'needs_improvement' if maintainability_index > 50 else
+            'critical'
+        )
+    }, files, files[:top]
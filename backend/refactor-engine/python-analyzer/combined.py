@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Combined analyze + suggest over a single parse
+Usage: echo '{"code": "...", "filename": "..."}' | python combined.py
+       python combined.py --serve   (requests may carry "tool": "both" | "analyze" | "suggest")
+       python combined.py --serve --max-seconds 20 --rank-seconds 1 --cache --isolate
+Trees come from parse_cache, so a later analyze or suggest request for the same code in
+this process skips ast.parse entirely. The analysis budget and cache flags mean the same
+as analyzer.py's; --rank-seconds is the suggester's separate candidate-ranking budget.
+"""
+
+import sys
+import json
+import argparse
+
+import timings
+from analyzer import Budget, analyze_python_code, analyze_python_code_cached
+from parse_cache import get_parse_cache, parse_cached
+from refactor_suggester import CLI_MAX_SECONDS, OUTPUT_FORMATS, suggest_refactoring, suggest_refactoring_cached
+
+
+def analyze_cached_tree(code, filename='file.py', compact=False, budget=None, use_cache=False):
+    analyze = analyze_python_code_cached if use_cache else analyze_python_code
+    return analyze(code, filename, compact=compact, budget=budget, parse=parse_cached)
+
+
+def suggest_cached_tree(code, filename='file.py', output='full', max_seconds=None, use_cache=False):
+    suggest = suggest_refactoring_cached if use_cache else suggest_refactoring
+    return suggest(code, filename, output=output, max_seconds=max_seconds, parse=parse_cached)
+
+
+def analyze_and_suggest(code, filename='file.py', compact=False, output='full', max_seconds=None,
+                        budget=None, use_cache=False):
+    """/analyze and /suggest results for the same code, parsed once.
+    budget limits the analysis; max_seconds limits suggestion ranking."""
+    return {
+        'analysis': analyze_cached_tree(code, filename, compact, budget, use_cache),
+        'refactoring': suggest_cached_tree(code, filename, output, max_seconds, use_cache)
+    }
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Analyze and suggest refactorings over one parse')
+    parser.add_argument('--serve', action='store_true',
+                        help='answer newline-delimited JSON requests until stdin closes')
+    parser.add_argument('--isolate', action='store_true',
+                        help='with --serve: handle each request in a forked, rlimited child (see zygote.py)')
+    parser.add_argument('--compact', action='store_true', help='compact analysis wire format')
+    parser.add_argument('--output', choices=OUTPUT_FORMATS, default='full',
+                        help='suggestion payload: whole patched file, line-range edits or unified diff')
+    parser.add_argument('--cache', action='store_true',
+                        help='serve repeated inputs from the on-disk result cache (see cache.py)')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='analyze only the leading statements that fit in this many bytes')
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help='stop the analysis after this many AST nodes')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='stop the analysis after this much wall time')
+    parser.add_argument('--rank-seconds', type=float, default=CLI_MAX_SECONDS,
+                        help='seconds spent ranking refactoring candidates per request')
+    parser.add_argument('--timings', action='store_true', help='attach per-phase `_timings` to results')
+    parser.add_argument('--parse-cache-stats', action='store_true',
+                        help='include parse cache statistics in every combined result')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    if args.timings:
+        timings.enable()
+    budget = None
+    if args.max_bytes is not None or args.max_nodes is not None or args.max_seconds is not None:
+        budget = Budget(args.max_bytes, args.max_nodes, args.max_seconds)
+
+    def analyze(code, filename):
+        return analyze_cached_tree(code, filename, args.compact, budget, args.cache)
+
+    def suggest(code, filename):
+        return suggest_cached_tree(code, filename, args.output, args.rank_seconds, args.cache)
+
+    def both(code, filename):
+        result = analyze_and_suggest(code, filename, args.compact, args.output, args.rank_seconds,
+                                     budget, args.cache)
+        if args.parse_cache_stats:
+            result['parseCache'] = get_parse_cache().stats()
+        return result
+
+    if args.serve:
+        handlers = {'both': both, 'analyze': analyze, 'suggest': suggest}
+        if args.isolate:
+            # One forked, rlimited child per request (see zygote.py)
+            from zygote import serve_forked
+            serve_forked(handlers, 'combined_error')
+        else:
+            from serve import serve
+            serve(handlers, 'combined_error', tool='combined')
+        sys.exit(0)
+
+    try:
+        input_data = json.loads(sys.stdin.read())
+        print(json.dumps(both(input_data.get('code', ''), input_data.get('filename', 'file.py'))))
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps({'error': 'combined_error', 'details': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Def-use index over a function body for extract-function suggestions
+One pass records, per top-level statement, the names it may define, must define and
+reads before defining. Per-name position lists then answer, for any statement range,
+which names must be passed in (params, earlier locals, closure variables) and which
+must be returned (defined in the range and read later) in O(k log n) for k names.
+"""
+
+import ast
+from bisect import bisect_right
+
+
+class _NameCollector(ast.NodeVisitor):
+    """Names bound and read by one statement, descending into nested scopes for free reads"""
+
+    def __init__(self):
+        self.defs = set()
+        self.uses = set()
+        self.declared_global = set()
+        self.declared_nonlocal = set()
+        self.escapes = False
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.uses.add(node.id)
+        else:
+            self.defs.add(node.id)
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name):
+            self.uses.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.declared_global.update(node.names)
+
+    def visit_Nonlocal(self, node):
+        self.declared_nonlocal.update(node.names)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.defs.add(alias.asname or alias.name.split('.')[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.defs.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Return(self, node):
+        self.escapes = True
+        self.generic_visit(node)
+
+    def visit_Yield(self, node):
+        self.escapes = True
+        self.generic_visit(node)
+
+    visit_YieldFrom = visit_Yield
+
+    def _free_reads(self, nodes, bound):
+        """Reads inside a nested scope that resolve outside it"""
+        inner = _NameCollector()
+        for node in nodes:
+            inner.visit(node)
+        self.uses.update(inner.uses - inner.defs - bound)
+
+    def visit_FunctionDef(self, node):
+        self.defs.add(node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(default)
+        self._free_reads(node.body, _arg_names(node.args))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.defs.add(node.name)
+        for expr in node.decorator_list + node.bases + [k.value for k in node.keywords]:
+            self.visit(expr)
+        self._free_reads(node.body, set())
+
+    def visit_Lambda(self, node):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(default)
+        self._free_reads([node.body], _arg_names(node.args))
+
+    def _visit_comprehension(self, node, elements):
+        # The first iterable is evaluated in the enclosing scope; targets stay local
+        self.visit(node.generators[0].iter)
+        inner = _NameCollector()
+        for generator in node.generators:
+            inner.visit(generator.target)
+            if generator is not node.generators[0]:
+                inner.visit(generator.iter)
+            for condition in generator.ifs:
+                inner.visit(condition)
+        for element in elements:
+            inner.visit(element)
+        targets = set()
+        for generator in node.generators:
+            targets.update(n.id for n in ast.walk(generator.target) if isinstance(n, ast.Name))
+        self.uses.update(inner.uses - targets)
+
+    def visit_ListComp(self, node):
+        self._visit_comprehension(node, [node.elt])
+
+    visit_SetComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self._visit_comprehension(node, [node.key, node.value])
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.defs.add(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.defs.add(node.name)
+
+    def visit_MatchMapping(self, node):
+        if node.rest:
+            self.defs.add(node.rest)
+        self.generic_visit(node)
+
+
+def _arg_list(args):
+    """Parameter names in signature order"""
+    names = [a.arg for a in args.posonlyargs + args.args]
+    if args.vararg:
+        names.append(args.vararg.arg)
+    names.extend(a.arg for a in args.kwonlyargs)
+    if args.kwarg:
+        names.append(args.kwarg.arg)
+    return names
+
+
+def _arg_names(args):
+    return set(_arg_list(args))
+
+
+def _collect(nodes):
+    collector = _NameCollector()
+    for node in nodes:
+        collector.visit(node)
+    return collector
+
+
+def _must_defs(stmt):
+    """Names bound on every path through stmt"""
+    if isinstance(stmt, ast.If):
+        return _block_must_defs(stmt.body) & _block_must_defs(stmt.orelse)
+    if isinstance(stmt, (ast.For, ast.AsyncFor, ast.While)):
+        # The body may run zero times
+        return set()
+    if isinstance(stmt, ast.Try) or type(stmt).__name__ == 'TryStar':
+        return _block_must_defs(stmt.finalbody)
+    if isinstance(stmt, (ast.With, ast.AsyncWith)):
+        return _collect([item.optional_vars for item in stmt.items if item.optional_vars]).defs | _block_must_defs(stmt.body)
+    if type(stmt).__name__ == 'Match':
+        return set()
+    return _collect([stmt]).defs
+
+
+def _block_must_defs(stmts):
+    names = set()
+    for stmt in stmts:
+        names |= _must_defs(stmt)
+    return names
+
+
+def _exposed_uses(stmt, collector):
+    """Reads in stmt that can happen before stmt itself binds the name"""
+    if isinstance(stmt, (ast.For, ast.AsyncFor)):
+        # The loop target is bound before the body reads it
+        header = _collect([stmt.iter]).uses
+        target = _collect([stmt.target]).defs
+        return header | (_collect(stmt.body + stmt.orelse).uses - target)
+    if isinstance(stmt, (ast.With, ast.AsyncWith)):
+        header = _collect([item.context_expr for item in stmt.items])
+        bound = _collect([item.optional_vars for item in stmt.items if item.optional_vars]).defs
+        return header.uses | (_collect(stmt.body).uses - bound)
+    return collector.uses
+
+
+class DefUseIndex:
+    """Def-use facts for the top-level statements of one function body"""
+
+    def __init__(self, function_node, closure=()):
+        self.body = function_node.body
+        self.param_order = _arg_list(function_node.args)
+        self.params = set(self.param_order)
+
+        self.defs = []
+        self.must = []
+        self.exposed = []
+        self.def_positions = {}
+        self.must_positions = {}
+        self.use_positions = {}
+        # escape_prefix[i] = statements before i that return or yield
+        self.escape_prefix = [0]
+        declared_global = set()
+        declared_nonlocal = set()
+
+        for index, stmt in enumerate(self.body):
+            collector = _collect([stmt])
+            must = _must_defs(stmt)
+            exposed = _exposed_uses(stmt, collector)
+            declared_global |= collector.declared_global
+            declared_nonlocal |= collector.declared_nonlocal
+
+            self.defs.append(collector.defs)
+            self.must.append(must)
+            self.exposed.append(exposed)
+            for name in collector.defs:
+                self.def_positions.setdefault(name, []).append(index)
+            for name in must:
+                self.must_positions.setdefault(name, []).append(index)
+            for name in exposed:
+                self.use_positions.setdefault(name, []).append(index)
+            self.escape_prefix.append(self.escape_prefix[-1] + collector.escapes)
+
+        self.globals = declared_global
+        self.locals = (self.params | set(self.def_positions)) - declared_global - declared_nonlocal
+        # Names read here that live in an enclosing function (passed in once extracted)
+        self.closure = (set(closure) | declared_nonlocal) - self.locals
+
+    def index_of(self, stmt):
+        """Position of a top-level statement in the body (by identity)"""
+        for index, candidate in enumerate(self.body):
+            if candidate is stmt:
+                return index
+        raise ValueError('statement is not in this function body')
+
+    def _defined_before(self, name, start):
+        if name in self.globals:
+            return False
+        if name in self.params or name in self.closure:
+            return True
+        positions = self.def_positions.get(name)
+        return bool(positions) and positions[0] < start
+
+    def inputs(self, start, end):
+        """Names the statements start..end (inclusive) read from earlier in the function"""
+        bound = set()
+        found = set()
+        for index in range(start, end + 1):
+            for name in self.exposed[index]:
+                if name not in bound and self._defined_before(name, start):
+                    found.add(name)
+            bound |= self.must[index]
+
+        def order(name):
+            if name in self.params:
+                return (0, self.param_order.index(name), name)
+            positions = self.def_positions.get(name)
+            return (1, positions[0], name) if positions else (2, 0, name)
+
+        return sorted(found, key=order)
+
+    def outputs(self, start, end):
+        """Names bound in start..end that a later statement reads before rebinding"""
+        found = []
+        seen = set()
+        for index in range(start, end + 1):
+            for name in sorted(self.defs[index]):
+                if name in seen or name not in self.locals:
+                    continue
+                seen.add(name)
+                uses = self.use_positions.get(name, [])
+                next_use = bisect_right(uses, end)
+                if next_use == len(uses):
+                    continue
+                kills = self.must_positions.get(name, [])
+                next_kill = bisect_right(kills, end)
+                # A statement that reads then rebinds (x = x + 1) still needs the value
+                if next_kill == len(kills) or uses[next_use] <= kills[next_kill]:
+                    found.append(name)
+        return found
+
+    def escapes(self, start, end):
+        """True when the range contains return/yield, so extraction changes control flow"""
+        return self.escape_prefix[end + 1] - self.escape_prefix[start] > 0
+
+    def block(self, start, end):
+        return {
+            'inputs': self.inputs(start, end),
+            'outputs': self.outputs(start, end),
+            'escapes': self.escapes(start, end)
+        }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Line-range edits against a base source, and unified diffs built from them
+An edit replaces lines startLine..endLine (1-based, inclusive) with `lines`; an insertion
+has endLine == startLine - 1. Diff hunks only read the lines around each edit, so
+payload size follows the size of the change rather than the file. EditBuffer applies
+many edits against the same base in a single pass.
+"""
+
+import hashlib
+from bisect import bisect_left
+
+
+def base_hash(code):
+    """Identifies the source an edit list applies to"""
+    return hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def make_edit(start_line, end_line, lines):
+    return {'startLine': start_line, 'endLine': end_line, 'lines': list(lines)}
+
+
+def apply_edits(source_lines, edits):
+    """New list of lines with non-overlapping edits applied (edits refer to the original lines)"""
+    lines = list(source_lines)
+    # Bottom-up, so earlier line numbers stay valid
+    for edit in sorted(edits, key=lambda e: (e['startLine'], e['endLine']), reverse=True):
+        lines[edit['startLine'] - 1:edit['endLine']] = edit['lines']
+    return lines
+
+
+def unified_diff(source_lines, edits, filename='file.py', context=3):
+    """Unified diff text for edits, reading only the context lines around them.
+    source_lines is code.split('\\n'): the last element is the text after the final newline."""
+    # Empty insertions change nothing and would make context-only hunks
+    edits = sorted((e for e in edits if e['lines'] or e['endLine'] >= e['startLine']),
+                   key=lambda e: (e['startLine'], e['endLine']))
+    if not edits:
+        return ''
+    total = len(source_lines)
+    new_total = total + sum(len(e['lines']) - (e['endLine'] - e['startLine'] + 1) for e in edits)
+
+    # Merge edits whose context windows touch into one hunk
+    hunks = []
+    for edit in edits:
+        lo = max(1, edit['startLine'] - context)
+        if edit['endLine'] >= total:
+            # Whether the line before it ends in a newline can change
+            lo = max(1, min(lo, edit['startLine'] - 1))
+        hi = min(total, max(edit['endLine'], edit['startLine'] - 1) + context)
+        if hunks and lo <= hunks[-1]['hi'] + 1:
+            hunks[-1]['hi'] = max(hunks[-1]['hi'], hi)
+            hunks[-1]['edits'].append(edit)
+        else:
+            hunks.append({'lo': lo, 'hi': hi, 'edits': [edit]})
+
+    out = [f'--- a/{filename}', f'+++ b/{filename}']
+    shift = 0
+    for hunk in hunks:
+        # (tag, text, old element, new element); elements are 1-based split positions
+        rows = []
+        hunk_shift = shift
+        line = hunk['lo']
+        new_line = hunk['lo'] + shift
+        for edit in hunk['edits']:
+            while line < edit['startLine']:
+                rows.append((' ', source_lines[line - 1], line, new_line))
+                line += 1
+                new_line += 1
+            for number in range(edit['startLine'], edit['endLine'] + 1):
+                rows.append(('-', source_lines[number - 1], number, None))
+            for text in edit['lines']:
+                rows.append(('+', text, None, new_line))
+                new_line += 1
+            line = edit['endLine'] + 1
+            shift += len(edit['lines']) - (edit['endLine'] - edit['startLine'] + 1)
+        while line <= hunk['hi']:
+            rows.append((' ', source_lines[line - 1], line, new_line))
+            line += 1
+            new_line += 1
+
+        body = []
+        for tag, text, old, new in rows:
+            # The last element on each side has no newline; when empty it is not a line at all
+            old_last = old == total
+            new_last = new == new_total
+            old_side = tag != '+' and not (old_last and text == '')
+            new_side = tag != '-' and not (new_last and text == '')
+            if tag == ' ' and old_side and new_side and old_last == new_last:
+                body.append(' ' + text)
+                if old_last:
+                    body.append('\\ No newline at end of file')
+                continue
+            if old_side:
+                body.append('-' + text)
+                if old_last:
+                    body.append('\\ No newline at end of file')
+            if new_side:
+                body.append('+' + text)
+                if new_last:
+                    body.append('\\ No newline at end of file')
+
+        if not any(text[0] in '-+' for text in body):
+            continue
+        old_count = sum(1 for text in body if text[0] in ' -')
+        new_count = sum(1 for text in body if text[0] in ' +')
+        # An empty side of a hunk is numbered by the line before it
+        old_start = hunk['lo'] if old_count else hunk['lo'] - 1
+        new_start = hunk['lo'] + hunk_shift if new_count else hunk['lo'] + hunk_shift - 1
+        out.append(f'@@ -{old_start},{old_count} +{new_start},{new_count} @@')
+        out.extend(body)
+
+    return '\n'.join(out) + '\n' if len(out) > 2 else ''
+
+
+class EditBuffer:
+    """Piece table over a base list of lines: edits are addressed in base coordinates, can
+    arrive in any order and are kept as pieces next to the untouched base until lines()
+    stitches everything together in one pass. Each edit is owned by a tag (e.g. the
+    suggestion it came from), which can be removed again as a unit."""
+
+    def __init__(self, source_lines):
+        self.base = source_lines
+        # Sorted (startLine, endLine, seq) keys and their (tag, edit) pieces
+        self._keys = []
+        self._pieces = []
+        self._seq = 0
+
+    @staticmethod
+    def _span(edit):
+        # Half-open range of base line boundaries; an insertion is the empty range at its line
+        return edit['startLine'], max(edit['endLine'] + 1, edit['startLine'])
+
+    def _conflicts(self, start, stop):
+        """True if [start, stop) overlaps a queued edit (ends grow with starts, so neighbours suffice)"""
+        position = bisect_left(self._keys, (start, stop - 1, -1))
+        for neighbour in (position - 1, position):
+            if 0 <= neighbour < len(self._pieces):
+                other_start, other_stop = self._span(self._pieces[neighbour][1])
+                if other_start < stop and start < other_stop:
+                    return True
+        return False
+
+    def add(self, tag, edits):
+        """Queue all of edits under tag, or none of them if any overlaps; returns success"""
+        spans = sorted(self._span(edit) for edit in edits)
+        for (start, stop), (next_start, _) in zip(spans, spans[1:]):
+            if next_start < stop:
+                return False
+        if any(self._conflicts(start, stop) for start, stop in spans):
+            return False
+        for edit in edits:
+            key = (edit['startLine'], edit['endLine'], self._seq)
+            self._seq += 1
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._pieces.insert(position, (tag, edit))
+        return True
+
+    def remove(self, tag):
+        """Drop every edit queued under tag"""
+        kept = [(key, piece) for key, piece in zip(self._keys, self._pieces) if piece[0] != tag]
+        self._keys = [key for key, _ in kept]
+        self._pieces = [piece for _, piece in kept]
+
+    def lines(self):
+        """(new lines, [(tag, edit, new startLine)]) - one pass over base and pieces"""
+        out = []
+        placed = []
+        line = 1
+        for tag, edit in self._pieces:
+            out.extend(self.base[line - 1:edit['startLine'] - 1])
+            placed.append((tag, edit, len(out) + 1))
+            out.extend(edit['lines'])
+            line = max(line, edit['endLine'] + 1)
+        out.extend(self.base[line - 1:])
+        return out, placed
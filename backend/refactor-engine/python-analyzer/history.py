@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Offline time machine - quality history of one file from a local clone
+Usage: python history.py /path/to/clone path/in/repo.py [--max-commits 200] [--jobs 8]
+Commits come from one `git log --raw`, file contents stream through one persistent
+`git cat-file --batch` process, and each distinct blob is analyzed once (in parallel).
+Output matches commit-analyzer.js: {owner, repo, filePath, timeline, insights}; a local
+clone has no GitHub owner, so owner is null. Only Python files can be analyzed here.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime, timezone
+
+from analyzer import analyze_batch
+
+# Blob id git reports for a deleted file
+NULL_SHA = '0' * 40
+
+RECORD_SEP = '\x1e'
+FIELD_SEP = '\x1f'
+
+
+class BlobReader:
+    """One long-lived `git cat-file --batch` process answering blob lookups in order"""
+
+    def __init__(self, repo_path):
+        self.proc = subprocess.Popen(
+            ['git', '-C', repo_path, 'cat-file', '--batch'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+    def read(self, sha):
+        """Raw bytes of a blob, or None if git does not have it"""
+        self.proc.stdin.write(sha.encode('ascii') + b'\n')
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) < 3 or header[1] == b'missing':
+            return None
+        size = int(header[2])
+        data = self.proc.stdout.read(size)
+        # Each object is followed by a single LF
+        self.proc.stdout.read(1)
+        return data
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def list_file_commits(repo_path, file_path, max_commits=10, rev='HEAD'):
+    """Newest-first commits touching file_path, each with the blob sha it left behind"""
+    log_format = RECORD_SEP + FIELD_SEP.join(['%H', '%at', '%an', '%B']) + FIELD_SEP
+    try:
+        output = subprocess.run(
+            ['git', '-C', repo_path, 'log', '--raw', '--no-abbrev', '--no-renames',
+             f'--format={log_format}', f'--max-count={max_commits}', rev, '--', file_path],
+            capture_output=True, check=True
+        ).stdout.decode('utf-8', 'replace')
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git log failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+
+    commits = []
+    for record in output.split(RECORD_SEP)[1:]:
+        sha, timestamp, author, body, raw = record.split(FIELD_SEP)
+        # Raw lines look like ":100644 100644 <old> <new> M\tpath"
+        blob = None
+        for line in raw.splitlines():
+            if line.startswith(':'):
+                blob = line.split()[3]
+        if blob is None or blob == NULL_SHA:
+            continue
+        date = datetime.fromtimestamp(int(timestamp), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        commits.append({
+            'sha': sha,
+            'date': date,
+            'message': body.strip().split('\n')[0],  # First line only
+            'author': author,
+            'blob': blob
+        })
+    return commits
+
+
+def calculate_insights(timeline):
+    """Trend, regressions and best/worst scores - same rules as commit-analyzer.js"""
+    if not timeline:
+        return None
+
+    # Sort by date (oldest first); ISO-8601 UTC strings sort chronologically
+    ordered = sorted(timeline, key=lambda point: point['date'])
+    oldest = ordered[0]
+    newest = ordered[-1]
+
+    overall_change = newest['score'] - oldest['score']
+    overall_trend = 'improving' if overall_change > 5 else 'declining' if overall_change < -5 else 'stable'
+
+    biggest_regression = None
+    biggest_improvement = None
+    max_drop = 0
+    max_gain = 0
+    regressions = []
+
+    for previous, point in zip(ordered, ordered[1:]):
+        drop = previous['score'] - point['score']
+        if drop > max_drop:
+            max_drop = drop
+            biggest_regression = {'commit': point, 'previousScore': previous['score'], 'drop': drop}
+        if -drop > max_gain:
+            max_gain = -drop
+            biggest_improvement = {'commit': point, 'previousScore': previous['score'], 'gain': -drop}
+        # Detect regressions (drops > 10 points)
+        if drop > 10:
+            regressions.append({
+                'commit': point['sha'],
+                'message': point['message'],
+                'drop': drop,
+                'date': point['date']
+            })
+
+    scores = [point['score'] for point in ordered]
+    avg = sum(scores) / len(scores)
+
+    return {
+        'overallChange': overall_change,
+        'overallTrend': overall_trend,
+        'biggestRegression': biggest_regression,
+        'biggestImprovement': biggest_improvement,
+        # Math.round: halves round up (scores are never negative)
+        'avgScore': int(avg + 0.5),
+        'bestScore': max(scores),
+        'worstScore': min(scores),
+        'regressions': regressions,
+        'totalCommits': len(timeline),
+        'timespan': {
+            'start': oldest['date'],
+            'end': newest['date']
+        }
+    }
+
+
+def analyze_history(repo_path, file_path, max_commits=10, jobs=None, use_cache=False, rev='HEAD'):
+    """Quality timeline of file_path across its last max_commits commits in a local clone"""
+    if not file_path.endswith('.py'):
+        raise ValueError(f'Only Python files have an offline history: {file_path}. '
+                         'Use /analyze-history for JavaScript/TypeScript files.')
+    repo_path = os.path.abspath(repo_path)
+    commits = list_file_commits(repo_path, file_path, max_commits, rev)
+    if not commits:
+        raise ValueError(f'No commits found for file: {file_path}. The file might not exist or has no commit history.')
+
+    # Identical revisions (reverts, merges, history rewrites) share a blob and are analyzed once
+    blobs = []
+    items = []
+    with BlobReader(repo_path) as reader:
+        for blob in dict.fromkeys(commit['blob'] for commit in commits):
+            data = reader.read(blob)
+            # Missing or empty content would score a perfect 100 - skip it like commit-analyzer.js
+            if not data:
+                continue
+            blobs.append(blob)
+            items.append({'code': data.decode('utf-8', 'replace'), 'filename': file_path})
+
+    results = dict(zip(blobs, analyze_batch(items, jobs, use_cache=use_cache, compact=True)))
+
+    timeline = []
+    for commit in commits:
+        analysis = results.get(commit['blob'])
+        if analysis is None:
+            print(f"Skipping commit {commit['sha'][:7]}: no content", file=sys.stderr)
+            continue
+        if analysis.get('error') or analysis.get('qualityScore') is None:
+            # Skip commits with parse errors (old syntax, etc.)
+            print(f"Skipping commit {commit['sha'][:7]}: {analysis.get('error')}", file=sys.stderr)
+            continue
+        timeline.append({
+            'sha': commit['sha'][:7],
+            'fullSha': commit['sha'],
+            'date': commit['date'],
+            'message': commit['message'],
+            'author': commit['author'],
+            'score': analysis['qualityScore'],
+            'smells': analysis.get('totalSmells') or 0,
+            'functions': len(analysis.get('functions') or [])
+        })
+
+    if not timeline:
+        raise ValueError(f"Could not analyze any commits for {file_path}. The file might use syntax that's too old or incompatible.")
+
+    return {
+        'owner': None,
+        'repo': os.path.basename(repo_path),
+        'filePath': file_path,
+        'timeline': timeline,
+        'insights': calculate_insights(timeline),
+        'distinctRevisions': len(blobs)
+    }
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Quality history of one file in a local git clone')
+    parser.add_argument('repo', help='path to the local clone')
+    parser.add_argument('file', help='file path relative to the repository root')
+    parser.add_argument('--max-commits', type=int, default=10)
+    parser.add_argument('--rev', default='HEAD', help='revision to walk back from')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--cache', action='store_true', help='reuse results for previously seen revisions')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    try:
+        result = analyze_history(args.repo, args.file, args.max_commits, args.jobs, args.cache, args.rev)
+        print(json.dumps({'ok': True, **result}))
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps({'ok': False, 'error': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Function-level incremental re-analysis for editor/agent loops
+A session remembers every function it has analyzed by two fingerprints: a hash of its
+normalized source slice (checked first, cheap) and a position-independent AST hash
+(checked only when the slice changed, so comment/whitespace-only edits still hit).
+On the next revision of the same file, unchanged functions replay their cached records
+and only edited ones go through _detect_smells and scoring; file-level aggregates are
+then rebuilt from the per-function records.
+A Budget applies as in analyze_python_code, except that a replayed function costs a single
+node; analyze_incremental_cached puts the on-disk result cache in front of the session.
+"""
+
+import ast
+import hashlib
+import textwrap
+import functools
+from collections import OrderedDict
+
+from analyzer import ANALYZER_VERSION, BudgetExceeded, CodeAnalyzer, analyze_python_code, build_result
+from cache import cached_call
+
+# Per-file sessions kept by analyze_incremental
+MAX_SESSIONS = 64
+
+
+def _source_slice_hash(node, source_lines):
+    """Hash of the function's source lines, dedented and stripped of trailing whitespace"""
+    start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+    lines = source_lines[start - 1:node.end_lineno]
+    text = textwrap.dedent('\n'.join(line.rstrip() for line in lines))
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _ast_hash(node):
+    """Hash of the function's AST structure plus the relative line span of every function in it"""
+    parts = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, ast.AST):
+            parts.append(type(item).__name__)
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                # Records carry start/end lines, so line layout of functions must match too
+                parts.append((item.lineno - node.lineno, item.end_lineno - node.lineno))
+            stack.extend(getattr(item, field, None) for field in item._fields)
+        elif isinstance(item, list):
+            parts.append(len(item))
+            stack.extend(item)
+        else:
+            parts.append(repr(item))
+    return hashlib.sha256(repr(parts).encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class FunctionEntry:
+    """Cached analysis of one function subtree (the function and every function nested in it)"""
+    __slots__ = ('base_line', 'records', 'scores', 'facts', 'imports', 'nested_keys')
+
+    def __init__(self, base_line, records, scores, facts, imports, nested_keys):
+        self.base_line = base_line
+        self.records = records
+        self.scores = scores
+        self.facts = facts
+        self.imports = imports
+        self.nested_keys = nested_keys
+
+
+class IncrementalCodeAnalyzer(CodeAnalyzer):
+    """CodeAnalyzer that replays unchanged function subtrees from a session"""
+
+    def __init__(self, session, source_lines):
+        super().__init__()
+        self.session = session
+        self.source_lines = source_lines
+        self.function_scores = []
+        self.used_keys = set()
+        # slice key -> AST hash for entries created or re-keyed in this revision
+        self.shapes_seen = {}
+        self.reused = 0
+        self.analyzed = 0
+        # Keys of entries created or replayed inside each function being visited
+        self._key_stack = []
+
+    def _visit_function(self, node):
+        key = _source_slice_hash(node, self.source_lines)
+        entry = self.session.entries.get(key)
+        if entry is not None:
+            return self._replay(key, entry, node)
+
+        shape = _ast_hash(node)
+        entry = self.session.shapes.get(shape)
+        if entry is not None:
+            # Only comments or formatting changed - same records, new slice key
+            self.session.entries[key] = entry
+            self.shapes_seen[key] = shape
+            return self._replay(key, entry, node)
+
+        first_record = len(self.functions)
+        imports_before = self.imports
+        self._key_stack.append([])
+
+        facts = super()._visit_function(node)
+
+        nested_keys = self._key_stack.pop()
+        records = self.functions[first_record:]
+        scores = [record.score() for record in records]
+        # Nested functions already added their own scores; this function's record is last
+        self.function_scores.append(scores[-1])
+        self.analyzed += 1
+
+        # FunctionMetrics are never mutated once finished, so the session can share them
+        entry = FunctionEntry(
+            base_line=node.lineno,
+            records=records,
+            scores=scores,
+            facts=facts,
+            imports=self.imports - imports_before,
+            nested_keys=nested_keys
+        )
+        self.session.entries[key] = entry
+        self.session.shapes[shape] = entry
+        self.shapes_seen[key] = shape
+        self._mark_used(key, nested_keys)
+        return facts
+
+    def _replay(self, key, entry, node):
+        delta = node.lineno - entry.base_line
+        self.functions.extend(record.shifted(delta) for record in entry.records)
+        self.function_scores.extend(entry.scores)
+        self.imports += entry.imports
+        # A visited function always leaves the enclosing nesting depth at 0
+        self.nesting_depth = 0
+        self.reused += 1
+        self._mark_used(key, entry.nested_keys)
+        return entry.facts
+
+    def _mark_used(self, key, nested_keys):
+        self.used_keys.add(key)
+        self.used_keys.update(nested_keys)
+        if self._key_stack:
+            self._key_stack[-1].append(key)
+            self._key_stack[-1].extend(nested_keys)
+
+
+class AnalysisSession:
+    """Function fingerprints and cached records for successive revisions of one file"""
+
+    def __init__(self):
+        # slice hash -> FunctionEntry
+        self.entries = {}
+        # AST hash -> FunctionEntry, consulted only when the slice hash misses
+        self.shapes = {}
+        self.shape_of = {}
+        self.last_stats = {'reused': 0, 'analyzed': 0}
+
+    def analyze(self, code, filename='file.py', compact=False, budget=None, parse=ast.parse):
+        """Analyze a new revision; output matches analyze_python_code exactly"""
+        if budget is not None and budget.max_bytes is not None and \
+                len(code.encode('utf-8', 'surrogatepass')) > budget.max_bytes:
+            # Only a prefix gets analyzed, so there are no whole-file records to remember
+            return analyze_python_code(code, filename, compact, budget, parse)
+        try:
+            tree = parse(code, filename=filename)
+        except SyntaxError as e:
+            # Keep the session so the next valid revision still reuses work
+            return {
+                'error': 'parse_error',
+                'details': str(e),
+                'suggestion': 'Check for syntax errors in your Python code'
+            }
+
+        truncated = None
+        analyzer = IncrementalCodeAnalyzer(self, code.split('\n'))
+        if budget is not None:
+            budget.start()
+            budget.guard(analyzer)
+        try:
+            if budget is not None and budget.expired():
+                raise BudgetExceeded('max_seconds')
+            analyzer.visit(tree)
+        except BudgetExceeded as e:
+            # Same contract as analyze_python_code: keep the functions finished so far
+            truncated = e.args[0]
+
+        self.shape_of.update(analyzer.shapes_seen)
+        if not truncated:
+            # Forget functions that no longer exist in this revision (unknown when truncated)
+            self.entries = {key: entry for key, entry in self.entries.items() if key in analyzer.used_keys}
+            self.shape_of = {key: shape for key, shape in self.shape_of.items() if key in self.entries}
+        self.shapes = {shape: self.entries[key] for key, shape in self.shape_of.items()}
+        self.last_stats = {'reused': analyzer.reused, 'analyzed': analyzer.analyzed}
+
+        result = build_result(analyzer.functions, analyzer.imports, analyzer.function_scores, compact)
+        if truncated:
+            result['truncated'] = True
+            result['truncatedReason'] = truncated
+        return result
+
+
+_sessions = OrderedDict()
+
+
+def get_session(filename):
+    """Session for filename, evicting the least recently used file past MAX_SESSIONS"""
+    session = _sessions.pop(filename, None) or AnalysisSession()
+    _sessions[filename] = session
+    while len(_sessions) > MAX_SESSIONS:
+        _sessions.popitem(last=False)
+    return session
+
+
+def analyze_incremental(code, filename='file.py', compact=False, budget=None, parse=ast.parse):
+    """analyze_python_code that reuses unchanged functions from the previous revision of filename"""
+    return get_session(filename).analyze(code, filename, compact, budget, parse)
+
+
+def analyze_incremental_cached(code, filename='file.py', cache=None, compact=False, budget=None):
+    """analyze_incremental behind the on-disk result cache
+
+    Results match analyze_python_code, so they share its cache entries. A hit skips the
+    session too; the next miss for filename then reuses whatever the session last saw.
+    """
+    analyze = functools.partial(analyze_incremental, compact=compact, budget=budget)
+    return cached_call(analyze, 'analyze-compact' if compact else 'analyze', ANALYZER_VERSION, code, filename, cache)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Bounded in-memory LRU of parsed ASTs keyed by a hash of the source text
+Analyzers only read the tree, so one parse can serve analyze and suggest for the same code.
+The bound is on cached source bytes. Trees measure roughly 28-32x their source on the
+stdlib, so the 4 MB default holds about 120 MB of trees.
+"""
+
+import os
+import ast
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_MAX_SOURCE_BYTES = int(os.environ.get('CODEX_AST_CACHE_MB', 4)) * 1024 * 1024
+
+
+class ParseCache:
+    """LRU of content hash -> ast.Module"""
+
+    def __init__(self, max_source_bytes=DEFAULT_MAX_SOURCE_BYTES):
+        self.max_source_bytes = max_source_bytes
+        self.trees = OrderedDict()
+        self.source_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, code, filename='file.py'):
+        """ast.parse(code) from the cache; SyntaxError propagates and is not cached"""
+        data = code.encode('utf-8', 'surrogatepass')
+        key = hashlib.sha256(data).hexdigest()
+        entry = self.trees.get(key)
+        if entry is not None:
+            self.trees.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        tree = ast.parse(code, filename=filename)
+        if len(data) <= self.max_source_bytes:
+            self.trees[key] = (tree, len(data))
+            self.source_bytes += len(data)
+            while self.source_bytes > self.max_source_bytes:
+                _, (_, size) = self.trees.popitem(last=False)
+                self.source_bytes -= size
+        return tree
+
+    def clear(self):
+        self.trees.clear()
+        self.source_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else 0,
+            'entries': len(self.trees),
+            'sourceBytes': self.source_bytes,
+            'maxSourceBytes': self.max_source_bytes
+        }
+
+
+_default_cache = ParseCache()
+
+
+def parse_cached(code, filename='file.py'):
+    """ast.parse through the process-wide ParseCache"""
+    return _default_cache.parse(code, filename)
+
+
+def get_parse_cache():
+    return _default_cache
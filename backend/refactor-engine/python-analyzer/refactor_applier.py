@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Apply several extract-function suggestions to one file in a single pass
+Usage: echo '{"code": "...", "filename": "...", "suggestions": [...], "baseHash": "..."}' | python refactor_applier.py
+       echo '{"code": "..."}' | python refactor_applier.py --top 5   (suggest, then apply the best 5)
+Suggestions must carry line-range `edits` (refactor_suggester.py --output edits). All of
+them go into one EditBuffer against the original lines; a suggestion that overlaps one
+accepted earlier is refused as a whole. The result is built once and parsed once - on a
+SyntaxError the suggestion owning the failing line is dropped and the buffer rebuilt.
+"""
+
+import re
+import sys
+import ast
+import json
+import argparse
+
+from edits import EditBuffer, base_hash
+
+# Module-level names an extracted function must not shadow
+TOP_LEVEL_NAME = re.compile(r'^(?:async\s+def|def|class)\s+(\w+)', re.MULTILINE)
+
+
+def _header_index(lines):
+    """Position of the `def` line among an inserted definition's lines"""
+    for position, line in enumerate(lines):
+        if line.startswith(('def ', 'async def ')):
+            return position
+    return 0
+
+
+def _renamed(edits, name, new_name):
+    """Edits with the call and the def of an extracted function renamed"""
+    call, definition = edits
+    call_lines = [call['lines'][0].replace(f'{name}(', f'{new_name}(', 1)] + call['lines'][1:]
+    def_lines = list(definition['lines'])
+    header = _header_index(def_lines)
+    def_lines[header] = def_lines[header].replace(f'def {name}(', f'def {new_name}(', 1)
+    return [dict(call, lines=call_lines), dict(definition, lines=def_lines)]
+
+
+def _owner(placed, line):
+    """Tag of the edit that produced new line `line`, else of the last edit before it"""
+    owner = None
+    for tag, edit, start in placed:
+        if start > line:
+            break
+        owner = tag
+        if line < start + len(edit['lines']):
+            return tag
+    return owner
+
+
+def apply_suggestions(code, suggestions, filename='file.py', expected_hash=None, validate=True):
+    """Apply every non-overlapping suggestion at once; returns new code and per-suggestion status"""
+    if expected_hash is not None and expected_hash != base_hash(code):
+        return {
+            'ok': False,
+            'error': 'stale_base',
+            'details': 'suggestions were computed for a different version of the code'
+        }
+
+    buffer = EditBuffer(code.split('\n'))
+    taken = set(TOP_LEVEL_NAME.findall(code))
+    results = []
+    for position, suggestion in enumerate(suggestions):
+        name = suggestion.get('extractedName', 'extracted_logic')
+        result = {'index': position, 'function': suggestion.get('function'), 'extractedName': name}
+        results.append(result)
+        edits = suggestion.get('edits')
+        if not edits or len(edits) != 2:
+            result['status'] = 'no_edits'
+            continue
+
+        # Two suggestions (or the file itself) may pick the same name
+        new_name = name
+        counter = 2
+        while new_name in taken:
+            new_name = f'{name}_{counter}'
+            counter += 1
+        if new_name != name:
+            edits = _renamed(edits, name, new_name)
+            result['extractedName'] = new_name
+            result['renamedFrom'] = name
+
+        if buffer.add(position, edits):
+            taken.add(new_name)
+            result['status'] = 'applied'
+        else:
+            result['status'] = 'overlap'
+
+    while True:
+        lines, placed = buffer.lines()
+        new_code = '\n'.join(lines)
+        if not validate:
+            break
+        try:
+            ast.parse(new_code, filename=filename)
+            break
+        except SyntaxError as e:
+            owner = _owner(placed, e.lineno or 1)
+            if owner is None:
+                # The base itself doesn't parse; nothing left to drop
+                return {
+                    'ok': False,
+                    'error': 'parse_error',
+                    'details': str(e),
+                    'results': results
+                }
+            buffer.remove(owner)
+            results[owner]['status'] = 'invalid'
+            results[owner]['details'] = str(e)
+
+    for tag, edit, start in placed:
+        # The call replaces a block; the definition is an insertion
+        if edit['endLine'] >= edit['startLine']:
+            results[tag]['callLine'] = start
+        else:
+            results[tag]['definitionLine'] = start + _header_index(edit['lines'])
+
+    return {
+        'ok': True,
+        'code': new_code,
+        'baseHash': base_hash(code),
+        'applied': sum(1 for result in results if result['status'] == 'applied'),
+        'validated': validate,
+        'results': results
+    }
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Apply extract-function suggestions in one pass')
+    parser.add_argument('--top', type=int, default=5,
+                        help='suggestions to compute when the request has none')
+    parser.add_argument('--no-validate', action='store_true', help='skip the final ast.parse check')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    try:
+        input_data = json.loads(sys.stdin.read())
+        code = input_data.get('code', '')
+        filename = input_data.get('filename', 'file.py')
+        suggestions = input_data.get('suggestions')
+        expected_hash = input_data.get('baseHash')
+        if suggestions is None:
+            from refactor_suggester import suggest_refactoring
+            suggested = suggest_refactoring(code, filename, output='edits', top=args.top)
+            if not suggested['ok']:
+                print(json.dumps(suggested))
+                sys.exit(1)
+            suggestions = suggested['suggestions']
+
+        print(json.dumps(apply_suggestions(code, suggestions, filename, expected_hash, not args.no_validate)))
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps({'ok': False, 'error': 'applier_error', 'details': str(e)}))
+        sys.exit(1)
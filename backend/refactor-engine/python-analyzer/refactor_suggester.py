@@ -2,174 +2,185 @@
 """
 Python refactoring suggester - extracts functions and suggests improvements
 Usage: echo '{"code": "...", "filename": "..."}' | python refactor_suggester.py
+       python refactor_suggester.py --serve   (newline-delimited JSON requests, see serve.py)
+       python refactor_suggester.py --serve --isolate   (forked, rlimited child per request)
+       python refactor_suggester.py --output edits|diff   (line-range edits or unified diff, see edits.py)
+       python refactor_suggester.py --top 5 --max-seconds 0.5   (best K blocks, ranking time budget)
 """
 
 import sys
 import json
 import ast
+import heapq
+import functools
 import random
 import string
 
+import timings
+import analyzer
+import candidates
+import dataflow
+import edits
+from analyzer import Budget
+from candidates import BlockScorer, child_statements, first_line
+from dataflow import DefUseIndex
+from edits import apply_edits, base_hash, make_edit, unified_diff
+from cache import cached_call, get_default_cache, source_version
+
+# Cache version stamp - changes whenever the suggestion strategies or scoring change
+SUGGESTER_VERSION = source_version(__file__, analyzer.__file__, candidates.__file__,
+                                   dataflow.__file__, edits.__file__)
+
+# Suggestion payloads: whole-file copies, line-range edits, or a unified diff
+OUTPUT_FORMATS = ('full', 'edits', 'diff')
+
+# Suggestions returned, and seconds spent ranking candidate blocks - unbounded for
+# library callers; the CLI and --serve workers answer HTTP requests, so they get a budget
+DEFAULT_TOP = 2
+DEFAULT_MAX_SECONDS = None
+CLI_MAX_SECONDS = 1.0
+
 class RefactorAnalyzer(ast.NodeVisitor):
-    def __init__(self, source_code):
-        self.suggestions = []
+    def __init__(self, source_code, output='full', filename='file.py', top=DEFAULT_TOP, budget=None):
+        self.output = output
+        self.filename = filename
         self.source_lines = source_code.split('\n')
         self.source_code = source_code
-        
+        self.top = top
+        self.budget = budget
+        # Min-heap of the best `top` blocks: (score, -visit order, node, block)
+        self._ranked = []
+        self.functions_scored = 0
+        self.candidates_scored = 0
+        self.truncated = None
+        # Functions enclosing the one being visited, and their def-use indexes once built
+        self._enclosing = []
+        self._indexes = {}
+    
+    def generic_visit(self, node):
+        # Functions are only ever defined in statement lists, so skip expressions
+        for child in child_statements(node):
+            self.visit(child)
+    
     def visit_FunctionDef(self, node):
         # Suggest refactoring for functions that are long enough
         function_length = node.end_lineno - node.lineno + 1 if node.end_lineno else 0
         
-        # Count total statements including nested ones
-        total_statements = sum(1 for _ in ast.walk(node) if isinstance(_, ast.stmt))
-        
-        # Suggest if function is long (10+ lines) OR has many statements (8+)
-        if function_length >= 10 or total_statements >= 8:
-            suggestion = self._analyze_function(node)
-            if suggestion:
-                self.suggestions.append(suggestion)
+        # Suggest if function is long (10+ lines) OR has many statements (8+), counting nested ones
+        if function_length >= 10 or sum(1 for _ in ast.walk(node) if isinstance(_, ast.stmt)) >= 8:
+            self._rank_function(node)
         
+        self._enclosing.append(node)
         self.generic_visit(node)
+        self._enclosing.pop()
     
     def visit_AsyncFunctionDef(self, node):
         self.visit_FunctionDef(node)
     
-    def _analyze_function(self, node):
-        """Analyze a function and suggest extraction"""
+    def _def_use(self, node, closure=()):
+        """DefUseIndex of a function, built on first use"""
+        index = self._indexes.get(node)
+        if index is None:
+            index = self._indexes[node] = DefUseIndex(node, closure)
+        return index
+    
+    def _rank_function(self, node):
+        """Score the function's candidate blocks and keep its best if it makes the top K"""
+        if self.truncated or self.top <= 0:
+            return
+        if self.budget is not None and self.budget.expired():
+            self.truncated = 'max_seconds'
+            return
+        
+        # Locals of enclosing functions are closure variables here
+        closure = set()
+        for enclosing in self._enclosing:
+            closure |= self._def_use(enclosing).locals
+        index = self._def_use(node, closure)
+        
+        # Only blocks that beat the current K-th best are worth a dataflow pass
+        threshold = self._ranked[0][0] if len(self._ranked) >= self.top else float('-inf')
+        best, scored, expired = BlockScorer(node).best(index, threshold, self.budget)
+        self.functions_scored += 1
+        self.candidates_scored += scored
+        if expired:
+            self.truncated = 'max_seconds'
+        if best is None:
+            return
+        
+        entry = (best[0], -self.functions_scored, node, best)
+        if len(self._ranked) < self.top:
+            heapq.heappush(self._ranked, entry)
+        else:
+            heapq.heappushpop(self._ranked, entry)
+    
+    def ranked_suggestions(self):
+        """Suggestions for the best K blocks, best first"""
+        ranked = sorted(self._ranked, key=lambda entry: entry[:2], reverse=True)
+        return [self._analyze_function(node, block) for _, _, node, block in ranked]
+    
+    def _analyze_function(self, node, block):
+        """Build the extract-function suggestion for a ranked block"""
         function_name = node.name
-        function_body = node.body
-        
-        # Look for extractable blocks (loops, if statements, etc.)
-        extractable = self._find_extractable_block(function_body)
-        
-        if not extractable:
-            return None
-        
-        start_line, end_line, statements = extractable
+        score, start, end, impact, dataflow = block
+        statements = node.body[start:end + 1]
+        start_line = first_line(statements[0])
+        end_line = statements[-1].end_lineno or statements[-1].lineno
         
         # Generate extracted function name
         extracted_name = self._generate_function_name(statements)
         
-        # Find external variables
-        external_vars = self._find_external_variables(statements, node)
+        # Inputs and outputs of the block from the function's def-use index
+        external_vars = dataflow['inputs']
+        returns = dataflow['outputs']
         
         # Build extracted function
         extracted_code = self._build_extracted_function(
             extracted_name, 
             external_vars, 
             statements,
-            isinstance(node, ast.AsyncFunctionDef)
+            isinstance(node, ast.AsyncFunctionDef),
+            returns
         )
         
-        # Build patched code
-        patched_code = self._build_patched_code(
-            node, 
+        # Edits that turn the original source into the patched code
+        edits = self._build_edits(
             start_line, 
             end_line, 
             extracted_name, 
-            external_vars
+            external_vars,
+            extracted_code,
+            returns
         )
         
         lines_extracted = end_line - start_line + 1
         
-        return {
+        suggestion = {
             'type': 'extract_function',
             'function': function_name,
             'extractedName': extracted_name,
             'parameters': external_vars,
-            'returns': [],
+            'returns': returns,
             'linesExtracted': lines_extracted,
-            'beforeSnippet': self.source_code,
             'extractedCode': extracted_code,
-            'patchedCode': patched_code,
             'description': f'Extract {len(statements)} statements ({lines_extracted} lines) into {extracted_name}()',
             'benefit': f'Simplifies {function_name} and improves readability by separating concerns',
-            'risk': 'low'
+            # A return/yield inside the block can't simply move into another function
+            'risk': 'high' if dataflow['escapes'] else 'low',
+            'score': round(score, 2),
+            'impact': dict(impact, scoreGain=round(impact['scoreGain'], 2))
         }
-    
-    def _find_extractable_block(self, body):
-        """Find a block of statements that can be extracted"""
-        if not body:
-            return None
-        
-        # Strategy 1: Look for complex if blocks (good extraction candidates)
-        for i, stmt in enumerate(body):
-            if isinstance(stmt, ast.If):
-                # If the if block is substantial, suggest extracting it
-                if stmt.end_lineno and (stmt.end_lineno - stmt.lineno) >= 5:
-                    return (stmt.lineno, stmt.end_lineno, [stmt])
         
-        # Strategy 2: Look for loops (good extraction candidates)
-        for i, stmt in enumerate(body):
-            if isinstance(stmt, (ast.For, ast.While)):
-                # Check if there are statements before the loop
-                if i > 0 and i >= 2:
-                    # Extract statements before the loop
-                    statements = body[0:i]
-                    start_line = statements[0].lineno
-                    end_line = statements[-1].end_lineno or statements[-1].lineno
-                    if end_line - start_line + 1 >= 3:
-                        return (start_line, end_line, statements)
-                
-                # Or extract the loop itself if it's complex
-                if stmt.end_lineno and (stmt.end_lineno - stmt.lineno) >= 5:
-                    return (stmt.lineno, stmt.end_lineno, [stmt])
+        # Only 'full' repeats the whole file; the others scale with the change
+        if self.output == 'edits':
+            suggestion['edits'] = edits
+        elif self.output == 'diff':
+            suggestion['diff'] = unified_diff(self.source_lines, edits, self.filename)
+        else:
+            suggestion['beforeSnippet'] = self.source_code
+            suggestion['patchedCode'] = '\n'.join(apply_edits(self.source_lines, edits))
         
-        # Strategy 3: Extract middle section (avoid first and last statements)
-        if len(body) >= 6:
-            # Skip first statement, take next 3-4 statements
-            start_idx = 1
-            end_idx = min(4, len(body) - 2)  # Leave at least last statement
-            statements = body[start_idx:end_idx]
-            
-            if statements:
-                start_line = statements[0].lineno
-                end_line = statements[-1].end_lineno or statements[-1].lineno
-                if end_line - start_line + 1 >= 3:
-                    return (start_line, end_line, statements)
-        
-        # Strategy 4: Take first chunk (but not if last is return)
-        if len(body) >= 3:
-            end_idx = len(body) - 1 if isinstance(body[-1], ast.Return) else len(body)
-            
-            if end_idx >= 2:
-                take_count = min(2, end_idx)
-                statements = body[0:take_count]
-                
-                if statements:
-                    start_line = statements[0].lineno
-                    end_line = statements[-1].end_lineno or statements[-1].lineno
-                    lines = end_line - start_line + 1
-                    
-                    if lines >= 5:  # Only if substantial
-                        return (start_line, end_line, statements)
-        
-        return None
-    
-    def _find_external_variables(self, statements, function_node):
-        """Find variables used in statements that come from outside"""
-        # Get function parameters
-        param_names = [arg.arg for arg in function_node.args.args]
-        
-        # Find all names referenced in the statements
-        referenced = set()
-        defined = set()
-        
-        for stmt in statements:
-            for node in ast.walk(stmt):
-                if isinstance(node, ast.Name):
-                    if isinstance(node.ctx, ast.Store):
-                        defined.add(node.id)
-                    elif isinstance(node.ctx, ast.Load):
-                        referenced.add(node.id)
-        
-        # External variables are those referenced but not defined in the block
-        external = referenced - defined
-        
-        # Filter to only function parameters (most common case)
-        external_params = [name for name in external if name in param_names]
-        
-        return external_params
+        return suggestion
     
     def _generate_function_name(self, statements):
         """Generate a meaningful name for the extracted function"""
@@ -222,7 +233,7 @@ class RefactorAnalyzer(ast.NodeVisitor):
         
         return 'extracted_logic'
     
-    def _build_extracted_function(self, name, params, statements, is_async):
+    def _build_extracted_function(self, name, params, statements, is_async, returns=()):
         """Build the extracted function code"""
         indent = '    '
         
@@ -238,46 +249,39 @@ class RefactorAnalyzer(ast.NodeVisitor):
             for line in stmt_code.split('\n'):
                 lines.append(indent + line)
         
+        # Hand back every name the rest of the caller still reads
+        if returns:
+            lines.append(indent + 'return ' + ', '.join(returns))
+        
         return '\n'.join(lines)
     
-    def _build_patched_code(self, function_node, start_line, end_line, extracted_name, params):
-        """Build the complete patched code with extracted function"""
-        # Get original source lines
-        lines = self.source_lines.copy()
-        
+    def _build_edits(self, start_line, end_line, extracted_name, params, extracted_code, returns=()):
+        """Line-range edits: replace the block with a call, append the extracted function"""
         # Build the call to extracted function
         params_str = ', '.join(params) if params else ''
-        call_line = f"    {extracted_name}({params_str})"
-        
-        # Calculate line indices (ast uses 1-based, lists use 0-based)
-        start_idx = start_line - 1
-        end_idx = end_line - 1
         
         # Get the indentation of the first statement
-        original_indent = len(lines[start_idx]) - len(lines[start_idx].lstrip())
+        first_line = self.source_lines[start_line - 1]
+        original_indent = len(first_line) - len(first_line.lstrip())
         call_line = ' ' * original_indent + f"{extracted_name}({params_str})"
-        
-        # Replace the extracted lines with the function call
-        lines[start_idx:end_idx + 1] = [call_line]
-        
-        # Build extracted function code
-        extracted_code = self._build_extracted_function(
-            extracted_name,
-            params,
-            function_node.body[0:3],  # The statements we extracted
-            isinstance(function_node, ast.AsyncFunctionDef)
-        )
-        
-        # Add extracted function at the end
-        lines.append('')
-        lines.append(extracted_code)
-        
-        return '\n'.join(lines)
+        if returns:
+            call_line = ' ' * original_indent + f"{', '.join(returns)} = {extracted_name}({params_str})"
+        
+        end_of_file = len(self.source_lines)
+        return [
+            # Replace the extracted lines with the function call
+            make_edit(start_line, end_line, [call_line]),
+            # Add extracted function at the end
+            make_edit(end_of_file + 1, end_of_file, [''] + extracted_code.split('\n'))
+        ]
 
-def suggest_refactoring(code, filename='file.py'):
-    """Main function to suggest refactorings"""
+def suggest_refactoring(code, filename='file.py', parse=ast.parse, output='full', top=DEFAULT_TOP,
+                        max_seconds=DEFAULT_MAX_SECONDS):
+    """Main function to suggest refactorings (parse may be a caching ast.parse)"""
+    timer = timings.new_timer('suggest')
     try:
-        tree = ast.parse(code, filename=filename)
+        with timer.phase('parse'):
+            tree = parse(code, filename=filename)
     except SyntaxError as e:
         return {
             'ok': False,
@@ -286,19 +290,75 @@ def suggest_refactoring(code, filename='file.py'):
             'suggestions': []
         }
     
-    analyzer = RefactorAnalyzer(code)
-    analyzer.visit(tree)
+    budget = Budget(max_seconds=max_seconds)
+    budget.start()
+    refactor = RefactorAnalyzer(code, output, filename, top, budget)
+    with timer.phase('visit'):
+        refactor.visit(tree)
+        suggestions = refactor.ranked_suggestions()
     
-    return {
+    result = {
         'ok': True,
-        'suggestions': analyzer.suggestions[:2],  # Limit to 2 suggestions
+        'suggestions': suggestions,
         'summary': {
-            'total': len(analyzer.suggestions[:2]),
-            'functionsAnalyzed': len([s for s in analyzer.suggestions if s])
+            'total': len(suggestions),
+            'functionsAnalyzed': refactor.functions_scored,
+            'candidatesScored': refactor.candidates_scored
         }
     }
+    if refactor.truncated:
+        # Ranked from the functions scored before the budget ran out
+        result['truncated'] = True
+        result['truncatedReason'] = refactor.truncated
+    if output != 'full':
+        # Every edit/diff applies to this exact source
+        result['format'] = output
+        result['baseHash'] = base_hash(code)
+    return timer.finish(result, code, tree)
+
+def suggest_refactoring_cached(code, filename='file.py', cache=None, output='full', top=DEFAULT_TOP,
+                               max_seconds=DEFAULT_MAX_SECONDS, parse=ast.parse):
+    """suggest_refactoring behind the on-disk result cache - hits skip ast.parse entirely"""
+    suggest = functools.partial(suggest_refactoring, output=output, top=top, max_seconds=max_seconds, parse=parse)
+    # Truncated results are never stored, so the time budget isn't part of the key
+    kind = 'suggest' if output == 'full' else f'suggest-{output}'
+    if top != DEFAULT_TOP:
+        kind += f'-top{top}'
+    return cached_call(suggest, kind, SUGGESTER_VERSION, code, filename, cache)
 
 if __name__ == '__main__':
+    suggest = suggest_refactoring_cached if '--cache' in sys.argv[1:] else suggest_refactoring
+    if '--output' in sys.argv[1:]:
+        output = sys.argv[sys.argv.index('--output') + 1]
+        if output not in OUTPUT_FORMATS:
+            print(json.dumps({'ok': False, 'error': 'suggester_error',
+                              'details': f'--output must be one of {", ".join(OUTPUT_FORMATS)}', 'suggestions': []}))
+            sys.exit(1)
+        suggest = functools.partial(suggest, output=output)
+    if '--top' in sys.argv[1:]:
+        suggest = functools.partial(suggest, top=int(sys.argv[sys.argv.index('--top') + 1]))
+    max_seconds = CLI_MAX_SECONDS
+    if '--max-seconds' in sys.argv[1:]:
+        max_seconds = float(sys.argv[sys.argv.index('--max-seconds') + 1])
+    suggest = functools.partial(suggest, max_seconds=max_seconds)
+    if '--timings' in sys.argv[1:]:
+        timings.enable()
+    
+    if '--cache-stats' in sys.argv[1:]:
+        print(json.dumps(get_default_cache().stats()))
+        sys.exit(0)
+    
+    if '--serve' in sys.argv[1:]:
+        # Warm worker mode: one JSON request per line until stdin closes
+        if '--isolate' in sys.argv[1:]:
+            # One forked, rlimited child per request (see zygote.py)
+            from zygote import serve_forked
+            serve_forked({'suggest': suggest}, 'suggester_error')
+        else:
+            from serve import serve
+            serve(suggest, 'suggester_error', tool='suggest')
+        sys.exit(0)
+    
     try:
         # Read JSON input from stdin
         input_data = json.loads(sys.stdin.read())
@@ -306,7 +366,7 @@ if __name__ == '__main__':
         filename = input_data.get('filename', 'file.py')
         
         # Suggest refactorings
-        result = suggest_refactoring(code, filename)
+        result = suggest(code, filename)
         
         # Output JSON result to stdout
         print(json.dumps(result))
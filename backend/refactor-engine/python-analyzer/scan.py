@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Local repository scanner - scores a whole checkout without GitHub or file caps
+Usage: python scan.py /path/to/repo [--jobs 8] [--cache] [--top 10] [--clones]
+Prints the same summary shape as the backend's /analyze-repo route. With --clones, workers
+also hash every function and block (see clones.py) and duplicated code across the whole
+repository is listed as duplicate_code findings under each file's `duplicates` (kept out of
+totalSmells, which stays consistent with the file's quality score and toxicity).
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import subprocess
+from importlib.util import decode_source
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from analyzer import analyze_python_code, analyze_python_code_cached, render_smell
+from clones import CloneIndex, clone_smells, clone_summary, unit_hashes
+from columnar import FunctionColumns, score_files, summarize
+
+# Directories never worth scanning, even without a .gitignore
+DEFAULT_EXCLUDES = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', '.tox', '.nox'}
+
+# Same cap as the backend's JSON body limit
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+
+class GitIgnore:
+    """Minimal .gitignore matcher: globs, **, leading-slash anchors, dir-only and ! rules"""
+
+    def __init__(self):
+        # (base directory relative to root, compiled regex, negated, directory only)
+        self.rules = []
+
+    def add_file(self, path, base):
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.strip('/') if dir_only else line
+            anchored = '/' in line.lstrip('/') or line.startswith('/')
+            line = line.lstrip('/')
+            regex = self._translate(line)
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((base, re.compile(regex + '$'), negated, dir_only))
+
+    @staticmethod
+    def _translate(pattern):
+        """Regex for a gitignore glob: ** may span directories, *, ? and [...] never match /"""
+        regex = []
+        i = 0
+        if pattern.startswith('**/'):
+            # Leading **/ matches in any directory, including the base itself
+            regex.append('(?:.*/)?')
+            i = 3
+        while i < len(pattern):
+            if pattern.startswith('/**/', i):
+                # a/**/b also matches a/b
+                regex.append('/(?:.*/)?')
+                i += 4
+            elif pattern.startswith('**', i):
+                regex.append('.*')
+                i += 2
+            elif pattern[i] == '*':
+                regex.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                regex.append('[^/]')
+                i += 1
+            elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+                end = pattern.index(']', i + 2)
+                body = pattern[i + 1:end]
+                negated = body[:1] in ('!', '^')
+                body = body[1:] if negated else body
+                regex.append('[' + ('^/' if negated else '') + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+            elif pattern[i] == '\\' and i + 1 < len(pattern):
+                regex.append(re.escape(pattern[i + 1]))
+                i += 2
+            else:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+        return ''.join(regex)
+
+    def ignored(self, rel_path, is_dir):
+        result = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                candidate = rel_path[len(base) + 1:]
+            else:
+                candidate = rel_path
+            if regex.match(candidate):
+                result = not negated
+        return result
+
+
+def _git_files(root):
+    """Tracked + untracked-but-not-ignored files from git, or None outside a work tree"""
+    try:
+        output = subprocess.run(
+            ['git', '-C', root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            capture_output=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [path for path in output.decode('utf-8', 'surrogateescape').split('\0') if path]
+
+
+def _walk_files(root, threads=8):
+    """Parallel directory walk honouring nested .gitignore files"""
+    ignore = GitIgnore()
+    files = []
+
+    def scan_dir(rel_dir):
+        abs_dir = os.path.join(root, rel_dir)
+        gitignore = os.path.join(abs_dir, '.gitignore')
+        found_files, found_dirs = [], []
+        try:
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            return gitignore, found_files, found_dirs
+        for entry in entries:
+            rel = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in DEFAULT_EXCLUDES:
+                    found_dirs.append(rel)
+            elif entry.is_file(follow_symlinks=False):
+                found_files.append(rel)
+        return gitignore, found_files, found_dirs
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        level = ['']
+        while level:
+            next_level = []
+            # A level's .gitignore files are loaded before its children are filtered
+            for rel_dir, (gitignore, found_files, found_dirs) in zip(level, executor.map(scan_dir, level)):
+                if os.path.exists(gitignore):
+                    ignore.add_file(gitignore, rel_dir)
+                files.extend(f for f in found_files if not ignore.ignored(f, False))
+                next_level.extend(d for d in found_dirs if not ignore.ignored(d, True))
+            level = next_level
+
+    return files
+
+
+def list_source_files(root, extensions=('.py',)):
+    """Relative paths of files with one of extensions under root that git (or .gitignore rules) would keep"""
+    files = _git_files(root)
+    if files is None:
+        files = _walk_files(root)
+    excluded = lambda path: any(part in DEFAULT_EXCLUDES for part in path.split('/')[:-1])
+    return sorted(path for path in files if path.endswith(extensions) and not excluded(path))
+
+
+def list_python_files(root):
+    return list_source_files(root, ('.py',))
+
+
+def _scan_file(root, rel_path, use_cache, max_bytes, clones=None):
+    """Read and analyze one file inside the worker, returning its /analyze-repo entry.
+    clones: None, or unit_hashes options plus 'analyze' (False = clone units only)."""
+    path = os.path.join(root, rel_path)
+    try:
+        size = os.path.getsize(path)
+        if size > max_bytes:
+            return {'path': rel_path, 'skipped': f'larger than {max_bytes} bytes'}
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Honours PEP 263 coding cookies and normalises newlines
+        code = decode_source(data)
+    except (OSError, SyntaxError, UnicodeDecodeError) as e:
+        return {'path': rel_path, 'skipped': str(e)}
+
+    entry = {'path': rel_path}
+    # Clone hashing below reuses the analyzer's tree. Every file is parsed once, so a
+    # tree cache would only hold memory; this one goes away with the file.
+    trees = []
+
+    def parse_once(source, filename='<unknown>'):
+        trees.append(ast.parse(source, filename=filename))
+        return trees[-1]
+
+    if clones is None or clones['analyze']:
+        try:
+            if use_cache:
+                analysis = analyze_python_code_cached(code, rel_path, compact=True)
+            else:
+                analysis = analyze_python_code(code, rel_path, compact=True,
+                                               parse=parse_once if clones is not None else ast.parse)
+        except Exception as e:
+            return {'path': rel_path, 'skipped': str(e)}
+        if 'error' in analysis:
+            return {'path': rel_path, 'skipped': analysis['error']}
+        # Compact function rows; the parent scores every file at once (see columnar.py)
+        entry.update({
+            'language': 'python',
+            'rows': analysis['functions'],
+            'lines': code.count('\n') + 1,
+            'size': size
+        })
+
+    if clones is not None:
+        try:
+            tree = trees[0] if trees else ast.parse(code, filename=rel_path)
+        except (SyntaxError, ValueError) as e:
+            return {'path': rel_path, 'skipped': str(e)}
+        entry['units'] = unit_hashes(tree, clones['abstract'], clones['minLines'], clones['minNodes'])
+    return entry
+
+
+def _scan_chunk(root, paths, use_cache, max_bytes, clones=None):
+    return [_scan_file(root, path, use_cache, max_bytes, clones) for path in paths]
+
+
+def scan_files(root, paths, jobs=None, use_cache=False, max_bytes=DEFAULT_MAX_BYTES, clones=None):
+    """Analyze paths across processes; workers read the files themselves so only paths cross IPC"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(paths) <= 1:
+        return _scan_chunk(root, paths, use_cache, max_bytes, clones)
+
+    # ~4 chunks per worker balances IPC overhead against stragglers
+    chunksize = max(1, -(-len(paths) // (jobs * 4)))
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+        futures = [executor.submit(_scan_chunk, root, chunk, use_cache, max_bytes, clones) for chunk in chunks]
+        for future in as_completed(futures):
+            results.extend(future.result())
+    return results
+
+
+def clone_options(abstract=True, min_lines=None, min_nodes=None, analyze=True):
+    """The `clones` argument of scan_files"""
+    from clones import MIN_LINES, MIN_NODES
+    return {
+        'abstract': abstract,
+        'minLines': MIN_LINES if min_lines is None else min_lines,
+        'minNodes': MIN_NODES if min_nodes is None else min_nodes,
+        'analyze': analyze
+    }
+
+
+def _index_clones(entries):
+    """Clone groups across all scanned files; pops the per-file units"""
+    index = CloneIndex()
+    for entry in entries:
+        index.add(entry['path'], entry.pop('units'))
+    return index.groups()
+
+
+def find_clones(root, jobs=None, abstract=True, min_lines=None, min_nodes=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Clone groups of a local checkout, without the quality analysis"""
+    root = os.path.abspath(root)
+    options = clone_options(abstract, min_lines, min_nodes, analyze=False)
+    entries = scan_files(root, list_python_files(root), jobs, False, max_bytes, options)
+    return _index_clones([entry for entry in entries if 'skipped' not in entry])
+
+
+def scan_repository(root, jobs=None, use_cache=False, top=10, max_bytes=DEFAULT_MAX_BYTES, clones=None):
+    """Scan a local checkout and return an /analyze-repo shaped report"""
+    root = os.path.abspath(root)
+    paths = list_python_files(root)
+    entries = scan_files(root, paths, jobs, use_cache, max_bytes, clones)
+
+    analyzed = [entry for entry in entries if 'skipped' not in entry]
+    skipped = sorted((entry for entry in entries if 'skipped' in entry), key=lambda e: e['path'])
+    if clones is None or clones['analyze']:
+        columns = FunctionColumns()
+        for entry in analyzed:
+            columns.add_file(entry.pop('rows'))
+        score_files(columns, analyzed)
+    groups = None
+    if clones is not None:
+        groups = _index_clones(analyzed)
+        by_path = {entry['path']: entry for entry in analyzed}
+        for path, smells in clone_smells(groups).items():
+            entry = by_path[path]
+            entry['duplicates'] = [render_smell(name, smell) for name, smell in smells]
+    summary, files, worst_files = summarize(analyzed, top)
+
+    report = {
+        'ok': True,
+        'repository': {
+            'path': root,
+            'repo': os.path.basename(root),
+            'totalFiles': len(paths),
+            'analyzedFiles': len(analyzed)
+        },
+        'summary': summary,
+        'files': files,
+        'worstFiles': worst_files,
+        'skipped': skipped
+    }
+    if groups is not None:
+        report['clones'] = {'summary': clone_summary(groups), 'groups': groups}
+    return report
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Scan a local Python checkout')
+    parser.add_argument('path', nargs='?', default='.')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--cache', action='store_true', help='reuse results for unchanged files (see cache.py)')
+    parser.add_argument('--top', type=int, default=10, help='number of worst files to list')
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES, help='skip files larger than this')
+    parser.add_argument('--summary-only', action='store_true', help='omit the per-file list')
+    parser.add_argument('--clones', action='store_true', help='report duplicated code across the repository')
+    parser.add_argument('--exact-clones', action='store_true',
+                        help='with --clones: do not abstract identifiers and literals')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    try:
+        clones = clone_options(abstract=not args.exact_clones) if args.clones else None
+        report = scan_repository(args.path, args.jobs, args.cache, args.top, args.max_bytes, clones)
+        if args.summary_only:
+            del report['files']
+        print(json.dumps(report))
+        sys.exit(0)
+    except Exception as e:
+        print(json.dumps({'ok': False, 'error': 'scan_error', 'details': str(e)}))
+        sys.exit(1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Long-lived JSON-lines worker loop shared by analyzer.py and refactor_suggester.py
+Usage: python analyzer.py --serve
+       stdin:  {"id": 1, "code": "...", "filename": "..."}   (one request per line)
+       stdout: {"id": 1, "result": {...}}                     (one response per line)
+With streaming=True the handler also gets an emit callback, and every record it emits
+is written as {"id": 1, "partial": {...}} before the final {"id": 1, "result": {...}}.
+{"id": 1, "op": "metrics"} returns this process's timing histograms (see timings.py) as
+{"id": 1, "result": {"format": "prometheus", "text": "..."}}.
+handler may also be a dict of tool name -> handler, picked by the request's "tool" field
+(the first entry is the default).
+"""
+
+import os
+import sys
+import json
+import time
+
+import timings
+
+
+def handle_line(line, handler, error_code, emit=None):
+    """Run one request line through handler and return the response envelope"""
+    try:
+        request = json.loads(line)
+    except Exception as e:
+        return {
+            'id': None,
+            'error': error_code,
+            'details': str(e)
+        }
+    return handle_request(request, handler, error_code, emit)
+
+
+def handle_request(request, handler, error_code, emit=None):
+    """Run one decoded request through handler and return the response envelope"""
+    request_id = None
+    try:
+        request_id = request.get('id')
+        if request.get('op') == 'metrics':
+            return {
+                'id': request_id,
+                'result': {'format': 'prometheus', 'text': timings.render_prometheus(pid=os.getpid())}
+            }
+        if isinstance(handler, dict):
+            tool = request.get('tool') or next(iter(handler))
+            if tool not in handler:
+                raise ValueError(f'unknown tool: {tool}')
+            handler = handler[tool]
+        code = request.get('code', '')
+        filename = request.get('filename', 'file.py')
+        if emit is None:
+            return {'id': request_id, 'result': handler(code, filename)}
+
+        def emit_partial(record):
+            emit({'id': request_id, 'partial': record})
+
+        return {'id': request_id, 'result': handler(code, filename, emit_partial)}
+    except Exception as e:
+        # Per-request error envelope - the worker stays alive for the next line
+        return {
+            'id': request_id,
+            'error': error_code,
+            # MemoryError and friends have no message
+            'details': str(e) or type(e).__name__
+        }
+
+
+def serve(handler, error_code, stdin=None, stdout=None, streaming=False, tool='worker'):
+    """Read newline-delimited JSON requests until EOF, answering each one in order"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def write(message):
+        start = time.perf_counter()
+        line = json.dumps(message)
+        timings.observe_phase(tool, 'serialize', time.perf_counter() - start)
+        stdout.write(line + '\n')
+        stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        response = handle_line(line, handler, error_code, write if streaming else None)
+        write(response)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The analyzer modules are standalone scripts imported by name
+ANALYZER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ANALYZER_DIR)
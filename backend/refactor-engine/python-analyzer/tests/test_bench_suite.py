@@ -0,0 +1,12 @@
+from benchmarks.bench_suite import run_isolated
+
+
+def test_child_exception_is_reported_as_failed_corpus():
+    result = run_isolated('analyze', 'no such corpus', 0, 1)
+    assert result['error'] == "KeyError: 'no such corpus'"
+    assert 'Traceback' in result['traceback']
+
+
+def test_successful_corpus():
+    result = run_isolated('analyze', 'nesting 50 deep', 0, 1)
+    assert result['files'] == 1 and 'error' not in result
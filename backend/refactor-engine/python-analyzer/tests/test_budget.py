@@ -0,0 +1,93 @@
+import ast
+
+import pytest
+
+from analyzer import Budget, _parse_prefix, analyze_python_code, analyze_python_code_cached
+from cache import ResultCache
+
+CODE = '''import os
+
+
+def first(x):
+    return x + 1
+
+
+def second(items):
+    total = 0
+    for item in items:
+        if item:
+            total += item
+    return total
+
+
+def third(path):
+    message = """a long
+    string literal"""
+    return os.path.join(path, message)
+'''
+
+
+def _names(result):
+    return [f['name'] for f in result['functions']]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'results.sqlite3'))
+
+
+def test_max_bytes_cut_mid_statement_keeps_the_complete_statements():
+    cut = CODE.index('string literal')
+    result = analyze_python_code(CODE, 'a.py', budget=Budget(max_bytes=cut))
+    assert result['truncated'] is True and result['truncatedReason'] == 'max_bytes'
+    assert _names(result) == ['first', 'second']
+    assert result['imports'] == analyze_python_code(CODE, 'a.py')['imports']
+
+
+def test_parse_prefix_backs_off_to_a_statement_boundary():
+    cut = CODE.index('for item')
+    tree = _parse_prefix(CODE, cut, 'a.py')
+    assert [type(node).__name__ for node in tree.body] == ['Import', 'FunctionDef']
+    # A cut inside a multi-byte character is dropped rather than decoded half-way
+    code = 'x = 1\ny = "éé"\n'
+    tree = _parse_prefix(code, code.encode().index(b'\xc3') + 1, 'a.py')
+    assert ast.dump(tree) == ast.dump(ast.parse('x = 1\n'))
+
+
+def test_max_bytes_above_the_input_size_does_not_truncate():
+    result = analyze_python_code(CODE, 'a.py', budget=Budget(max_bytes=len(CODE)))
+    assert 'truncated' not in result
+    assert result == analyze_python_code(CODE, 'a.py')
+
+
+def test_max_nodes_keeps_functions_finished_before_the_limit():
+    full = analyze_python_code(CODE, 'a.py')
+    seen = sum(1 for _ in ast.walk(ast.parse(CODE)))
+    result = analyze_python_code(CODE, 'a.py', budget=Budget(max_nodes=seen // 2))
+    assert result['truncated'] is True and result['truncatedReason'] == 'max_nodes'
+    assert 0 < len(result['functions']) < len(full['functions'])
+    assert result['functions'] == full['functions'][:len(result['functions'])]
+
+
+def test_max_seconds_zero_stops_before_visiting():
+    result = analyze_python_code(CODE, 'a.py', budget=Budget(max_seconds=0))
+    assert result['truncated'] is True and result['truncatedReason'] == 'max_seconds'
+    assert result['functions'] == [] and result['summary']['totalFunctions'] == 0
+
+
+@pytest.mark.parametrize('budget', [
+    Budget(max_bytes=CODE.index('string literal')),
+    Budget(max_nodes=20),
+    Budget(max_seconds=0),
+], ids=['max_bytes', 'max_nodes', 'max_seconds'])
+def test_truncated_results_are_not_cached(cache, budget):
+    truncated = analyze_python_code_cached(CODE, 'a.py', cache, budget=budget)
+    assert truncated['truncated'] is True
+    assert cache.stats()['entries'] == 0
+
+    # The next unbounded call computes and stores the full result
+    full = analyze_python_code_cached(CODE, 'a.py', cache)
+    assert 'truncated' not in full
+    assert cache.stats()['entries'] == 1
+    assert analyze_python_code_cached(CODE, 'a.py', cache) == full
+    assert cache.stats()['hits'] == 1
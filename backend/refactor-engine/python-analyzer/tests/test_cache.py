@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+import subprocess
+
+from cache import ResultCache
+from conftest import ANALYZER_DIR
+
+
+def test_stats_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    writer, reader = ResultCache(path), ResultCache(path)
+    assert writer.get('k') is None
+    writer.put('k', {'ok': True})
+    assert reader.get('k') == {'ok': True}
+
+    stats = ResultCache(path).stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hitRate'] == 0.5
+    assert (reader.hits, reader.misses) == (1, 0)
+
+
+def test_clear_resets_counters(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    cache.get('k')
+    cache.clear()
+    assert cache.stats()['misses'] == 0
+
+
+def test_cache_stats_flag_reports_earlier_runs(tmp_path):
+    env = dict(os.environ, CODEX_CACHE_PATH=str(tmp_path / 'results.sqlite3'))
+    request = json.dumps({'code': 'def f(x):\n    return x\n', 'filename': 'a.py'})
+    for script in ('analyzer.py', 'refactor_suggester.py'):
+        for _ in range(2):
+            subprocess.run([sys.executable, script, '--cache'], input=request, text=True,
+                           cwd=ANALYZER_DIR, env=env, check=True, capture_output=True)
+
+    for script in ('analyzer.py', 'refactor_suggester.py'):
+        output = subprocess.run([sys.executable, script, '--cache-stats'], text=True,
+                                cwd=ANALYZER_DIR, env=env, check=True, capture_output=True).stdout
+        stats = json.loads(output)
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 2, 2)
@@ -0,0 +1,117 @@
+import ast
+import textwrap
+
+from clones import CloneIndex, clone_smells, clone_summary, subtree_digests, unit_hashes
+
+TOTAL = textwrap.dedent('''
+    def total(items, rate):
+        result = 0
+        for item in items:
+            if item.price > 100:
+                result += item.price * rate
+            else:
+                result += item.price
+        return round(result, 2)
+''')
+
+# Same shape, every identifier and literal changed
+RENAMED = textwrap.dedent('''
+    def cost(rows, factor):
+        acc = 0
+        for row in rows:
+            if row.amount > 250:
+                acc += row.amount * factor
+            else:
+                acc += row.amount
+        return round(acc, 4)
+''')
+
+
+def groups_of(files, **options):
+    index = CloneIndex()
+    for path, code in files.items():
+        index.add(path, unit_hashes(ast.parse(code), **options))
+    return index.groups()
+
+
+def test_identical_functions_are_an_exact_group():
+    groups = groups_of({'a.py': TOTAL, 'b.py': TOTAL.replace('def total', 'def other')})
+    assert [(group['kind'], group['unit']) for group in groups] == [('exact', 'function')]
+    # The function name doesn't make it a different clone
+    assert [(loc['path'], loc['name'], loc['start']) for loc in groups[0]['locations']] == [
+        ('a.py', 'total', 2), ('b.py', 'other', 2)]
+
+
+def test_renamed_function_is_a_near_group_with_variants():
+    groups = groups_of({'a.py': TOTAL, 'b.py': RENAMED, 'c.py': TOTAL})
+    assert len(groups) == 1
+    group = groups[0]
+    assert group['kind'] == 'near'
+    assert {loc['path']: loc['variant'] for loc in group['locations']} == {'a.py': 0, 'b.py': 1, 'c.py': 0}
+    # The exact copies are already a variant of the near group, not a second group
+    assert clone_summary(groups) == {'groups': 1, 'exactGroups': 0, 'nearGroups': 1, 'duplicatedLines': 16}
+
+
+def test_exact_mode_does_not_match_renamed_code():
+    assert groups_of({'a.py': TOTAL, 'b.py': RENAMED}, abstract=False) == []
+    units = unit_hashes(ast.parse(TOTAL), abstract=False)
+    assert units and all(unit[1] == '' for unit in units)
+
+
+def test_digests_ignore_identifiers_only_when_abstract():
+    (first_root,), (second_root,) = ast.parse(TOTAL).body, ast.parse(RENAMED).body
+    first = subtree_digests(first_root)[id(first_root.body[1])]
+    second = subtree_digests(second_root)[id(second_root.body[1])]
+    # The for loops: different names and literals, same shape and size
+    assert first[0] != second[0] and first[1:] == second[1:]
+
+
+def test_blocks_inside_a_cloned_function_are_not_reported_again():
+    groups = groups_of({'a.py': TOTAL, 'b.py': TOTAL}, min_lines=2, min_nodes=10)
+    # The for-loop body and the if-branch are clones too, but only as part of the function
+    assert [group['unit'] for group in groups] == ['function']
+
+
+def test_a_block_cloned_on_its_own_is_reported():
+    host = textwrap.dedent('''
+        def unrelated(flag, rate):
+            if flag:
+                print('setting up')
+            ITEMS = [1, 2, 3]
+            result = 0
+            for item in ITEMS:
+                if item.price > 100:
+                    result += item.price * rate
+                else:
+                    result += item.price
+            return result
+    ''')
+    groups = groups_of({'a.py': TOTAL, 'b.py': host}, min_lines=4, min_nodes=20)
+    assert [(group['kind'], group['unit']) for group in groups] == [('exact', 'block')]
+    assert [loc['start'] for loc in groups[0]['locations']] == [5, 8]
+
+
+def test_units_below_the_size_cutoff_are_ignored():
+    small = 'def f(x):\n    y = x + 1\n    return y\n'
+    assert groups_of({'a.py': small, 'b.py': small}) == []
+    assert groups_of({'a.py': TOTAL, 'b.py': TOTAL}, min_lines=20) == []
+    assert groups_of({'a.py': TOTAL, 'b.py': TOTAL}, min_nodes=10_000) == []
+
+
+def test_clone_smells_point_at_the_other_copies():
+    groups = groups_of({'a.py': TOTAL, 'b.py': TOTAL})
+    smells = clone_smells(groups)
+    assert smells['a.py'] == [('total', ('duplicate_code', 'medium', 2, ('b.py:2',)))]
+    assert smells['b.py'] == [('total', ('duplicate_code', 'medium', 2, ('a.py:2',)))]
+
+
+def test_scan_lists_duplicates_without_changing_the_scores(tmp_path):
+    from scan import clone_options, scan_repository
+    (tmp_path / 'a.py').write_text(TOTAL)
+    (tmp_path / 'b.py').write_text(TOTAL)
+    plain = scan_repository(str(tmp_path), jobs=1)
+    with_clones = scan_repository(str(tmp_path), jobs=1, clones=clone_options())
+
+    assert with_clones['summary'] == plain['summary']
+    assert [entry['duplicates'][0]['type'] for entry in with_clones['files']] == ['duplicate_code'] * 2
+    assert with_clones['clones']['summary']['exactGroups'] == 1
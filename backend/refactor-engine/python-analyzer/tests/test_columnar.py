@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+import columnar
+from analyzer import analyze_python_code
+from columnar import FunctionColumns, file_metrics, score_files, summarize
+
+SOURCES = [
+    'def f(a, b, c, d, e, f):\n' + ''.join(f'    x{i} = {i} * 42\n' for i in range(60)),
+    'def g(x):\n    if x:\n        for i in x:\n            while i:\n                if i > 3:\n'
+    '                    i -= 1\n    return x\n\nasync def h():\n    pass\n',
+    'x = 1\n',
+    'class A:\n    def m(self):\n        try:\n            return 1\n        except Exception:\n            pass\n',
+]
+
+
+def _own_sources():
+    directory = os.path.dirname(os.path.abspath(columnar.__file__))
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                yield name, f.read()
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def backend(request, monkeypatch):
+    if request.param == 'pure':
+        monkeypatch.setattr(columnar, 'np', None)
+    elif columnar.np is None:
+        pytest.skip('NumPy not installed')
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_file_metrics_match_the_analyzer(backend, compact):
+    sources = [(f'f{i}.py', code) for i, code in enumerate(SOURCES)] + list(_own_sources())
+    results = [analyze_python_code(code, name, compact=compact) for name, code in sources]
+    columns = FunctionColumns.from_results(results)
+    for result, metrics in zip(results, file_metrics(columns)):
+        assert metrics['qualityScore'] == result['qualityScore']
+        assert metrics['toxicity'] == result['toxicity']
+        assert metrics['maintainabilityIndex'] == result['maintainabilityIndex']
+        assert metrics['totalSmells'] == result['totalSmells']
+        assert metrics['averageComplexity'] == result['summary']['averageComplexity']
+        assert metrics['totalFunctions'] == result['summary']['totalFunctions']
+
+
+def test_repo_summary_from_columns_matches_per_file_results(backend):
+    sources = list(_own_sources())
+    results = [analyze_python_code(code, name, compact=True) for name, code in sources]
+    from_results = [{
+        'path': name,
+        'qualityScore': result['qualityScore'],
+        'complexity': result['summary']['averageComplexity'],
+        'toxicity': result['toxicity'],
+        'totalSmells': result['totalSmells'],
+        'functions': result['summary']['totalFunctions'],
+        'lines': code.count('\n') + 1
+    } for (name, code), result in zip(sources, results)]
+
+    columns = FunctionColumns.from_results(results)
+    from_columns = score_files(columns, [{'path': name, 'lines': code.count('\n') + 1} for name, code in sources])
+    assert summarize(from_columns, 5) == summarize(from_results, 5)
+
+
+def test_summarize_matches_the_node_route_formulas():
+    files = [
+        {'path': 'a.py', 'qualityScore': 40, 'complexity': 3.5, 'toxicity': 30, 'totalSmells': 7, 'functions': 2, 'lines': 100},
+        {'path': 'b.py', 'qualityScore': 91, 'complexity': 1.0, 'toxicity': 5, 'totalSmells': 1, 'functions': 4, 'lines': 300},
+    ]
+    summary, ranked, worst = summarize(files, top=1)
+    assert summary['averageQualityScore'] == 66  # Math.round(65.5)
+    assert summary['averageComplexity'] == 1.8   # (3.5*2 + 1*4) / 6
+    assert summary['smellDensity'] == 20.0
+    assert summary['criticalFiles'] == 1
+    assert summary['technicalDebtHours'] == 6    # 8 smells * 45 min
+    assert [f['path'] for f in ranked] == ['a.py', 'b.py'] and worst == ranked[:1]
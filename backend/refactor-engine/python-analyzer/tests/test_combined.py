@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import ANALYZER_DIR
+
+CODE = 'def f(x):\n    if x:\n        return 1\n    return 2\n\n\ndef g(y):\n    return [i for i in range(y) if i % 2]\n'
+
+
+def _ask_worker(args, requests):
+    worker = subprocess.run(
+        [sys.executable, os.path.join(ANALYZER_DIR, 'combined.py'), '--serve', *args],
+        input=''.join(json.dumps(request) + '\n' for request in requests),
+        capture_output=True, text=True, check=True
+    )
+    return [json.loads(line) for line in worker.stdout.splitlines()]
+
+
+def test_analysis_budget_applies_to_combined_requests():
+    from analyzer import Budget, analyze_python_code
+    both, analyze = _ask_worker(['--max-nodes', '5', '--rank-seconds', '1'], [
+        {'id': 1, 'code': CODE, 'filename': 'a.py'},
+        {'id': 2, 'tool': 'analyze', 'code': CODE, 'filename': 'a.py'},
+    ])
+    expected = analyze_python_code(CODE, 'a.py', budget=Budget(max_nodes=5))
+    assert expected['truncated'] and expected['truncatedReason'] == 'max_nodes'
+    assert both['result']['analysis'] == expected
+    assert analyze['result'] == expected
+    assert 'refactoring' in both['result']
+
+
+def test_unbudgeted_combined_analysis_matches_analyzer():
+    from analyzer import analyze_python_code
+    (both,) = _ask_worker([], [{'id': 1, 'code': CODE, 'filename': 'a.py'}])
+    assert both['result']['analysis'] == analyze_python_code(CODE, 'a.py')
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork-server needs os.fork')
+def test_isolated_combined_worker_routes_tools():
+    from refactor_suggester import suggest_refactoring
+    (suggest,) = _ask_worker(['--isolate', '--rank-seconds', '5'], [
+        {'id': 1, 'tool': 'suggest', 'code': CODE, 'filename': 'a.py'}
+    ])
+    assert suggest['id'] == 1
+    assert suggest['result'] == suggest_refactoring(CODE, 'a.py', max_seconds=5)
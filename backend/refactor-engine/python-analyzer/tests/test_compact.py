@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from analyzer import analyze_python_code, expand_compact
+from benchmarks.generators import (
+    generate_deep_nesting, generate_long_function, generate_magic_numbers, generate_nested_functions
+)
+
+SMELLY = '''import math
+
+
+def many(a, b, c, d, e, f, g):
+    return a * 3.5 + b * 42 + c * 1000 + d * 7 + e + f + g
+
+
+async def fetch(session, url):
+    async with session.get(url) as response:
+        return await response.json()
+
+
+class Shape:
+    def area(self, kind, size):
+        if kind == 'circle':
+            return math.pi * size ** 2
+        elif kind == 'square':
+            return size * size
+        elif kind == 'triangle':
+            return size * size / 2
+        elif kind == 'hexagon':
+            return 2.598 * size * size
+        return 0
+'''
+
+SOURCES = {
+    'smelly.py': SMELLY,
+    'empty.py': '',
+    'nested.py': generate_nested_functions(3, 2),
+    'deep.py': generate_deep_nesting(7),
+    'long.py': generate_long_function(120),
+    'magic.py': generate_magic_numbers(5, 6),
+}
+
+
+def _wire(result):
+    """What a client decodes: tuples become lists"""
+    return json.loads(json.dumps(result))
+
+
+@pytest.mark.parametrize('filename', sorted(SOURCES))
+def test_expanded_compact_result_equals_the_full_result(filename):
+    code = SOURCES[filename]
+    full = analyze_python_code(code, filename)
+    compact = analyze_python_code(code, filename, compact=True)
+    assert compact['format'] == 'compact'
+    assert _wire(expand_compact(_wire(compact))) == _wire(full)
+
+
+def test_round_trip_covers_every_smell_type():
+    smells = set()
+    for filename, code in SOURCES.items():
+        for func in analyze_python_code(code, filename)['functions']:
+            smells.update(smell['type'] for smell in func['smells'])
+    assert smells >= {'too_many_parameters', 'magic_numbers', 'deep_nesting', 'long_function',
+                      'high_complexity', 'missing_error_handling'}
+
+
+def test_verbose_results_pass_through_unchanged():
+    full = analyze_python_code(SMELLY, 'smelly.py')
+    assert expand_compact(full) is full
@@ -0,0 +1,185 @@
+import ast
+import textwrap
+
+from dataflow import DefUseIndex, _exposed_uses, _collect, _must_defs
+
+
+def _function(source, name=None):
+    tree = ast.parse(textwrap.dedent(source))
+    return next(node for node in ast.walk(tree)
+                if isinstance(node, ast.FunctionDef) and (name is None or node.name == name))
+
+
+def _index(source, name=None, closure=()):
+    return DefUseIndex(_function(source, name), closure)
+
+
+def _stmt(source):
+    return ast.parse(textwrap.dedent(source)).body[0]
+
+
+def test_read_then_rebind_is_both_input_and_output():
+    index = _index('''
+        def f(x):
+            x = x + 1
+            y = x * 2
+            return y
+    ''')
+    assert index.inputs(0, 0) == ['x']
+    assert index.outputs(0, 0) == ['x']
+    # Rebound in the range before the later read: only the last binding flows out
+    assert index.inputs(0, 1) == ['x'] and index.outputs(0, 1) == ['y']
+
+
+def test_augmented_assignment_reads_its_target():
+    stmt = _stmt('total += step')
+    assert _exposed_uses(stmt, _collect([stmt])) == {'total', 'step'}
+    assert _must_defs(stmt) == {'total'}
+
+
+def test_definition_in_one_branch_does_not_kill_the_earlier_value():
+    index = _index('''
+        def f(a):
+            y = 0
+            if a:
+                y = 1
+            return y
+    ''')
+    assert _must_defs(index.body[1]) == set()
+    assert index.outputs(0, 0) == ['y']
+    assert index.outputs(1, 1) == ['y']
+    assert index.inputs(1, 2) == ['a', 'y']
+
+
+def test_definition_in_every_branch_is_a_must_def():
+    stmt = _stmt('''
+        if a:
+            y = 1
+        else:
+            y, z = 2, 3
+    ''')
+    assert _must_defs(stmt) == {'y'}
+    assert _must_defs(_stmt('try:\n    t = 1\nexcept E:\n    pass\nfinally:\n    u = 2')) == {'u'}
+
+
+def test_loop_carried_variable_is_input_and_output_but_target_is_not():
+    index = _index('''
+        def f(items):
+            total = 0
+            for item in items:
+                total = total + item
+            return total
+    ''')
+    assert _exposed_uses(index.body[1], _collect([index.body[1]])) == {'items', 'total'}
+    assert _must_defs(index.body[1]) == set()
+    assert index.inputs(1, 1) == ['items', 'total']
+    assert index.outputs(1, 1) == ['total']
+    # The loop may not run, so the initial value still reaches the return
+    assert index.outputs(0, 0) == ['total']
+
+
+def test_while_loop_reads_the_variable_it_updates():
+    index = _index('''
+        def f(n):
+            steps = 0
+            while n > 1:
+                n = n // 2
+                steps += 1
+            return steps
+    ''')
+    assert index.inputs(1, 1) == ['n', 'steps']
+    assert index.outputs(1, 1) == ['steps']
+
+
+def test_with_as_binds_before_the_body_reads():
+    index = _index('''
+        def f(path):
+            with open(path) as fh:
+                data = fh.read()
+            return data
+    ''')
+    assert _must_defs(index.body[0]) == {'fh', 'data'}
+    assert _exposed_uses(index.body[0], _collect([index.body[0]])) == {'open', 'path'}
+    assert index.inputs(0, 0) == ['path']
+    assert index.outputs(0, 0) == ['data']
+
+
+def test_comprehension_variables_stay_in_the_comprehension_scope():
+    index = _index('''
+        def f(rows, k):
+            i = 10
+            out = [i * k for i in rows if i]
+            pairs = {x: y for x in rows for y in x}
+            return out, pairs, i
+    ''')
+    assert index.exposed[1] == {'rows', 'k'}
+    assert index.defs[1] == {'out'}
+    assert index.exposed[2] == {'rows'}
+    assert index.inputs(1, 2) == ['rows', 'k']
+    # The comprehension's i does not rebind the local one
+    assert index.outputs(0, 0) == ['i']
+
+
+def test_closure_reads_are_inputs_and_nested_returns_do_not_escape():
+    index = _index('''
+        def f(a):
+            b = a * 2
+            def g():
+                return b + c
+            h = lambda q: q + a
+            return g, h
+    ''')
+    assert index.exposed[1] == {'b', 'c'}
+    assert index.exposed[2] == {'a'}
+    # c is never bound here, so it is a global, not a parameter of the extracted block
+    assert index.inputs(1, 2) == ['a', 'b']
+    assert index.outputs(1, 2) == ['g', 'h']
+    assert not index.escapes(1, 2)
+    assert index.escapes(3, 3)
+
+
+def test_enclosing_function_locals_are_closure_inputs():
+    source = '''
+        def outer():
+            scale = 3
+            def inner(v):
+                w = v * scale
+                return w
+            return inner
+    '''
+    outer = _index(source, 'outer')
+    inner = _index(source, 'inner', closure=outer.locals)
+    assert inner.closure == {'scale', 'inner'}
+    assert inner.inputs(0, 0) == ['v', 'scale']
+    assert inner.outputs(0, 0) == ['w']
+
+
+def test_global_names_are_never_inputs_or_outputs():
+    index = _index('''
+        def f():
+            global counter
+            counter = counter + 1
+            total = counter
+            return total
+    ''')
+    assert 'counter' not in index.locals
+    assert index.inputs(1, 1) == []
+    assert index.outputs(1, 1) == []
+    assert index.outputs(2, 2) == ['total']
+
+
+def test_nonlocal_names_are_closure_inputs_but_not_outputs():
+    index = _index('''
+        def outer():
+            hits = 0
+            def f():
+                nonlocal hits
+                hits += 1
+                seen = hits
+                return seen
+            return f
+    ''', 'f')
+    assert index.closure == {'hits'}
+    assert index.inputs(1, 2) == ['hits']
+    assert index.outputs(1, 1) == []
+    assert index.outputs(1, 2) == ['seen']
@@ -0,0 +1,122 @@
+import ast
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from benchmarks.generators import generate_long_module
+from edits import EditBuffer, apply_edits, base_hash, make_edit, unified_diff
+from refactor_applier import apply_suggestions
+from refactor_suggester import suggest_refactoring
+
+
+def random_case(rng, tag):
+    """(lines, non-overlapping edits) over a short file with blank lines and maybe no final newline"""
+    count = rng.randint(0, 12)
+    code = '\n'.join(f'l{i}' if rng.random() < .8 else '' for i in range(count))
+    if rng.random() < .5:
+        code += '\n'
+    lines = code.split('\n')
+    edits = []
+    position = 1
+    while position <= len(lines) + 1 and rng.random() < .7:
+        start = rng.randint(position, len(lines) + 1)
+        end = rng.randint(start - 1, min(len(lines), start + 2))
+        edits.append(make_edit(start, end, [rng.choice(['x', '', f'y{tag}']) for _ in range(rng.randint(0, 3))]))
+        position = max(end, start - 1) + 2
+    return lines, edits
+
+
+@pytest.mark.skipif(shutil.which('patch') is None, reason='GNU patch not installed')
+def test_unified_diff_matches_gnu_patch(tmp_path):
+    rng = random.Random(7)
+    target = tmp_path / 'file.py'
+    for trial in range(1500):
+        lines, edits = random_case(rng, trial)
+        target.write_text('\n'.join(lines))
+        diff = unified_diff(lines, edits, context=rng.randint(0, 3))
+        if diff:
+            # -F0: every context line must match, so a wrong hunk can't apply by fuzz
+            subprocess.run(['patch', '-s', '-p1', '-F0', '-d', str(tmp_path)],
+                           input=diff.encode(), check=True, capture_output=True)
+        assert target.read_text() == '\n'.join(apply_edits(lines, edits)), (lines, edits, diff)
+
+
+def test_edit_buffer_matches_apply_edits_in_any_order():
+    rng = random.Random(11)
+    for trial in range(500):
+        lines, edits = random_case(rng, trial)
+        buffer = EditBuffer(lines)
+        shuffled = list(enumerate(edits))
+        rng.shuffle(shuffled)
+        for tag, edit in shuffled:
+            assert buffer.add(tag, [edit])
+        assert buffer.lines()[0] == apply_edits(lines, edits)
+
+
+def test_edit_buffer_refuses_overlaps_as_a_unit():
+    buffer = EditBuffer(['a', 'b', 'c', 'd', 'e'])
+    assert buffer.add('first', [make_edit(2, 3, ['B'])])
+    # The insertion would be fine, the replacement overlaps 'first' - neither is queued
+    assert not buffer.add('second', [make_edit(1, 0, ['top']), make_edit(3, 4, ['C'])])
+    assert not buffer.add('self', [make_edit(4, 5, ['x']), make_edit(5, 5, ['y'])])
+    # Insertions at a boundary touch nothing
+    assert buffer.add('third', [make_edit(4, 3, ['between']), make_edit(6, 5, ['end'])])
+
+    lines, placed = buffer.lines()
+    assert lines == ['a', 'B', 'between', 'd', 'e', 'end']
+    assert [(tag, start) for tag, _, start in placed] == [('first', 2), ('third', 3), ('third', 6)]
+
+    buffer.remove('first')
+    assert buffer.lines()[0] == ['a', 'b', 'c', 'between', 'd', 'e', 'end']
+
+
+def suggestions_for(code, top=5):
+    result = suggest_refactoring(code, 'module.py', output='edits', top=top)
+    assert result['ok'] and result['suggestions']
+    return result
+
+
+def test_applies_every_suggestion_in_one_pass():
+    code = generate_long_module(6, 20)
+    suggested = suggestions_for(code)
+    applied = apply_suggestions(code, suggested['suggestions'], 'module.py', suggested['baseHash'])
+
+    assert applied['ok'] and applied['applied'] == len(suggested['suggestions'])
+    new_lines = applied['code'].split('\n')
+    tree = ast.parse(applied['code'])
+    defined = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    for result in applied['results']:
+        # Same extracted name from every function - later ones are renamed apart
+        assert defined.count(result['extractedName']) == 1
+        assert f"{result['extractedName']}(" in new_lines[result['callLine'] - 1]
+        assert new_lines[result['definitionLine'] - 1].startswith(f"def {result['extractedName']}(")
+    assert sum('renamedFrom' in result for result in applied['results']) == len(applied['results']) - 1
+
+
+def test_single_suggestion_matches_apply_edits():
+    code = generate_long_module(2, 20)
+    suggestion = suggestions_for(code, top=1)['suggestions'][0]
+    applied = apply_suggestions(code, [suggestion])
+    assert applied['code'] == '\n'.join(apply_edits(code.split('\n'), suggestion['edits']))
+
+
+def test_overlapping_invalid_and_missing_edits():
+    code = generate_long_module(3, 20)
+    first, second = suggestions_for(code, top=2)['suggestions']
+    broken = dict(second, edits=[dict(second['edits'][0], lines=['    x = (']), second['edits'][1]])
+    applied = apply_suggestions(code, [first, dict(first), broken, {'function': 'f'}])
+
+    assert [result['status'] for result in applied['results']] == ['applied', 'overlap', 'invalid', 'no_edits']
+    assert applied['applied'] == 1
+    assert applied['code'] == apply_suggestions(code, [first])['code']
+
+
+def test_refuses_a_stale_base():
+    code = generate_long_module(2, 20)
+    suggested = suggestions_for(code, top=1)
+    applied = apply_suggestions(code + '\n# edited\n', suggested['suggestions'], expected_hash=suggested['baseHash'])
+    assert applied == {'ok': False, 'error': 'stale_base',
+                       'details': 'suggestions were computed for a different version of the code'}
+    assert suggested['baseHash'] == base_hash(code)
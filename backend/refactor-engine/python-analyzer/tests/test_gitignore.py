@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from scan import GitIgnore, _walk_files
+
+
+def _rules(tmp_path, text, base=''):
+    path = tmp_path / '.gitignore'
+    path.write_text(text)
+    ignore = GitIgnore()
+    ignore.add_file(str(path), base)
+    return ignore
+
+
+@pytest.mark.parametrize('pattern, path, is_dir, expected', [
+    ('**/build', 'build', True, True),
+    ('**/build', 'src/deep/build', True, True),
+    ('**/build', 'rebuild', True, False),
+    ('a/**/b', 'a/b', False, True),
+    ('a/**/b', 'a/x/y/b', False, True),
+    ('a/**/b', 'xa/b', False, False),
+    ('a/**', 'a/x/y.py', False, True),
+    ('a/**', 'a', True, False),
+    ('*.pyc', 'pkg/mod.pyc', False, True),
+    ('src/*.py', 'src/sub/mod.py', False, False),
+    ('file?.py', 'file1.py', False, True),
+    ('a?b', 'a/b', False, False),
+    ('[!a]*.py', 'b.py', False, True),
+    ('[!a]*.py', 'a.py', False, False),
+    ('[ab].py', 'b.py', False, True),
+    ('\\#notes', '#notes', False, True),
+    ('/top.py', 'top.py', False, True),
+    ('/top.py', 'sub/top.py', False, False),
+    ('logs/', 'logs', True, True),
+    ('logs/', 'logs', False, False),
+])
+def test_patterns(tmp_path, pattern, path, is_dir, expected):
+    assert _rules(tmp_path, pattern + '\n').ignored(path, is_dir) is expected
+
+
+def test_negation_and_nested_base(tmp_path):
+    ignore = _rules(tmp_path, '*.py\n!keep.py\n', base='pkg')
+    assert ignore.ignored('pkg/drop.py', False)
+    assert not ignore.ignored('pkg/keep.py', False)
+    assert not ignore.ignored('other/drop.py', False)
+
+
+def test_walk_skips_directories_ignored_with_leading_double_star(tmp_path):
+    (tmp_path / '.gitignore').write_text('**/build\n')
+    for rel in ('main.py', 'build/gen.py', 'src/build/gen.py', 'src/app.py'):
+        target = tmp_path / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text('x = 1\n')
+    assert sorted(_walk_files(str(tmp_path))) == ['.gitignore', 'main.py', 'src/app.py']
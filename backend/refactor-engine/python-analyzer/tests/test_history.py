@@ -0,0 +1,75 @@
+import os
+import subprocess
+
+import pytest
+
+from analyzer import analyze_python_code
+from history import analyze_history, list_file_commits
+
+V1 = 'def f(x):\n    return x\n'
+V2 = 'def f(x):\n    if x:\n        if x > 1:\n            if x > 2:\n                return 3\n    return x\n'
+OTHER = 'def g(y):\n    return y * 2\n'
+
+
+@pytest.fixture
+def repo(tmp_path):
+    env = dict(os.environ, GIT_AUTHOR_NAME='Dev', GIT_AUTHOR_EMAIL='dev@example.com',
+               GIT_COMMITTER_NAME='Dev', GIT_COMMITTER_EMAIL='dev@example.com')
+    tick = iter(range(1_700_000_000, 1_800_000_000, 3600))
+
+    def git(*args):
+        stamp = f'@{next(tick)} +0000'
+        subprocess.run(['git', '-C', str(tmp_path), *args], check=True, capture_output=True,
+                       env=dict(env, GIT_AUTHOR_DATE=stamp, GIT_COMMITTER_DATE=stamp))
+
+    def commit(message, files):
+        for name, content in files.items():
+            if content is None:
+                git('rm', '-q', name)
+            else:
+                (tmp_path / name).write_text(content)
+                git('add', name)
+        git('commit', '-q', '-m', message)
+
+    git('init', '-q')
+    commit('add', {'mod.py': V1, 'other.py': OTHER})
+    commit('complicate', {'mod.py': V2})
+    commit('empty it', {'mod.py': ''})
+    commit('delete', {'mod.py': None})
+    # other.py renamed onto mod.py
+    git('mv', 'other.py', 'mod.py')
+    git('commit', '-q', '-m', 'rename other into mod')
+    commit('restore', {'mod.py': V1})
+    return str(tmp_path)
+
+
+def test_deleted_empty_and_renamed_revisions(repo):
+    commits = list_file_commits(repo, 'mod.py', max_commits=20)
+    # The deletion leaves no blob behind
+    assert [commit['message'] for commit in commits] == ['restore', 'rename other into mod', 'empty it',
+                                                        'complicate', 'add']
+
+    result = analyze_history(repo, 'mod.py', max_commits=20, jobs=1)
+    timeline = result['timeline']
+    # The empty revision is skipped instead of scoring a perfect 100
+    assert [point['message'] for point in timeline] == ['restore', 'rename other into mod', 'complicate', 'add']
+    scores = {point['message']: point['score'] for point in timeline}
+    assert scores['complicate'] == analyze_python_code(V2)['qualityScore'] < 100
+    assert scores['rename other into mod'] == analyze_python_code(OTHER)['qualityScore']
+    assert scores['add'] == scores['restore']
+    # Identical blobs are analyzed once
+    assert result['distinctRevisions'] == 3
+    assert result['owner'] is None
+    assert result['repo'] == os.path.basename(repo)
+    assert result['insights']['totalCommits'] == 4
+    assert result['insights']['worstScore'] == scores['complicate']
+
+
+def test_rejects_non_python_files(repo):
+    with pytest.raises(ValueError, match='Only Python files.*/analyze-history'):
+        analyze_history(repo, 'src/app.js')
+
+
+def test_unknown_file(repo):
+    with pytest.raises(ValueError, match='No commits found'):
+        analyze_history(repo, 'missing.py')
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import inspect
+import textwrap
+import subprocess
+
+import pytest
+
+import incremental
+from analyzer import Budget, analyze_python_code
+from cache import ResultCache
+from conftest import ANALYZER_DIR
+from incremental import AnalysisSession, analyze_incremental_cached
+
+BASE = textwrap.dedent('''
+    import os
+
+    def load(path, retries=3):
+        for attempt in range(retries):
+            if os.path.exists(path):
+                with open(path) as f:
+                    return f.read()
+        return None
+
+    class Store:
+        def __init__(self):
+            self.items = {}
+
+        def put(self, key, value):
+            if key in self.items:
+                if value is None:
+                    del self.items[key]
+                else:
+                    self.items[key] = value
+            return value
+
+    def outer(x):
+        def inner(y):
+            return y * 42
+        return inner(x) + 7
+''')
+
+REVISIONS = [
+    BASE,
+    # Body edit in one function
+    BASE.replace('return y * 42', 'return y * 43 if y else 0'),
+    # Comment-only change plus every later function shifted down
+    BASE.replace('import os\n', 'import os\n# storage helpers\n\n'),
+    # Function removed
+    BASE.replace('    def put(self, key, value):', '    def _put(self, key, value):'),
+    # Function added at the top and an existing one indented differently
+    'def first():\n    pass\n' + BASE,
+    BASE,
+]
+
+
+def test_revisions_match_full_analysis():
+    session = AnalysisSession()
+    for compact in (False, True):
+        for code in REVISIONS:
+            assert session.analyze(code, 'store.py', compact) == analyze_python_code(code, 'store.py', compact)
+
+
+def test_real_modules_match_full_analysis():
+    session = AnalysisSession()
+    source = inspect.getsource(textwrap)
+    edited = source.replace('    def _split(self, text):', '    def _split(self, text):\n        text = text or ""', 1)
+    for code in (source, edited, source.replace('\n\n', '\n\n\n')):
+        assert session.analyze(code, 'textwrap.py') == analyze_python_code(code, 'textwrap.py')
+    assert session.last_stats['reused'] > 0
+
+
+def test_unchanged_functions_are_replayed():
+    session = AnalysisSession()
+    session.analyze(REVISIONS[0], 'store.py')
+    session.analyze(REVISIONS[1], 'store.py')
+    # outer changed (inner is inside it); load, __init__ and put were replayed
+    assert session.last_stats == {'reused': 3, 'analyzed': 2}
+
+
+def test_truncated_revision_keeps_finished_functions():
+    session = AnalysisSession()
+    truncated = session.analyze(BASE, 'store.py', budget=Budget(max_nodes=60))
+    assert truncated['truncated'] is True and truncated['truncatedReason'] == 'max_nodes'
+    assert [func['name'] for func in truncated['functions']] == ['load', '__init__']
+
+    assert session.analyze(BASE, 'store.py') == analyze_python_code(BASE, 'store.py')
+    assert session.last_stats['reused'] == 2
+
+
+def test_max_bytes_falls_back_to_prefix_analysis():
+    budget = Budget(max_bytes=60)
+    result = AnalysisSession().analyze(BASE, 'store.py', budget=budget)
+    assert result == analyze_python_code(BASE, 'store.py', budget=Budget(max_bytes=60))
+    assert result['truncatedReason'] == 'max_bytes'
+
+
+def test_cached_shares_entries_with_full_analysis(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    monkeypatch.setattr(incremental, '_sessions', type(incremental._sessions)())
+    first = analyze_incremental_cached(BASE, 'store.py', cache)
+    assert first == analyze_python_code(BASE, 'store.py')
+    assert analyze_incremental_cached(BASE, 'store.py', cache) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cli_incremental_keeps_cache_and_budget(tmp_path):
+    env = dict(os.environ, CODEX_CACHE_PATH=str(tmp_path / 'results.sqlite3'))
+    requests = ''.join(json.dumps({'id': i, 'code': code, 'filename': 'store.py'}) + '\n'
+                       for i, code in enumerate([BASE, BASE]))
+    output = subprocess.run(
+        [sys.executable, 'analyzer.py', '--serve', '--incremental', '--cache', '--max-nodes', '5'],
+        input=requests, text=True, cwd=ANALYZER_DIR, env=env, check=True, capture_output=True
+    ).stdout
+    responses = [json.loads(line) for line in output.splitlines()]
+    assert all(response['result']['truncatedReason'] == 'max_nodes' for response in responses)
+    # Truncated results are never cached
+    assert ResultCache(env['CODEX_CACHE_PATH']).stats()['entries'] == 0
+
+    output = subprocess.run(
+        [sys.executable, 'analyzer.py', '--serve', '--incremental', '--cache'],
+        input=requests, text=True, cwd=ANALYZER_DIR, env=env, check=True, capture_output=True
+    ).stdout
+    assert json.loads(output.splitlines()[1])['result'] == analyze_python_code(BASE, 'store.py')
+    stats = ResultCache(env['CODEX_CACHE_PATH']).stats()
+    assert (stats['hits'], stats['entries']) == (1, 1)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sessions(monkeypatch):
+    monkeypatch.setattr(incremental, '_sessions', type(incremental._sessions)())
@@ -0,0 +1,79 @@
+import sys
+import json
+import subprocess
+
+import pytest
+
+from analyzer import analyze_python_code, stream_python_code
+from conftest import ANALYZER_DIR
+
+CODE = '''import os
+
+
+def first(x):
+    return x + 1
+
+
+class Box:
+    def method(self, items):
+        total = 0
+        for item in items:
+            if item:
+                if item > 1:
+                    total += item
+        return total
+
+    async def fetch(self):
+        def helper():
+            return os.getcwd()
+        return helper()
+'''
+
+
+def _analyzer(*args, stdin):
+    return subprocess.run([sys.executable, 'analyzer.py', *args], input=stdin, text=True,
+                          cwd=ANALYZER_DIR, capture_output=True)
+
+
+@pytest.mark.parametrize('compact', [False, True], ids=['full', 'compact'])
+def test_streamed_records_and_summary_match_the_batch_result(compact):
+    records = []
+    summary = stream_python_code(CODE, 'a.py', records.append, compact=compact)
+    expected = analyze_python_code(CODE, 'a.py', compact=compact)
+    functions = expected.pop('functions')
+    assert summary == expected
+    # Records come out as functions finish (inner ones first), so compare as a set
+    key = (lambda f: f['name']) if not compact else (lambda f: json.dumps(f))
+    assert sorted(records, key=key) == sorted(functions, key=key)
+
+
+def test_stream_cli_emits_function_records_then_the_summary():
+    request = json.dumps({'code': CODE, 'filename': 'a.py'})
+    lines = [json.loads(line) for line in _analyzer('--stream', stdin=request).stdout.splitlines()]
+    expected = analyze_python_code(CODE, 'a.py')
+    functions = expected.pop('functions')
+    assert [line['type'] for line in lines] == ['function'] * len(functions) + ['summary']
+    assert sorted((line['function'] for line in lines[:-1]), key=lambda f: f['name']) == \
+        sorted(functions, key=lambda f: f['name'])
+    assert lines[-1] == {'type': 'summary', **expected}
+
+
+def test_streaming_worker_sends_partials_then_the_result():
+    request = json.dumps({'id': 4, 'code': CODE, 'filename': 'a.py'}) + '\n'
+    lines = [json.loads(line) for line in _analyzer('--serve', '--stream', stdin=request).stdout.splitlines()]
+    expected = analyze_python_code(CODE, 'a.py')
+    functions = expected.pop('functions')
+    assert all(line == {'id': 4, 'partial': line['partial']} for line in lines[:-1])
+    assert len(lines) - 1 == len(functions)
+    assert lines[-1] == {'id': 4, 'result': expected}
+
+
+@pytest.mark.parametrize('flags', [
+    ['--cache'], ['--incremental'], ['--serve', '--isolate'], ['--max-bytes', '10'],
+    ['--max-nodes', '10'], ['--max-seconds', '1'], ['--timings'],
+], ids=lambda flags: ' '.join(flags))
+def test_stream_rejects_flags_it_cannot_honour(flags):
+    run = _analyzer('--stream', *flags, stdin='{}')
+    rejected = next(flag for flag in flags if flag != '--serve' and flag.startswith('--'))
+    assert run.returncode == 2
+    assert f"--stream can't be combined with {rejected}" in run.stderr
@@ -0,0 +1,22 @@
+import refactor_suggester
+from benchmarks.generators import generate_long_module
+from refactor_suggester import suggest_refactoring
+
+
+def test_library_default_is_unbounded(monkeypatch):
+    seen = []
+    real_budget = refactor_suggester.Budget
+
+    def spy(max_seconds=None, **kwargs):
+        seen.append(max_seconds)
+        return real_budget(max_seconds=max_seconds, **kwargs)
+
+    monkeypatch.setattr(refactor_suggester, 'Budget', spy)
+    result = suggest_refactoring(generate_long_module(20, 10), 'long.py')
+    assert seen == [None]
+    assert 'truncated' not in result
+
+
+def test_explicit_budget_truncates():
+    result = suggest_refactoring(generate_long_module(200, 10), 'long.py', max_seconds=0)
+    assert result['truncated'] is True
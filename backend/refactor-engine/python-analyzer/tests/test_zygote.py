@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import ANALYZER_DIR
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork-server needs os.fork')
+
+CODE = 'def f(x):\n    if x:\n        return 1\n    return 2\n'
+
+
+def _worker(*args):
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ANALYZER_DIR, 'analyzer.py'), '--serve', '--isolate', *args],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+
+
+def _ask(worker, request):
+    worker.stdin.write(json.dumps(request) + '\n')
+    worker.stdin.flush()
+    return json.loads(worker.stdout.readline())
+
+
+def test_isolated_request_matches_in_process_analysis():
+    from analyzer import analyze_python_code
+    worker = _worker()
+    try:
+        response = _ask(worker, {'id': 1, 'code': CODE, 'filename': 'a.py'})
+    finally:
+        worker.stdin.close()
+        worker.wait()
+    assert response == {'id': 1, 'result': analyze_python_code(CODE, 'a.py')}
+
+
+def test_metrics_include_phases_timed_in_forked_children():
+    worker = _worker('--timings')
+    try:
+        for request_id in (1, 2):
+            assert _ask(worker, {'id': request_id, 'code': CODE})['id'] == request_id
+        text = _ask(worker, {'id': 3, 'op': 'metrics'})['result']['text']
+    finally:
+        worker.stdin.close()
+        worker.wait()
+    assert 'codex_phase_duration_seconds_count{phase="visit",tool="analyze"' in text
+    assert 'codex_input_bytes_count{tool="analyze",pid="%d"} 2' % worker.pid in text
+
+
+def test_crashing_child_gets_an_error_envelope():
+    from zygote import _death_envelope
+    pid = os.fork()
+    if pid == 0:
+        os._exit(3)
+    _, status = os.waitpid(pid, 0)
+    envelope = _death_envelope(7, 'analyzer_error', status)
+    assert envelope['id'] == 7 and 'status 3' in envelope['details']
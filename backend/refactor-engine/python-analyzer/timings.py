@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-phase timing for analyzer.py and refactor_suggester.py
+Enable with --timings (or CODEX_TIMINGS=1). Each result then carries a `_timings` block,
+and process-wide histograms of phase latency, input size and AST node count are kept.
+Serve mode answers {"id": 1, "op": "metrics"} with those histograms in Prometheus text format.
+"""
+
+import os
+import ast
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get('CODEX_TIMINGS') == '1'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+NODE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+
+# metric name -> (help text, bucket upper bounds)
+METRICS = {
+    'codex_phase_duration_seconds': ('Time spent in each analysis phase', LATENCY_BUCKETS),
+    'codex_input_bytes': ('Size of analyzed source', BYTES_BUCKETS),
+    'codex_ast_nodes': ('AST node count of analyzed source', NODE_BUCKETS),
+}
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # Only the first bucket that fits is counted; render() makes them cumulative
+        index = bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+# (metric name, sorted label items) -> Histogram
+_histograms = {}
+# Observations also collected here while capturing (forked children ship them to the parent)
+_captured = None
+
+
+def capture():
+    """Collect every later observation in the returned list as well"""
+    global _captured
+    _captured = []
+    return _captured
+
+
+def record(observations):
+    """Replay [name, value, labels] observations captured in another process"""
+    for name, value, labels in observations:
+        observe(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if _captured is not None:
+        _captured.append((name, value, labels))
+    key = (name, tuple(sorted(labels.items())))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = Histogram(METRICS[name][1])
+    histogram.observe(value)
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}' if labels else ''
+
+
+def render_prometheus(**extra_labels):
+    """All histograms in Prometheus text exposition format"""
+    lines = []
+    for name, (help_text, _bounds) in METRICS.items():
+        series = sorted((labels, h) for (metric, labels), h in _histograms.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in series:
+            labels = labels + tuple(sorted((k, str(v)) for k, v in extra_labels.items()))
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+class PhaseTimer:
+    """Accumulates wall time per phase for one request"""
+
+    enabled = True
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish(self, result, code, tree=None):
+        """Record histograms and attach the `_timings` block to a dict result"""
+        for name, seconds in self.phases.items():
+            observe('codex_phase_duration_seconds', seconds, tool=self.tool, phase=name)
+        input_bytes = len(code.encode('utf-8', 'surrogatepass'))
+        observe('codex_input_bytes', input_bytes, tool=self.tool)
+
+        timings = {f'{_camel(name)}Ms': round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        timings['inputBytes'] = input_bytes
+        if tree is not None:
+            ast_nodes = sum(1 for _ in ast.walk(tree))
+            observe('codex_ast_nodes', ast_nodes, tool=self.tool)
+            timings['astNodes'] = ast_nodes
+
+        if isinstance(result, dict):
+            result['_timings'] = timings
+        return result
+
+
+class NullTimer:
+    """Stand-in when timings are off: no clock reads, nothing recorded"""
+
+    enabled = False
+
+    def phase(self, name):
+        return nullcontext()
+
+    def add(self, name, seconds):
+        pass
+
+    def finish(self, result, code, tree=None):
+        return result
+
+
+NULL_TIMER = NullTimer()
+
+
+def new_timer(tool):
+    return PhaseTimer(tool) if ENABLED else NULL_TIMER
+
+
+def observe_phase(tool, phase, seconds):
+    """Record a phase that happens outside the result (e.g. json.dumps in serve mode)"""
+    if ENABLED:
+        observe('codex_phase_duration_seconds', seconds, tool=tool, phase=phase)
+
+
+def _camel(name):
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Fork-server (zygote) mode - one forked, resource-limited child per request
+Usage: python zygote.py [--memory-mb 1024] [--cpu-seconds 30] [--max-children 4]
+       stdin:  {"id": 1, "tool": "analyze" | "suggest", "code": "...", "filename": "..."}
+       stdout: {"id": 1, "result": {...}}   (same envelopes as serve.py, in completion order)
+       python analyzer.py --serve --isolate   (same, for a single tool)
+The parent imports ast, json and the analyzer/suggester modules once; each request is
+handled in a fork of that warm process under RLIMIT_AS / RLIMIT_CPU, so a crafted file
+that exhausts memory, recursion or CPU kills only its own child. With timings enabled the
+child sends its histogram observations ahead of the response, and the parent records
+them so {"op": "metrics"} covers every request.
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import selectors
+from collections import deque
+
+import timings
+from serve import handle_request
+
+# Per-child limits; the env overrides also apply to `analyzer.py --serve --isolate`
+DEFAULT_MEMORY_MB = int(os.environ.get('CODEX_ISOLATE_MEMORY_MB', 1024))
+DEFAULT_CPU_SECONDS = int(os.environ.get('CODEX_ISOLATE_CPU_SECONDS', 30))
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _limit_child(memory_mb, cpu_seconds):
+    """Apply rlimits inside a freshly forked child"""
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        # SIGXCPU at the soft limit, SIGKILL one second later
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _death_envelope(request_id, error_code, status):
+    """Error envelope for a child that exited without answering"""
+    if os.WIFSIGNALED(status):
+        number = os.WTERMSIG(status)
+        try:
+            name = signal.Signals(number).name
+        except ValueError:
+            name = f'signal {number}'
+        details = f'isolated worker killed by {name} (resource limit or crash)'
+    else:
+        details = f'isolated worker exited with status {os.WEXITSTATUS(status)}'
+    return {
+        'id': request_id,
+        'error': error_code,
+        'details': details
+    }
+
+
+def serve_forked(handlers, error_code, default_tool=None, memory_mb=DEFAULT_MEMORY_MB,
+                 cpu_seconds=DEFAULT_CPU_SECONDS, max_children=None, stdin=None, stdout=None):
+    """Like serve.serve, but every request runs in its own rlimited fork of this process.
+    handlers maps a request's "tool" to handler(code, filename)."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    max_children = max_children or os.cpu_count() or 1
+    if default_tool:
+        # handle_request treats the first handler as the default tool
+        handlers = {default_tool: handlers[default_tool], **handlers}
+
+    selector = selectors.DefaultSelector()
+    stdin_fd = stdin.fileno()
+    selector.register(stdin_fd, selectors.EVENT_READ)
+
+    queued = deque()
+    # read fd -> [pid, request id, response chunks]
+    children = {}
+    buffered = b''
+    eof = False
+
+    def write(message):
+        stdout.write(json.dumps(message) + '\n')
+        stdout.flush()
+
+    def start_child(request):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Child: never return into the parent's loop
+            status = 0
+            try:
+                os.close(read_fd)
+                for fd in children:
+                    os.close(fd)
+                _limit_child(memory_mb, cpu_seconds)
+                observations = timings.capture() if timings.ENABLED else None
+                response = json.dumps(handle_request(request, handlers, error_code))
+                if observations is not None:
+                    # JSON never contains a raw newline, so the first line is the observations
+                    response = json.dumps(observations) + '\n' + response
+                _write_all(write_fd, response.encode('utf-8'))
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+        os.close(write_fd)
+        children[read_fd] = [pid, request.get('id'), []]
+        selector.register(read_fd, selectors.EVENT_READ)
+
+    def finish_child(read_fd):
+        selector.unregister(read_fd)
+        os.close(read_fd)
+        pid, request_id, chunks = children.pop(read_fd)
+        _, status = os.waitpid(pid, 0)
+        if chunks and status == 0:
+            response = b''.join(chunks)
+            if timings.ENABLED:
+                observations, _, response = response.partition(b'\n')
+                timings.record(json.loads(observations))
+            stdout.write(response.decode('utf-8') + '\n')
+            stdout.flush()
+        else:
+            write(_death_envelope(request_id, error_code, status))
+
+    def enqueue(line):
+        if not line.strip():
+            return
+        try:
+            request = json.loads(line)
+        except Exception as e:
+            write({'id': None, 'error': error_code, 'details': str(e)})
+            return
+        if request.get('op') == 'metrics':
+            # Answer from the parent, which outlives the children
+            write(handle_request(request, handlers, error_code))
+            return
+        queued.append(request)
+
+    while not eof or queued or children:
+        while queued and len(children) < max_children:
+            start_child(queued.popleft())
+
+        for key, _ in selector.select():
+            if key.fd == stdin_fd:
+                data = os.read(stdin_fd, 1 << 16)
+                if not data:
+                    eof = True
+                    selector.unregister(stdin_fd)
+                    enqueue(buffered)
+                    buffered = b''
+                    continue
+                *lines, buffered = (buffered + data).split(b'\n')
+                for line in lines:
+                    enqueue(line)
+            else:
+                chunk = os.read(key.fd, 1 << 16)
+                if chunk:
+                    children[key.fd][2].append(chunk)
+                else:
+                    finish_child(key.fd)
+
+    selector.close()
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Fork-server for isolated analyzer/suggester requests')
+    parser.add_argument('--serve', action='store_true', help='accepted for worker-pool compatibility')
+    parser.add_argument('--tool', choices=['analyze', 'suggest'], default='analyze',
+                        help='tool used when a request has no "tool" field')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_MB, help='RLIMIT_AS per child (0 = none)')
+    parser.add_argument('--cpu-seconds', type=int, default=DEFAULT_CPU_SECONDS, help='RLIMIT_CPU per child (0 = none)')
+    parser.add_argument('--max-children', type=int, default=None, help='concurrent children (default: CPU count)')
+    parser.add_argument('--timings', action='store_true', help='record per-phase histograms (see timings.py)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    if args.timings:
+        timings.enable()
+
+    # Imported once here so every fork starts with them warm
+    import ast  # noqa: F401
+    from analyzer import analyze_python_code
+    from refactor_suggester import suggest_refactoring
+
+    serve_forked(
+        {'analyze': analyze_python_code, 'suggest': suggest_refactoring},
+        'worker_error',
+        default_tool=args.tool,
+        memory_mb=args.memory_mb,
+        cpu_seconds=args.cpu_seconds,
+        max_children=args.max_children
+    )
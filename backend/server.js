@@ -5,7 +5,6 @@ require('dotenv').config();
 const express = require("express");
 const cors = require("cors");
 const bodyParser = require("body-parser");
-const { spawn } = require("child_process");
 const path = require("path");
 const axios = require("axios");
 
@@ -14,6 +13,7 @@ const refactorSuggester = require("./refactor-engine/refactor-suggester/extract_
 const githubFetcher = require("./github-fetcher");
 const commitAnalyzer = require("./commit-analyzer");
 const reportGenerator = require("./report-generator");
+const { PythonWorkerPool, mergePrometheusText } = require("./python-worker-pool");
 
 // Get Gemini API key from environment variable
 const GEMINI_API_KEY = process.env.GEMINI_API_KEY;
@@ -75,98 +75,57 @@ function detectLanguage(code, filename) {
   return 'javascript'; // Default to JavaScript
 }
 
+// ==========================
+// Helper: Python Worker Pools
+// ==========================
+// Warm `--serve` workers answer every request, so we no longer pay interpreter
+// startup for each /analyze call or each file in /analyze-repo.
+// PYTHON_CACHE=1 lets workers answer repeated inputs from the on-disk result cache.
+// PYTHON_TIMINGS=1 adds per-phase `_timings` to results and enables GET /metrics.
+// PYTHON_ISOLATE=1 runs each request in a forked, rlimited child of the warm worker.
+// PYTHON_MAX_SECONDS stops the analyzer short of the 30 s pool timeout with a partial
+// (`truncated`) result instead of losing all work when the worker is killed.
+const pythonWorkerArgs = [
+  ...(process.env.PYTHON_CACHE === '1' ? ['--cache'] : []),
+  ...(process.env.PYTHON_TIMINGS === '1' ? ['--timings'] : []),
+  ...(process.env.PYTHON_ISOLATE === '1' ? ['--isolate'] : [])
+];
+const pythonAnalyzerArgs = [
+  ...pythonWorkerArgs,
+  '--max-seconds', process.env.PYTHON_MAX_SECONDS || '20',
+  ...(process.env.PYTHON_MAX_NODES ? ['--max-nodes', process.env.PYTHON_MAX_NODES] : [])
+];
+
+const pythonAnalyzerPool = new PythonWorkerPool(
+  path.join(__dirname, 'refactor-engine', 'python-analyzer', 'analyzer.py'),
+  { label: 'Python analyzer', args: pythonAnalyzerArgs }
+);
+
+const pythonSuggesterPool = new PythonWorkerPool(
+  path.join(__dirname, 'refactor-engine', 'python-analyzer', 'refactor_suggester.py'),
+  { label: 'Python refactoring suggester', args: pythonWorkerArgs }
+);
+
+// Parses once for analyze + suggest and keeps recent trees in an in-memory LRU.
+// Takes the analyzer's budget, cache and isolation flags so /analyze-and-suggest
+// behaves like /analyze; its ranking budget stays at combined.py's --rank-seconds default.
+const pythonCombinedPool = new PythonWorkerPool(
+  path.join(__dirname, 'refactor-engine', 'python-analyzer', 'combined.py'),
+  { label: 'Python combined analyzer', args: pythonAnalyzerArgs }
+);
+
 // ==========================
 // Helper: Analyze Python Code
 // ==========================
-function analyzePythonCode(code, filename) {
-  return new Promise((resolve, reject) => {
-    const pythonScript = path.join(__dirname, 'refactor-engine', 'python-analyzer', 'analyzer.py');
-    
-    // Use 'python' or 'python3' depending on your system
-    const python = spawn('python', [pythonScript]);
-    
-    let output = '';
-    let errorOutput = '';
-    
-    // Send code to Python script via stdin
-    const input = JSON.stringify({ code, filename: filename || 'file.py' });
-    python.stdin.write(input);
-    python.stdin.end();
-    
-    python.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-    
-    python.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
-    
-    python.on('close', (exitCode) => {
-      if (exitCode !== 0) {
-        reject(new Error(`Python analyzer failed: ${errorOutput}`));
-      } else {
-        try {
-          const result = JSON.parse(output);
-          resolve(result);
-        } catch (err) {
-          reject(new Error(`Failed to parse Python output: ${output}`));
-        }
-      }
-    });
-    
-    // Timeout after 30 seconds
-    setTimeout(() => {
-      python.kill();
-      reject(new Error('Python analyzer timeout'));
-    }, 30000);
-  });
+function analyzePythonCode(code, filename, options = {}) {
+  return pythonAnalyzerPool.run(code, filename || 'file.py', options);
 }
 
 // ==========================
 // Helper: Suggest Python Refactoring (NEW!)
 // ==========================
 function suggestPythonRefactoring(code, filename) {
-  return new Promise((resolve, reject) => {
-    const pythonScript = path.join(__dirname, 'refactor-engine', 'python-analyzer', 'refactor_suggester.py');
-    
-    // Use 'python' or 'python3' depending on your system
-    const python = spawn('python', [pythonScript]);
-    
-    let output = '';
-    let errorOutput = '';
-    
-    // Send code to Python script via stdin
-    const input = JSON.stringify({ code, filename: filename || 'file.py' });
-    python.stdin.write(input);
-    python.stdin.end();
-    
-    python.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-    
-    python.stderr.on('data', (data) => {
-      errorOutput += data.toString();
-    });
-    
-    python.on('close', (exitCode) => {
-      if (exitCode !== 0) {
-        reject(new Error(`Python refactoring suggester failed: ${errorOutput}`));
-      } else {
-        try {
-          const result = JSON.parse(output);
-          resolve(result);
-        } catch (err) {
-          reject(new Error(`Failed to parse Python refactoring output: ${output}`));
-        }
-      }
-    });
-    
-    // Timeout after 30 seconds
-    setTimeout(() => {
-      python.kill();
-      reject(new Error('Python refactoring suggester timeout'));
-    }, 30000);
-  });
+  return pythonSuggesterPool.run(code, filename || 'file.py');
 }
 
 // ==========================
@@ -176,6 +135,18 @@ app.get("/", (req, res) => {
   res.send("Backend is working! Supports JavaScript/TypeScript and Python 🐍");
 });
 
+// ==========================
+// Python Worker Metrics (Prometheus)
+// ==========================
+app.get("/metrics", async (req, res) => {
+  const texts = [
+    ...(await pythonAnalyzerPool.metrics()),
+    ...(await pythonSuggesterPool.metrics()),
+    ...(await pythonCombinedPool.metrics())
+  ];
+  res.type('text/plain; version=0.0.4').send(mergePrometheusText(texts));
+});
+
 // ==========================
 // ANALYZE ROUTE (Multi-language)
 // ==========================
@@ -214,6 +185,42 @@ app.post("/analyze", async (req, res) => {
   }
 });
 
+// ==========================
+// ANALYZE + SUGGEST ROUTE (one parse for Python)
+// ==========================
+app.post("/analyze-and-suggest", async (req, res) => {
+  const { code, filename } = req.body || {};
+
+  if (!code) return res.status(400).json({ error: "No code given" });
+
+  try {
+    const language = detectLanguage(code, filename || "file.js");
+
+    let analysis;
+    let refactoring;
+
+    if (language === 'python') {
+      ({ analysis, refactoring } = await pythonCombinedPool.run(code, filename || "file.py", { tool: 'both' }));
+    } else {
+      analysis = astAnalyzer.analyzeCode(code, filename || "file.js");
+      refactoring = refactorSuggester.suggestExtractFunction(code, filename || "file.js");
+    }
+
+    if (analysis.error) {
+      return res.status(400).json({
+        ok: false,
+        error: analysis.error,
+        details: analysis.details
+      });
+    }
+
+    res.json({ ok: true, analysis, refactoring, language });
+  } catch (err) {
+    console.error("Analyze+suggest error:", err);
+    res.status(500).json({ ok: false, error: err.message });
+  }
+});
+
 // ==========================
 // SUGGEST ROUTE (Multi-language!) (UPDATED!)
 // ==========================
@@ -414,19 +421,35 @@ app.post("/list-files", async (req, res) => {
 // ANALYZE FILE HISTORY ROUTE (TIME MACHINE!)
 // ==========================
 app.post("/analyze-history", async (req, res) => {
-  const { repoUrl, filePath, maxCommits = 10 } = req.body;
+  const { repoUrl, filePath, maxCommits = 10, stream = false } = req.body;
 
   if (!repoUrl || !filePath) {
     return res.status(400).json({ error: "Repository URL and file path required" });
   }
 
+  // Stop fetching and analyzing commits once the client has gone away
+  const controller = new AbortController();
+  res.on('close', () => {
+    if (!res.writableFinished) controller.abort();
+  });
+
+  // stream: newline-delimited JSON, one progress line per commit, then the result line
+  if (stream) {
+    res.type('application/x-ndjson');
+    res.flushHeaders();
+  }
+  const reply = (status, body) => {
+    if (!stream) return res.status(status).json(body);
+    res.end(JSON.stringify({ type: 'result', ...body }) + '\n');
+  };
+
   try {
     // Create analysis function that handles both JS and Python
-    const analyzeFunction = async (code, filename) => {
+    const analyzeFunction = async (code, filename, options = {}) => {
       const language = detectLanguage(code, filename);
       
       if (language === 'python') {
-        return await analyzePythonCode(code, filename);
+        return await analyzePythonCode(code, filename, options);
       } else {
         return astAnalyzer.analyzeCode(code, filename);
       }
@@ -437,15 +460,24 @@ app.post("/analyze-history", async (req, res) => {
       repoUrl,
       filePath,
       analyzeFunction,
-      { maxCommits }
+      {
+        maxCommits,
+        signal: controller.signal,
+        onProgress: stream
+          ? (progress) => res.write(JSON.stringify({ type: 'progress', ...progress }) + '\n')
+          : undefined
+      }
     );
     
-    res.json({
+    reply(200, {
       ok: true,
       ...result
     });
     
   } catch (err) {
+    // Nobody is listening for the answer any more
+    if (controller.signal.aborted) return;
+
     console.error("History analysis error:", err);
     
     // If file not found, suggest available files
@@ -454,7 +486,7 @@ app.post("/analyze-history", async (req, res) => {
         const { owner, repo } = githubFetcher.parseGitHubUrl(repoUrl);
         const files = await commitAnalyzer.listRepositoryFiles(owner, repo);
         
-        return res.status(404).json({ 
+        return reply(404, { 
           ok: false, 
           error: err.message,
           suggestions: files.slice(0, 5),
@@ -462,11 +494,11 @@ app.post("/analyze-history", async (req, res) => {
         });
       } catch (listErr) {
         // If we can't list files, just return the original error
-        return res.status(500).json({ ok: false, error: err.message });
+        return reply(500, { ok: false, error: err.message });
       }
     }
     
-    res.status(500).json({ ok: false, error: err.message });
+    reply(500, { ok: false, error: err.message });
   }
 });
 
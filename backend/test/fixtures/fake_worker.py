@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Stand-in for a `--serve` analyzer worker: one JSON request per line, answered in order.
+code "sleep:<seconds>" delays the answer, code "crash" exits, anything else is echoed."""
+
+import sys
+import json
+import time
+
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get('op') == 'metrics':
+        print(json.dumps({'id': request['id'], 'result': {'text': 'fake_requests_total 1\n'}}), flush=True)
+        continue
+    code = request.get('code', '')
+    if code == 'crash':
+        sys.exit(1)
+    if code.startswith('sleep:'):
+        time.sleep(float(code.split(':', 1)[1]))
+    print(json.dumps({'id': request['id'], 'result': {'echo': code}}), flush=True)
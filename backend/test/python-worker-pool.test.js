@@ -0,0 +1,117 @@
+// Run with: npm test (node --test)
+const test = require('node:test');
+const assert = require('node:assert');
+const path = require('path');
+const { getEventListeners } = require('events');
+const { PythonWorkerPool } = require('../python-worker-pool');
+
+const FAKE_WORKER = path.join(__dirname, 'fixtures', 'fake_worker.py');
+
+function fakePool(options = {}) {
+  return new PythonWorkerPool(FAKE_WORKER, { label: 'Fake worker', ...options });
+}
+
+test('answers requests from a warm worker', async () => {
+  const pool = fakePool({ size: 1 });
+  try {
+    assert.deepStrictEqual(await pool.run('a', 'a.py'), { echo: 'a' });
+    assert.deepStrictEqual(await pool.run('b', 'b.py'), { echo: 'b' });
+    assert.strictEqual(pool.workers.length, 1);
+  } finally {
+    pool.close();
+  }
+});
+
+test('a worker that fails to spawn rejects at once and leaves the pool', async () => {
+  const pool = fakePool({ size: 1, pythonBin: 'no-such-python-binary', timeoutMs: 10000 });
+  const started = Date.now();
+  await assert.rejects(pool.run('a', 'a.py'), /failed to start/);
+  assert.ok(Date.now() - started < 5000);
+  assert.strictEqual(pool.workers.length, 0);
+});
+
+test('a timed-out worker is replaced before its process exits', async () => {
+  const pool = fakePool({ size: 1, timeoutMs: 300 });
+  try {
+    await assert.rejects(pool.run('sleep:5', 'a.py'), /timeout/);
+    assert.strictEqual(pool.workers.length, 0);
+    assert.deepStrictEqual(await pool.run('b', 'b.py'), { echo: 'b' });
+  } finally {
+    pool.close();
+  }
+});
+
+test('a crashed worker rejects its requests and the pool recovers', async () => {
+  const pool = fakePool({ size: 1 });
+  try {
+    await assert.rejects(pool.run('crash', 'a.py'), /exited/);
+    assert.deepStrictEqual(await pool.run('b', 'b.py'), { echo: 'b' });
+  } finally {
+    pool.close();
+  }
+});
+
+test('aborting a request stops its idle worker and the next request still succeeds', async () => {
+  const pool = fakePool({ size: 1 });
+  try {
+    const controller = new AbortController();
+    const pending = pool.run('sleep:5', 'a.py', { signal: controller.signal });
+    setTimeout(() => controller.abort(new Error('client went away')), 100);
+    await assert.rejects(pending, /client went away/);
+    assert.strictEqual(pool.workers.length, 0);
+    // Straight after the abort, not once the killed process has exited
+    assert.deepStrictEqual(await pool.run('b', 'b.py'), { echo: 'b' });
+  } finally {
+    pool.close();
+  }
+});
+
+test('aborting a queued request leaves the shared worker running', async () => {
+  const pool = fakePool({ size: 1 });
+  try {
+    const first = pool.run('sleep:0.3', 'a.py');
+    const controller = new AbortController();
+    const second = pool.run('b', 'b.py', { signal: controller.signal });
+    controller.abort(new Error('gone'));
+    await assert.rejects(second, /gone/);
+    assert.deepStrictEqual(await first, { echo: 'sleep:0.3' });
+    assert.strictEqual(pool.workers.length, 1);
+  } finally {
+    pool.close();
+  }
+});
+
+test('requests sharing one signal detach their abort listeners when they finish', async () => {
+  const pool = fakePool({ size: 2, timeoutMs: 300 });
+  const warnings = [];
+  const onWarning = (warning) => warnings.push(warning.name);
+  process.on('warning', onWarning);
+  try {
+    const { signal } = new AbortController();
+    for (let i = 0; i < 12; i++) {
+      assert.deepStrictEqual(await pool.run(`r${i}`, 'a.py', { signal }), { echo: `r${i}` });
+    }
+    // Rejections and timeouts detach too
+    await assert.rejects(pool.run('crash', 'a.py', { signal }), /exited/);
+    await assert.rejects(pool.run('sleep:5', 'a.py', { signal }), /timeout/);
+    assert.strictEqual(getEventListeners(signal, 'abort').length, 0);
+    await new Promise(resolve => setImmediate(resolve));
+    assert.deepStrictEqual(warnings, []);
+  } finally {
+    process.off('warning', onWarning);
+    pool.close();
+  }
+});
+
+test('a metrics scrape stuck behind a long analysis times out without killing the worker', async () => {
+  const pool = fakePool({ size: 1, metricsTimeoutMs: 100 });
+  try {
+    const analysis = pool.run('sleep:0.5', 'a.py');
+    assert.deepStrictEqual(await pool.metrics(), []);
+    assert.deepStrictEqual(await analysis, { echo: 'sleep:0.5' });
+    assert.deepStrictEqual(await pool.metrics(), ['fake_requests_total 1\n']);
+    assert.strictEqual(pool.workers.length, 1);
+  } finally {
+    pool.close();
+  }
+});
@@ -1,6 +1,14 @@
+import os
+import sys
+import time
+import zlib
 import asyncio
-import requests
+import hashlib
+import httpx
 import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Any, List
 
 # Updated import paths for MCP
@@ -8,19 +16,381 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
+# Python code is analyzed in-process with the backend's own analyzer sources
+ANALYZER_DIR = os.environ.get("CODEX_ANALYZER_DIR", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "backend", "refactor-engine", "python-analyzer"))
+# Appended, not prepended: its flat module names (cache, timings, scan, ...) must not
+# shadow same-named modules the server or its dependencies import
+sys.path.append(ANALYZER_DIR)
+try:
+    from analyzer import Budget, analyze_python_code
+    from incremental import analyze_incremental
+    from parse_cache import parse_cached
+    from refactor_suggester import CLI_MAX_SECONDS, suggest_refactoring
+    from columnar import summarize
+    from scan import list_source_files
+except ImportError:
+    # Without them every call goes through the backend, analyze_files can't list directories
+    # and its report lists per-file results without the /analyze-repo summary
+    analyze_python_code = list_source_files = summarize = None
+
 server = Server(
     name="codex-refactor-mcp",
     version="1.0.0",
 )
 
-def call_backend(path, body):
-    url = f"http://localhost:4000{path}"
+BACKEND_URL = os.environ.get("CODEX_BACKEND_URL", "http://localhost:4000")
+# Backend requests in flight at once; further calls wait for a free connection
+MAX_CONNECTIONS = int(os.environ.get("CODEX_MAX_CONNECTIONS", "10"))
+DEFAULT_TIMEOUT = float(os.environ.get("CODEX_BACKEND_TIMEOUT", "30"))
+# Per-endpoint overrides: a history run fetches and analyzes many commits
+TIMEOUTS = {
+    "/analyze-history": 120.0,
+}
+
+_client = None
+
+def get_client():
+    """Shared keep-alive connection pool, created on first use inside the event loop"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=BACKEND_URL,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# Analyzer processes for Python tool calls; 0 sends Python through the backend as well
+LOCAL_WORKERS = int(os.environ.get("CODEX_LOCAL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Same limit the backend passes to analyzer.py
+PYTHON_MAX_SECONDS = float(os.environ.get("PYTHON_MAX_SECONDS", "20"))
+
+# One single-process pool per analyzer worker, so a filename can stick to one process
+_local_executors = []
+_next_executor = 0
+
+def detect_language(code, filename=None):
+    """Same rules as detectLanguage in backend/server.js"""
+    if filename:
+        if filename.endswith(".py"):
+            return "python"
+        if filename.endswith((".js", ".jsx", ".ts", ".tsx")):
+            return "javascript"
+    python_keywords = ["def ", "import ", "from ", "class ", "__init__", "self."]
+    if any(keyword in code for keyword in python_keywords) and ":" in code and "{" not in code:
+        return "python"
+    return "javascript"
+
+def _analyze_python(code, filename):
+    """Runs in a worker process; mirrors the backend's /analyze response.
+    Agents re-analyze the file they are editing, so only changed functions are redone.
+    Unnamed code has no previous revision: sharing one session would diff unrelated snippets."""
+    budget = Budget(max_seconds=PYTHON_MAX_SECONDS)
+    if filename:
+        analysis = analyze_incremental(code, filename, budget=budget, parse=parse_cached)
+    else:
+        analysis = analyze_python_code(code, "file.py", budget=budget, parse=parse_cached)
+    if "error" in analysis:
+        return {"ok": False, "error": analysis["error"], "details": analysis.get("details")}
+    return {"ok": True, "analysis": analysis, "language": "python"}
+
+def _suggest_python(code, filename):
+    """Runs in a worker process; mirrors the backend's /suggest response"""
+    return suggest_refactoring(code, filename or "file.py", parse=parse_cached, max_seconds=CLI_MAX_SECONDS)
+
+LOCAL_TOOLS = {
+    "/analyze": _analyze_python,
+    "/suggest": _suggest_python,
+}
+
+def local_executor_slot(filename=None):
+    """Index of the analyzer worker process for filename (CPU-bound work must not hold the
+    event loop's GIL), or None when Python goes to the backend.
+    A filename always maps to the same worker, whose incremental session then sees every
+    revision of that file; calls without one are spread round-robin."""
+    global _next_executor
+    if analyze_python_code is None or LOCAL_WORKERS <= 0:
+        return None
+    if not _local_executors:
+        _local_executors.extend(ProcessPoolExecutor(max_workers=1) for _ in range(LOCAL_WORKERS))
+    if filename:
+        return zlib.crc32(filename.encode("utf-8", "surrogatepass")) % LOCAL_WORKERS
+    _next_executor = (_next_executor + 1) % LOCAL_WORKERS
+    return _next_executor
+
+def reset_local_executor(slot, old):
+    """Give slot a fresh pool: after its worker died (a BrokenProcessPool refuses all later
+    work), or when an abandoned job is still running in it. Work already queued on the old
+    pool finishes there before it exits. Callers that saw the same old pool share one
+    replacement."""
+    if _local_executors and _local_executors[slot] is old:
+        old.shutdown(wait=False)
+        _local_executors[slot] = ProcessPoolExecutor(max_workers=1)
+
+def close_local_executor():
+    for executor in _local_executors:
+        executor.shutdown(cancel_futures=True)
+    _local_executors.clear()
+
+async def run_analysis(path, code, filename=None):
+    """/analyze or /suggest result: in-process for Python, from the backend for JS/TS"""
+    slot = local_executor_slot(filename)
+    if slot is not None and detect_language(code, filename) == "python":
+        loop = asyncio.get_running_loop()
+        # A second try on a fresh worker after one that died (OOM kill, crash)
+        for _ in range(2):
+            executor = _local_executors[slot]
+            try:
+                # submit itself raises BrokenProcessPool once the pool has noticed a dead worker
+                future = executor.submit(LOCAL_TOOLS[path], code, filename)
+                return await asyncio.wrap_future(future, loop=loop)
+            except asyncio.CancelledError:
+                # A job that already started can't be cancelled and would hold the slot until
+                # it finished; it runs out (under its budget) in the old pool instead
+                if future.running():
+                    reset_local_executor(slot, executor)
+                raise
+            except BrokenProcessPool as e:
+                reset_local_executor(slot, executor)
+                error = e
+            except Exception as e:
+                error = e
+                break
+        # The backend can still answer when in-process analysis keeps failing
+        print(f"In-process analysis failed, using backend: {error}", file=sys.stderr, flush=True)
+    return await call_backend(path, {"code": code, "filename": filename or "file.js"})
+
+class ResultCache:
+    """TTL/LRU cache of tool results with single-flight: concurrent misses on one key
+    await the same computation instead of each starting their own. The computation is
+    cancelled only when every caller waiting on it has been cancelled."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expires at, result)
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key, compute, on_progress=None):
+        """Cached result for key, else the result of the in-flight or a new compute(report).
+        report(event) forwards progress events to the on_progress of every waiting caller."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+
+        flight = self.inflight.get(key)
+        if flight is not None and flight["task"].done():
+            # Finished or cancelled but not settled yet - joining it could hand a live caller
+            # another caller's CancelledError, so start over
+            flight = None
+        if flight is None:
+            self.misses += 1
+            flight = {"listeners": [], "waiters": 0}
+
+            async def report(event):
+                for listener in list(flight["listeners"]):
+                    try:
+                        await listener(event)
+                    except Exception as e:
+                        # A caller's progress channel failing must not fail the shared work
+                        print(f"Progress notification failed: {e}", file=sys.stderr, flush=True)
+
+            flight["task"] = asyncio.ensure_future(compute(report))
+            self.inflight[key] = flight
+            flight["task"].add_done_callback(lambda done, flight=flight: self._settle(key, flight))
+        else:
+            self.coalesced += 1
+
+        if on_progress is not None:
+            flight["listeners"].append(on_progress)
+        flight["waiters"] += 1
+        try:
+            # One caller giving up must not cancel the request the others are waiting on
+            return await asyncio.shield(flight["task"])
+        except asyncio.CancelledError:
+            # ...but the last one stops it, down to the backend request. cancel() only takes
+            # effect at the task's next step, so retire the flight now for callers arriving before
+            if flight["waiters"] == 1:
+                flight["task"].cancel()
+                if self.inflight.get(key) is flight:
+                    del self.inflight[key]
+            raise
+        finally:
+            flight["waiters"] -= 1
+            if on_progress is not None:
+                flight["listeners"].remove(on_progress)
+
+    def _settle(self, key, flight):
+        task = flight["task"]
+        # A replacement flight may already be running under this key
+        if self.inflight.get(key) is flight:
+            del self.inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        # Transport errors, rate limits and the like are worth retrying
+        if not result.get("ok"):
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self.entries),
+            "inflight": len(self.inflight),
+        }
+
+CACHE_TTL = float(os.environ.get("CODEX_CACHE_TTL", "300"))
+CACHE_ENTRIES = int(os.environ.get("CODEX_CACHE_ENTRIES", "256"))
+# analyze_code, detect_code_smells and get_quality_score all share one /analyze result
+analysis_cache = ResultCache(CACHE_ENTRIES, CACHE_TTL)
+# History runs are the most expensive calls and change only with new commits
+history_cache = ResultCache(32, float(os.environ.get("CODEX_HISTORY_CACHE_TTL", "600")))
+
+def content_key(path, code, filename):
+    digest = hashlib.sha256(code.encode("utf-8", "surrogatepass"))
+    # The filename picks the language, so it is part of the content
+    digest.update(b"\0" + (filename or "").encode("utf-8", "surrogatepass"))
+    return (path, digest.hexdigest())
+
+async def cached_analysis(path, code, filename=None):
+    """run_analysis through analysis_cache"""
+    return await analysis_cache.get(content_key(path, code, filename),
+                                    lambda report: run_analysis(path, code, filename))
+
+# Same extensions /analyze-repo fetches (github-fetcher.js)
+SOURCE_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".py")
+DEFAULT_CONCURRENCY = 8
+MAX_CONCURRENCY = 32
+MAX_BATCH_FILES = 500
+# Same cap as the backend's JSON body limit
+MAX_FILE_BYTES = 5 * 1024 * 1024
+
+def read_directory(root, max_files=MAX_BATCH_FILES):
+    """([(path, code)], skipped entries, number of files left out past max_files) for the
+    source files under root"""
+    files = []
+    skipped = []
+    paths = list_source_files(root, SOURCE_EXTENSIONS)
+    for rel_path in paths[:max_files]:
+        path = os.path.join(root, rel_path)
+        try:
+            if os.path.getsize(path) > MAX_FILE_BYTES:
+                skipped.append({"path": rel_path, "skipped": f"larger than {MAX_FILE_BYTES} bytes"})
+                continue
+            with open(path, encoding="utf-8", errors="replace") as f:
+                files.append((rel_path, f.read()))
+        except OSError as e:
+            skipped.append({"path": rel_path, "skipped": str(e)})
+    return files, skipped, max(0, len(paths) - max_files)
+
+async def analyze_files(files, concurrency=DEFAULT_CONCURRENCY, top=10, report=None):
+    """/analyze-repo shaped report for (filename, code) pairs, with at most `concurrency` in flight.
+    report(progress, total, message) is awaited as files finish. Without the analyzer sources
+    "summary" is None and "files" keeps the input order."""
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, MAX_CONCURRENCY)))
+    done = 0
+
+    async def analyze_one(filename, code):
+        nonlocal done
+        async with semaphore:
+            resp = await cached_analysis("/analyze", code, filename)
+        done += 1
+        if report is not None:
+            await report(done, len(files), f"Analyzed {done}/{len(files)} files ({filename})")
+        if not resp.get("ok"):
+            return {"path": filename, "skipped": resp.get("details") or resp.get("error", "Unknown error")}
+        analysis = resp["analysis"]
+        summary = analysis.get("summary", {})
+        return {
+            "path": filename,
+            "language": resp.get("language", detect_language(code, filename)),
+            "qualityScore": analysis.get("qualityScore", 0),
+            "complexity": summary.get("averageComplexity", 0),
+            # The Python analyzer reports "toxicity", the JS one "toxicityScore"
+            "toxicity": analysis.get("toxicity", analysis.get("toxicityScore", 0)),
+            "totalSmells": analysis.get("totalSmells", 0),
+            "functions": summary.get("totalFunctions", 0),
+            "lines": code.count("\n") + 1,
+            "size": len(code.encode("utf-8", "surrogatepass")),
+        }
+
+    entries = await asyncio.gather(*(analyze_one(filename, code) for filename, code in files))
+    analyzed = [entry for entry in entries if "skipped" not in entry]
+    summary, ranked, worst_files = summarize(analyzed, top) if summarize is not None else (None, analyzed, [])
+    return {
+        "ok": True,
+        "totalFiles": len(files),
+        "analyzedFiles": len(analyzed),
+        "summary": summary,
+        "files": ranked,
+        "worstFiles": worst_files,
+        "skipped": [entry for entry in entries if "skipped" in entry],
+    }
+
+def progress_reporter():
+    """report(progress, total, message) sending MCP progress notifications for the request
+    being handled, or None when the client didn't ask for progress"""
+    try:
+        context = server.request_context
+    except LookupError:
+        return None
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+
+    async def report(progress, total=None, message=None):
+        await context.session.send_progress_notification(token, progress, total, message=message)
+    return report
+
+async def call_backend_stream(path, body, on_progress, timeout=None):
+    """POST with "stream": true to an NDJSON route; on_progress gets each progress line
+    and the result line is returned. Cancelling closes the connection, which the backend
+    takes as the signal to stop."""
+    try:
+        async with get_client().stream("POST", path, json=dict(body, stream=True),
+                                       timeout=timeout or TIMEOUTS.get(path, DEFAULT_TIMEOUT)) as res:
+            res.raise_for_status()
+            async for line in res.aiter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.pop("type", None) == "progress":
+                    await on_progress(event)
+                else:
+                    return event
+        return {"error": "backend closed the stream without a result"}
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": str(e) or type(e).__name__}
+
+async def call_backend(path, body, timeout=None):
+    """POST to the backend without blocking the event loop"""
     try:
-        res = requests.post(url, json=body, timeout=30)
+        res = await get_client().post(path, json=body, timeout=timeout or TIMEOUTS.get(path, DEFAULT_TIMEOUT))
         res.raise_for_status()
         return res.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": str(e)}
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": str(e) or type(e).__name__}
 
 @server.list_tools()
 async def list_tools() -> List[Tool]:
@@ -113,6 +483,41 @@ async def list_tools() -> List[Tool]:
                 },
                 "required": ["repo_url", "file_path"]
             }
+        ),
+        Tool(
+            name="analyze_files",
+            description="Scores a whole set of JavaScript/TypeScript/Python files in one call, given either a list of {filename, code} entries or a local directory. Returns a project report with the same metrics as repository analysis: average quality score, maintainability index, smell density, technical debt, the worst files and per-file scores.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "files": {
+                        "type": "array",
+                        "description": "Files to analyze",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "filename": {"type": "string"},
+                                "code": {"type": "string"}
+                            },
+                            "required": ["filename", "code"]
+                        }
+                    },
+                    "directory": {
+                        "type": "string",
+                        "description": "Local directory to scan instead (respects .gitignore)"
+                    },
+                    "concurrency": {
+                        "type": "number",
+                        "description": f"Files analyzed at once (default: {DEFAULT_CONCURRENCY}, max: {MAX_CONCURRENCY})",
+                        "default": DEFAULT_CONCURRENCY
+                    },
+                    "top": {
+                        "type": "number",
+                        "description": "Number of worst files to list (default: 10)",
+                        "default": 10
+                    }
+                }
+            }
         )
     ]
 
@@ -153,7 +558,7 @@ def format_analysis_result(result):
     
     return output
 
-def format_suggestions_result(result):
+def format_suggestions_result(result, language="javascript"):
     """Format refactoring suggestions into readable text"""
     if not result.get("ok"):
         return f"Error: {result.get('error', 'Unknown error')}"
@@ -174,7 +579,7 @@ def format_suggestions_result(result):
         output += f"**Lines Extracted:** {sug.get('linesExtracted', 'N/A')}\n"
         output += f"**Risk Level:** {sug['risk']}\n"
         output += f"**Benefit:** {sug['benefit']}\n\n"
-        output += f"**Extracted Function:**\n```javascript\n{sug['extractedCode']}\n```\n\n"
+        output += f"**Extracted Function:**\n```{language}\n{sug['extractedCode']}\n```\n\n"
     
     return output
 
@@ -334,8 +739,100 @@ def format_repository_history(result):
     
     return output
 
+def format_files_report(result):
+    """Format a multi-file report into readable text"""
+    if not result.get("ok"):
+        return f"Error: {result.get('error', 'Unknown error')}"
+    
+    summary = result.get("summary")
+    if summary is None:
+        return format_files_list(result)
+    status = summary.get("healthStatus", "unknown")
+    status_emoji = "✅" if status == "healthy" else "⚠️" if status == "needs_improvement" else "🔴"
+    
+    output = "## Project Quality Report\n\n"
+    output += f"**Files Analyzed:** {result.get('analyzedFiles', 0)}/{result.get('totalFiles', 0)}\n"
+    output += f"{status_emoji} **Health Status: {status.upper()}**\n\n"
+    
+    output += "### Summary\n"
+    output += f"- Average Quality Score: {summary.get('averageQualityScore', 0)}/100\n"
+    output += f"- Maintainability Index: {summary.get('maintainabilityIndex', 0)}\n"
+    output += f"- Average Complexity: {summary.get('averageComplexity', 0)}\n"
+    output += f"- Average Toxicity: {summary.get('averageToxicity', 0)}\n"
+    output += f"- Functions: {summary.get('totalFunctions', 0)}\n"
+    output += f"- Lines: {summary.get('totalLines', 0)}\n"
+    output += f"- Code Smells: {summary.get('totalSmells', 0)} ({summary.get('smellDensity', 0)} per 1000 lines)\n"
+    output += f"- Technical Debt: ~{summary.get('technicalDebtHours', 0)} hours\n"
+    output += f"- Critical Files: {summary.get('criticalFiles', 0)}\n\n"
+    
+    if result.get("worstFiles"):
+        output += "### Worst Files\n\n"
+        output += "```\n"
+        output += "Score | Smells | Complexity | File\n"
+        output += "------|--------|------------|------------------\n"
+        for entry in result["worstFiles"]:
+            score_indicator = "🟢" if entry['qualityScore'] > 70 else "🟡" if entry['qualityScore'] > 50 else "🔴"
+            output += f"{score_indicator} {entry['qualityScore']:3d} | {entry['totalSmells']:6d} | {entry['complexity']:10} | {entry['path']}\n"
+        output += "```\n\n"
+    
+    return output + format_files_footer(result)
+
+def format_files_list(result):
+    """Per-file results of a report made without the analyzer sources (no project summary)"""
+    output = "## Project Quality Report\n\n"
+    output += f"**Files Analyzed:** {result.get('analyzedFiles', 0)}/{result.get('totalFiles', 0)}\n"
+    output += f"Project summary unavailable: it needs the analyzer sources in {ANALYZER_DIR}\n\n"
+    
+    if result.get("files"):
+        output += "```\n"
+        output += "Score | Smells | Complexity | File\n"
+        output += "------|--------|------------|------------------\n"
+        for entry in result["files"]:
+            output += f"{entry['qualityScore']:5d} | {entry['totalSmells']:6d} | {entry['complexity']:10} | {entry['path']}\n"
+        output += "```\n\n"
+    
+    return output + format_files_footer(result)
+
+def format_files_footer(result):
+    """Skipped and truncated file notes shared by both report layouts"""
+    output = ""
+    if result.get("skipped"):
+        output += f"### ⚠️ Skipped {len(result['skipped'])} file(s)\n"
+        for entry in result["skipped"][:10]:
+            output += f"- {entry['path']}: {entry['skipped']}\n"
+    
+    if result.get("truncatedFiles"):
+        output += f"\n⚠️ {result['truncatedFiles']} more file(s) not analyzed: the limit is {MAX_BATCH_FILES} per call\n"
+    
+    return output
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> List[TextContent]:
+    if name == "analyze_files":
+        files = [(entry.get("filename", "file.js"), entry.get("code", "")) for entry in arguments.get("files") or []]
+        skipped = []
+        truncated = 0
+        directory = arguments.get("directory")
+        if directory:
+            if list_source_files is None:
+                return [TextContent(type="text", text=f"Error: scanning a directory needs the analyzer sources in {ANALYZER_DIR}")]
+            if not os.path.isdir(directory):
+                return [TextContent(type="text", text=f"Error: '{directory}' is not a directory")]
+            # Listing and reading touch the disk; keep them off the event loop
+            found, skipped, truncated = await asyncio.to_thread(read_directory, directory)
+            files += found
+        if not files:
+            return [TextContent(type="text", text="Error: 'files' or 'directory' is required")]
+        
+        truncated += max(0, len(files) - MAX_BATCH_FILES)
+        files = files[:MAX_BATCH_FILES]
+        result = await analyze_files(files, int(arguments.get("concurrency", DEFAULT_CONCURRENCY)),
+                                     int(arguments.get("top", 10)), progress_reporter())
+        result["totalFiles"] += len(skipped)
+        result["skipped"] = skipped + result["skipped"]
+        result["truncatedFiles"] = truncated
+        return [TextContent(type="text", text=format_files_report(result))]
+    
     if name == "analyze_repository_history":
         repo_url = arguments.get("repo_url")
         file_path = arguments.get("file_path")
@@ -347,39 +844,54 @@ async def call_tool(name: str, arguments: dict) -> List[TextContent]:
         # Limit max_commits to prevent abuse
         max_commits = min(max_commits, 20)
         
-        resp = call_backend("/analyze-history", {
+        body = {
             "repoUrl": repo_url,
             "filePath": file_path,
             "maxCommits": max_commits
-        })
+        }
+        report = progress_reporter()
+        timeline = []
+        
+        async def on_progress(event):
+            if event.get("point"):
+                timeline.append(event["point"])
+            message = f"Analyzed {event['analyzed']}/{event['total']} commits"
+            if timeline:
+                message += "; timeline so far: " + ", ".join(f"{point['sha']} {point['score']}" for point in timeline)
+            await report(event["analyzed"], event["total"], message)
+        
+        resp = await history_cache.get((repo_url, file_path, max_commits),
+                                       lambda progress: call_backend_stream("/analyze-history", body, progress),
+                                       on_progress if report else None)
         
         formatted = format_repository_history(resp)
         return [TextContent(type="text", text=formatted)]
     
     # Original tools
     code = arguments.get("code")
-    filename = arguments.get("filename", "file.js")
+    # No default: without a filename the language is detected from the code
+    filename = arguments.get("filename")
     
     if not code:
         return [TextContent(type="text", text="Error: 'code' is required")]
     
     if name == "analyze_code":
-        resp = call_backend("/analyze", {"code": code, "filename": filename})
+        resp = await cached_analysis("/analyze", code, filename)
         formatted = format_analysis_result(resp)
         return [TextContent(type="text", text=formatted)]
     
     elif name == "suggest_refactors":
-        resp = call_backend("/suggest", {"code": code, "filename": filename})
-        formatted = format_suggestions_result(resp)
+        resp = await cached_analysis("/suggest", code, filename)
+        formatted = format_suggestions_result(resp, detect_language(code, filename))
         return [TextContent(type="text", text=formatted)]
     
     elif name == "detect_code_smells":
-        resp = call_backend("/analyze", {"code": code, "filename": filename})
+        resp = await cached_analysis("/analyze", code, filename)
         formatted = format_code_smells(resp)
         return [TextContent(type="text", text=formatted)]
     
     elif name == "get_quality_score":
-        resp = call_backend("/analyze", {"code": code, "filename": filename})
+        resp = await cached_analysis("/analyze", code, filename)
         formatted = format_quality_score(resp)
         return [TextContent(type="text", text=formatted)]
     
@@ -388,12 +900,16 @@ async def call_tool(name: str, arguments: dict) -> List[TextContent]:
 
 async def main():
     print("Codex MCP server running...", flush=True)
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options(),
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options(),
+            )
+    finally:
+        await close_client()
+        close_local_executor()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The server needs its runtime dependencies; without them there is nothing to test
+pytest.importorskip("httpx")
+pytest.importorskip("mcp")
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MCP_DIR)
+
+
+@pytest.fixture
+def mcp_server():
+    """The server module with empty result caches; analyzer workers are shut down afterwards"""
+    import mcp_server
+    mcp_server.analysis_cache.entries.clear()
+    mcp_server.history_cache.entries.clear()
+    yield mcp_server
+    mcp_server.close_local_executor()
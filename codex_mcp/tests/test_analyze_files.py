@@ -0,0 +1,73 @@
+import asyncio
+
+SIMPLE = "def f(x):\n    return x\n"
+BRANCHY = "def g(x):\n    if x:\n        if x > 1:\n            return 2\n        return 1\n    return 0\n"
+
+
+def _fake_backend(calls):
+    async def call_backend(path, body, timeout=None):
+        calls.append((path, body["filename"]))
+        return {"ok": True, "language": "javascript",
+                "analysis": {"qualityScore": 80, "toxicityScore": 5, "totalSmells": 1,
+                             "summary": {"averageComplexity": 2, "totalFunctions": 1}}}
+    return call_backend
+
+
+def test_explicit_files_are_summarized_like_analyze_repo(mcp_server):
+    from columnar import summarize
+    result = asyncio.run(mcp_server.analyze_files([("a.py", SIMPLE), ("b.py", BRANCHY)], top=1))
+    assert result["totalFiles"] == result["analyzedFiles"] == 2
+    assert result["skipped"] == []
+    summary, ranked, worst = summarize(result["files"], 1)
+    assert result["summary"] == summary
+    assert [f["path"] for f in result["files"]] == [f["path"] for f in ranked]
+    assert result["worstFiles"] == worst and len(worst) == 1
+
+
+def test_syntax_errors_are_skipped_not_scored(mcp_server):
+    result = asyncio.run(mcp_server.analyze_files([("a.py", SIMPLE), ("broken.py", "def (:\n")]))
+    assert result["analyzedFiles"] == 1
+    assert [f["path"] for f in result["files"]] == ["a.py"]
+    (skipped,) = result["skipped"]
+    assert skipped["path"] == "broken.py" and "syntax" in skipped["skipped"]
+    assert result["summary"]["totalFunctions"] == 1
+
+
+def test_directory_input_lists_and_reads_source_files(mcp_server, tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text(SIMPLE)
+    (tmp_path / "b.py").write_text(BRANCHY)
+    (tmp_path / "notes.txt").write_text("not source")
+    mcp_server.MAX_FILE_BYTES, limit = len(SIMPLE), mcp_server.MAX_FILE_BYTES
+    try:
+        (content,) = asyncio.run(mcp_server.call_tool("analyze_files", {"directory": str(tmp_path)}))
+    finally:
+        mcp_server.MAX_FILE_BYTES = limit
+    text = content.text
+    assert "**Files Analyzed:** 1/2" in text
+    assert "- Average Quality Score: 100/100" in text
+    assert text.split("### Worst Files")[1].count("| pkg/a.py") == 1
+    assert f"- b.py: larger than {len(SIMPLE)} bytes" in text
+    assert "notes.txt" not in text
+
+
+def test_javascript_and_local_fallback_go_to_the_backend(mcp_server, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mcp_server, "call_backend", _fake_backend(calls))
+    monkeypatch.setattr(mcp_server, "LOCAL_WORKERS", 0)
+    result = asyncio.run(mcp_server.analyze_files([("a.js", "function f() {}"), ("b.py", SIMPLE)]))
+    assert sorted(calls) == [("/analyze", "a.js"), ("/analyze", "b.py")]
+    assert result["analyzedFiles"] == 2
+    # The JS analyzer's "toxicityScore" lands in the same column as Python's "toxicity"
+    assert {f["toxicity"] for f in result["files"]} == {5}
+
+
+def test_report_without_analyzer_sources_has_no_summary(mcp_server, monkeypatch):
+    monkeypatch.setattr(mcp_server, "summarize", None)
+    result = asyncio.run(mcp_server.analyze_files([("b.py", BRANCHY), ("a.py", SIMPLE)]))
+    assert result["summary"] is None and result["worstFiles"] == []
+    assert [f["path"] for f in result["files"]] == ["b.py", "a.py"]
+    text = mcp_server.format_files_report(result)
+    assert "Project summary unavailable" in text
+    assert "| b.py" in text and "| a.py" in text
+    assert "Health Status" not in text
@@ -0,0 +1,22 @@
+FIRST = "def f(x):\n    return x + 1\n"
+SECOND = "def f(x):\n    if x:\n        return 1\n    return x\n"
+
+
+def test_unnamed_snippets_do_not_share_an_incremental_session(mcp_server):
+    import incremental
+    from analyzer import analyze_python_code
+    incremental._sessions.clear()
+    for code in (FIRST, SECOND):
+        result = mcp_server._analyze_python(code, None)
+        assert result["ok"] and result["analysis"] == analyze_python_code(code, "file.py")
+    assert not incremental._sessions
+
+
+def test_named_files_reuse_their_session(mcp_server):
+    import incremental
+    incremental._sessions.clear()
+    mcp_server._analyze_python(FIRST, "a.py")
+    session = incremental.get_session("a.py")
+    mcp_server._analyze_python(FIRST + "\n\n" + SECOND.replace("def f", "def g"), "a.py")
+    assert list(incremental._sessions) == ["a.py"]
+    assert session.last_stats == {"reused": 1, "analyzed": 1}
@@ -0,0 +1,37 @@
+import os
+import sys
+import signal
+import asyncio
+
+import pytest
+
+CODE = "def f(x):\n    if x:\n        return 1\n    return 2\n"
+
+
+def test_analyzer_dir_does_not_shadow_earlier_path_entries(mcp_server):
+    assert mcp_server.ANALYZER_DIR in sys.path
+    assert sys.path.index(mcp_server.ANALYZER_DIR) > 0
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_killed_worker_is_replaced_and_the_call_retried(mcp_server, monkeypatch):
+    monkeypatch.setattr(mcp_server, "LOCAL_WORKERS", 1)
+
+    async def backend_unavailable(path, body, timeout=None):
+        raise AssertionError("fell back to the backend")
+    monkeypatch.setattr(mcp_server, "call_backend", backend_unavailable)
+
+    async def scenario():
+        first = await mcp_server.run_analysis("/analyze", CODE, "a.py")
+        broken = mcp_server._local_executors[0]
+        (process,) = broken._processes.values()
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+        second = await mcp_server.run_analysis("/analyze", CODE, "a.py")
+        return first, broken, second
+
+    first, broken, second = asyncio.run(scenario())
+    assert first["ok"] and second == first
+    assert mcp_server._local_executors[0] is not broken
+    # The replacement keeps serving later calls
+    assert asyncio.run(mcp_server.run_analysis("/analyze", CODE, "b.py"))["ok"]
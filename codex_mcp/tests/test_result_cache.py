@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+
+def _counting(results, gate=None):
+    """compute(report) returning results in turn; each call waits for gate when given"""
+    calls = []
+
+    async def compute(report):
+        calls.append(len(calls))
+        if gate is not None:
+            await gate.wait()
+        return results[min(len(calls), len(results)) - 1]
+    return compute, calls
+
+
+def test_concurrent_misses_share_one_computation(mcp_server):
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 60)
+        gate = asyncio.Event()
+        compute, calls = _counting([{"ok": True, "n": 1}], gate)
+        first = asyncio.ensure_future(cache.get("k", compute))
+        second = asyncio.ensure_future(cache.get("k", compute))
+        await asyncio.sleep(0)
+        gate.set()
+        return await first, await second, calls, cache.stats()
+
+    first, second, calls, stats = asyncio.run(scenario())
+    assert first is second and calls == [0]
+    assert stats == {"hits": 0, "misses": 1, "coalesced": 1, "entries": 1, "inflight": 0}
+
+
+def test_progress_reaches_every_waiting_caller(mcp_server):
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 60)
+        gate = asyncio.Event()
+        seen = {"a": [], "b": []}
+
+        async def compute(report):
+            await gate.wait()
+            await report("half")
+            return {"ok": True}
+
+        async def listener(name):
+            async def on_progress(event):
+                seen[name].append(event)
+            return on_progress
+
+        tasks = [asyncio.ensure_future(cache.get("k", compute, await listener(name))) for name in seen]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return seen
+
+    assert asyncio.run(scenario()) == {"a": ["half"], "b": ["half"]}
+
+
+def test_one_caller_cancelling_leaves_the_computation_for_the_other(mcp_server):
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 60)
+        gate = asyncio.Event()
+        compute, calls = _counting([{"ok": True}], gate)
+        leaving = asyncio.ensure_future(cache.get("k", compute))
+        staying = asyncio.ensure_future(cache.get("k", compute))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        result = await staying
+        return leaving, result, calls
+
+    leaving, result, calls = asyncio.run(scenario())
+    assert leaving.cancelled()
+    assert result == {"ok": True} and calls == [0]
+
+
+def test_last_waiter_cancelling_stops_the_computation_and_it_is_not_joined(mcp_server):
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 60)
+        stopped = asyncio.Event()
+        started = []
+
+        async def slow(report):
+            started.append(True)
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        async def fast(report):
+            return {"ok": True, "fresh": True}
+
+        waiter = asyncio.ensure_future(cache.get("k", slow))
+        while not started:
+            await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        # The waiter has given up, but the computation has not reached its next step yet
+        assert not stopped.is_set()
+        late = await cache.get("k", fast)
+        await asyncio.wait_for(stopped.wait(), 1)
+        return waiter, late, started, cache.stats()
+
+    waiter, late, started, stats = asyncio.run(scenario())
+    assert waiter.cancelled() and started == [True]
+    assert late == {"ok": True, "fresh": True}
+    assert stats["misses"] == 2 and stats["coalesced"] == 0 and stats["inflight"] == 0
+
+
+@pytest.mark.parametrize("outcome", ["error result", "exception"])
+def test_failures_are_not_cached(mcp_server, outcome):
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 60)
+        calls = []
+
+        async def flaky(report):
+            calls.append(True)
+            if len(calls) == 1:
+                if outcome == "exception":
+                    raise RuntimeError("backend down")
+                return {"error": "backend down"}
+            return {"ok": True}
+
+        try:
+            first = await cache.get("k", flaky)
+        except RuntimeError as e:
+            first = e
+        return first, await cache.get("k", flaky), calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert isinstance(first, RuntimeError) or first == {"error": "backend down"}
+    assert second == {"ok": True} and len(calls) == 2
+
+
+def test_entries_expire_after_ttl(mcp_server, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(mcp_server.time, "monotonic", lambda: now[0])
+
+    async def scenario():
+        cache = mcp_server.ResultCache(8, 10)
+        compute, calls = _counting([{"ok": True, "n": 1}, {"ok": True, "n": 2}])
+        first = await cache.get("k", compute)
+        now[0] += 9
+        cached = await cache.get("k", compute)
+        now[0] += 2
+        expired = await cache.get("k", compute)
+        return first, cached, expired, cache.stats()
+
+    first, cached, expired, stats = asyncio.run(scenario())
+    assert first == cached == {"ok": True, "n": 1}
+    assert expired == {"ok": True, "n": 2}
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted(mcp_server):
+    async def scenario():
+        cache = mcp_server.ResultCache(2, 60)
+        computed = []
+
+        def compute_for(key):
+            async def compute(report):
+                computed.append(key)
+                return {"ok": True, "key": key}
+            return compute
+
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get(key, compute_for(key))
+        return computed, list(cache.entries)
+
+    computed, keys = asyncio.run(scenario())
+    # "a" was used after "b", so "c" pushed out "b"
+    assert computed == ["a", "b", "c", "b"]
+    assert keys == ["a", "b"]